@@ -1,17 +1,17 @@
 import sqlite3
 import re
 
-def assign_categories_to_beers():
+from db_connection import connect
+
+def assign_categories_to_beers(db_path='beers.db'):
     """
     Script to assign categories to existing beers based on their beer type and name.
     This helps migrate existing data to use the new hierarchical category structure.
     """
-    # Path to the database - we're already in the backend folder
-    db_path = 'beers.db'
+    # Path to the database - defaults to beers.db in the backend folder
     
     # Connect to the database
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = connect(db_path, row_factory=sqlite3.Row)
     cursor = conn.cursor()
     
     print(f"Connected to database at {db_path}")
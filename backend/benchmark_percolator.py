@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""Benchmark the saved-search percolator against re-running every search.
+
+Generates synthetic saved searches (built from real beer names, types,
+breweries and categories so they actually match things), then matches a
+batch of beers both through the percolator index and by checking every
+search against every beer, verifies the two agree, and reports timings.
+
+    python benchmark_percolator.py --searches 100000 --beers 200
+    python benchmark_percolator.py --db deploy-api/beers.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+from db_connection import DEFAULT_DB_PATH, connect
+from percolator import Percolator, load_category_tree, matches, parse_abv
+
+STYLE_WORDS = ['ipa', 'hazy', 'stout', 'lager', 'pilsner', 'sour', 'porter', 'saison', 'wheat', 'pale ale']
+
+
+def load_beers(db_path):
+    conn = connect(db_path, readonly=True, row_factory=sqlite3.Row)
+    try:
+        return [dict(row) for row in conn.execute("""
+            SELECT b.id, b.name, b.type, b.description, b.abv, b.category_id, br.name as brewery
+            FROM beers b
+            JOIN breweries br ON b.brewery_id = br.id
+        """)], [row['id'] for row in conn.execute("SELECT id FROM beer_categories")]
+    finally:
+        conn.close()
+
+
+def random_search(search_id, beers, category_ids, rng):
+    """A saved search with one to three filters, shaped like real /api/search use."""
+    beer = rng.choice(beers)
+    search = dict.fromkeys(('query', 'type', 'brewery', 'category_id', 'min_abv', 'max_abv'))
+    search['id'] = search_id
+    for field in rng.sample(['query', 'type', 'brewery', 'category', 'abv'], rng.randint(1, 3)):
+        if field == 'query':
+            words = (beer['name'] or '').split()
+            search['query'] = rng.choice(words) if words and rng.random() < 0.5 else rng.choice(STYLE_WORDS)
+        elif field == 'type':
+            search['type'] = rng.choice(STYLE_WORDS)
+        elif field == 'brewery':
+            search['brewery'] = (beer['brewery'] or '').split()[0] if beer['brewery'] else None
+        elif field == 'category' and category_ids:
+            search['category_id'] = rng.choice(category_ids)
+        elif field == 'abv':
+            low = round(rng.uniform(3, 9), 1)
+            search['min_abv'] = low if rng.random() < 0.7 else None
+            search['max_abv'] = round(low + rng.uniform(0.5, 4), 1)
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark saved-search percolation")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Database to take beers and categories from")
+    parser.add_argument("--searches", type=int, default=100000, help="Number of saved searches")
+    parser.add_argument("--beers", type=int, default=200, help="Number of new beers to match")
+    parser.add_argument("--naive-beers", type=int, default=20,
+                        help="Beers to match by brute force (it is slow) and compare against")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # connect() would create an empty database at a mistyped path
+    if not os.path.exists(args.db):
+        print(f"ERROR: Database not found at {args.db}")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    beers, category_ids = load_beers(args.db)
+    if not beers:
+        print(f"ERROR: No beers with a brewery in {args.db}")
+        return
+
+    searches = [random_search(search_id, beers, category_ids, rng) for search_id in range(1, args.searches + 1)]
+    batch = [rng.choice(beers) for _ in range(args.beers)]
+
+    conn = connect(args.db, readonly=True)
+    try:
+        start = time.perf_counter()
+        percolator = Percolator(load_category_tree(conn))
+        percolator.key_frequency = percolator.count_keys(beers)
+        for search in searches:
+            percolator.add(search)
+        build_seconds = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    print(f"Indexed {len(searches)} saved searches in {build_seconds:.2f}s "
+          f"({len(percolator.index)} anchor keys, {len(percolator.index.get(('all',), []))} unanchored)")
+
+    start = time.perf_counter()
+    indexed_results = [percolator.match(beer) for beer in batch]
+    indexed_seconds = time.perf_counter() - start
+    total_matches = sum(len(result) for result in indexed_results)
+    print(f"Percolator: {len(batch)} beers in {indexed_seconds * 1000:.1f}ms "
+          f"({indexed_seconds / len(batch) * 1000:.2f}ms/beer), {total_matches} matches")
+
+    naive_batch = batch[:args.naive_beers]
+    start = time.perf_counter()
+    naive_results = []
+    for beer in naive_batch:
+        beer = dict(beer, abv=parse_abv(beer['abv']))
+        naive_results.append([
+            search['id'] for search in searches
+            if matches(search, beer, percolator.category_sets.get(search['id'], ()))
+        ])
+    naive_seconds = time.perf_counter() - start
+    print(f"Every search x every beer: {len(naive_batch)} beers in {naive_seconds * 1000:.1f}ms "
+          f"({naive_seconds / max(1, len(naive_batch)) * 1000:.2f}ms/beer)")
+
+    mismatches = sum(
+        1 for indexed, naive in zip(indexed_results, naive_results) if sorted(indexed) != sorted(naive)
+    )
+    if mismatches:
+        print(f"ERROR: {mismatches} beers matched differently through the index")
+    else:
+        print(f"Results identical for {len(naive_batch)} beers; "
+              f"speedup {naive_seconds / max(1, len(naive_batch)) / (indexed_seconds / len(batch)):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
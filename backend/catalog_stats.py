@@ -0,0 +1,267 @@
+"""Denormalized catalog counters maintained by triggers.
+
+The API used to count beers per brewery with a correlated subquery and scan
+the whole beers table for ABV ranges and distinct types on every request.
+These tables hold those aggregates instead, and triggers on beers and
+beer_locations keep them current as rows are inserted, updated and deleted:
+
+  brewery_stats          beer and on-tap counts, ABV min/max/sum per brewery
+  brewery_style_counts   beers per (brewery, type)
+  style_counts           beers per type across the catalog
+  catalog_stats          one row of catalog-wide totals
+
+Only numeric ABVs count towards ABV aggregates (scraped values like
+'Unknown' are skipped). Removing a beer that held a brewery's ABV minimum or
+maximum recomputes that brewery's extremes from its own beers, which the
+brewery_id index keeps cheap.
+
+Every per-brewery figure follows beers.brewery_id, on-tap counts included: a
+beer_locations row counts towards the brewery of the beer it points at. The
+scrapers' schema (database.py) has no beers.brewery_id, and there the two
+brewery tables are not created at all; the API then falls back to counting.
+"""
+
+BREWERY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS brewery_stats (
+    brewery_id INTEGER PRIMARY KEY,
+    beer_count INTEGER NOT NULL DEFAULT 0,
+    available_count INTEGER NOT NULL DEFAULT 0,
+    abv_count INTEGER NOT NULL DEFAULT 0,
+    abv_total REAL NOT NULL DEFAULT 0,
+    abv_min REAL,
+    abv_max REAL
+);
+
+CREATE TABLE IF NOT EXISTS brewery_style_counts (
+    brewery_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    beer_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (brewery_id, type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_beers_brewery_id ON beers(brewery_id);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS style_counts (
+    type TEXT PRIMARY KEY,
+    beer_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS catalog_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    beer_count INTEGER NOT NULL DEFAULT 0,
+    available_count INTEGER NOT NULL DEFAULT 0,
+    abv_count INTEGER NOT NULL DEFAULT 0,
+    abv_total REAL NOT NULL DEFAULT 0,
+    abv_min REAL,
+    abv_max REAL
+);
+"""
+
+BREWERY_TABLES = ('brewery_stats', 'brewery_style_counts')
+STATS_TABLES = BREWERY_TABLES + ('style_counts', 'catalog_stats')
+
+
+def has_brewery_column(conn):
+    """Whether beers link to their brewery directly, through beers.brewery_id."""
+    return 'brewery_id' in {row[1] for row in conn.execute("PRAGMA table_info(beers)")}
+
+
+def _execute_script(conn, script):
+    # Statement by statement: executescript would commit the caller's transaction
+    for statement in script.split(';'):
+        if statement.strip():
+            conn.execute(statement)
+
+
+def _abv(row):
+    return f"CAST({row}.abv AS REAL)"
+
+
+def _available_rows(row):
+    return f"(SELECT COUNT(*) FROM beer_locations WHERE beer_id = {row}.id AND is_available)"
+
+
+def _add_beer(row, per_brewery=True, has_locations=False):
+    """Trigger statements counting a beer (NEW or OLD) into the aggregates.
+    
+    A beer brings its on-tap locations along to its brewery's available_count.
+    """
+    abv = _abv(row)
+    statements = ""
+    if per_brewery:
+        available = _available_rows(row) if has_locations else 0
+        statements = f"""
+        INSERT OR IGNORE INTO brewery_stats (brewery_id) SELECT {row}.brewery_id WHERE {row}.brewery_id IS NOT NULL;
+        UPDATE brewery_stats SET
+            beer_count = beer_count + 1,
+            available_count = available_count + {available},
+            abv_count = abv_count + COALESCE({abv} > 0, 0),
+            abv_total = abv_total + CASE WHEN {abv} > 0 THEN {abv} ELSE 0 END,
+            abv_min = CASE WHEN {abv} > 0 AND (abv_min IS NULL OR {abv} < abv_min) THEN {abv} ELSE abv_min END,
+            abv_max = CASE WHEN {abv} > 0 AND (abv_max IS NULL OR {abv} > abv_max) THEN {abv} ELSE abv_max END
+        WHERE brewery_id = {row}.brewery_id;
+
+        INSERT OR IGNORE INTO brewery_style_counts (brewery_id, type)
+            SELECT {row}.brewery_id, {row}.type WHERE {row}.brewery_id IS NOT NULL AND {row}.type != '';
+        UPDATE brewery_style_counts SET beer_count = beer_count + 1
+        WHERE brewery_id = {row}.brewery_id AND type = {row}.type;
+        """
+    return statements + f"""
+        INSERT OR IGNORE INTO style_counts (type) SELECT {row}.type WHERE {row}.type != '';
+        UPDATE style_counts SET beer_count = beer_count + 1 WHERE type = {row}.type;
+
+        UPDATE catalog_stats SET
+            beer_count = beer_count + 1,
+            abv_count = abv_count + COALESCE({abv} > 0, 0),
+            abv_total = abv_total + CASE WHEN {abv} > 0 THEN {abv} ELSE 0 END,
+            abv_min = CASE WHEN {abv} > 0 AND (abv_min IS NULL OR {abv} < abv_min) THEN {abv} ELSE abv_min END,
+            abv_max = CASE WHEN {abv} > 0 AND (abv_max IS NULL OR {abv} > abv_max) THEN {abv} ELSE abv_max END
+        WHERE id = 1;
+    """
+
+
+def _remove_beer(row, per_brewery=True, has_locations=False):
+    """Trigger statements taking a beer (OLD) back out of the aggregates."""
+    abv = _abv(row)
+    statements = ""
+    if per_brewery:
+        available = _available_rows(row) if has_locations else 0
+        statements = f"""
+        UPDATE brewery_stats SET
+            beer_count = beer_count - 1,
+            available_count = available_count - {available},
+            abv_count = abv_count - COALESCE({abv} > 0, 0),
+            abv_total = abv_total - CASE WHEN {abv} > 0 THEN {abv} ELSE 0 END
+        WHERE brewery_id = {row}.brewery_id;
+        UPDATE brewery_stats SET
+            abv_min = (SELECT MIN(CAST(abv AS REAL)) FROM beers
+                       WHERE brewery_id = {row}.brewery_id AND CAST(abv AS REAL) > 0),
+            abv_max = (SELECT MAX(CAST(abv AS REAL)) FROM beers
+                       WHERE brewery_id = {row}.brewery_id AND CAST(abv AS REAL) > 0)
+        WHERE brewery_id = {row}.brewery_id AND {abv} > 0 AND ({abv} <= abv_min OR {abv} >= abv_max);
+
+        UPDATE brewery_style_counts SET beer_count = beer_count - 1
+        WHERE brewery_id = {row}.brewery_id AND type = {row}.type;
+        DELETE FROM brewery_style_counts
+        WHERE brewery_id = {row}.brewery_id AND type = {row}.type AND beer_count <= 0;
+        """
+    return statements + f"""
+        UPDATE style_counts SET beer_count = beer_count - 1 WHERE type = {row}.type;
+        DELETE FROM style_counts WHERE type = {row}.type AND beer_count <= 0;
+
+        UPDATE catalog_stats SET
+            beer_count = beer_count - 1,
+            abv_count = abv_count - COALESCE({abv} > 0, 0),
+            abv_total = abv_total - CASE WHEN {abv} > 0 THEN {abv} ELSE 0 END
+        WHERE id = 1;
+        UPDATE catalog_stats SET
+            abv_min = (SELECT MIN(CAST(abv AS REAL)) FROM beers WHERE CAST(abv AS REAL) > 0),
+            abv_max = (SELECT MAX(CAST(abv AS REAL)) FROM beers WHERE CAST(abv AS REAL) > 0)
+        WHERE id = 1 AND {abv} > 0 AND ({abv} <= abv_min OR {abv} >= abv_max);
+    """
+
+
+def _change_available(row, delta, per_brewery=True):
+    """Trigger statements moving a beer_locations row in or out of the on-tap counts."""
+    statements = f"""
+        UPDATE catalog_stats SET available_count = available_count + ({delta}) WHERE id = 1;
+    """
+    if per_brewery:
+        # The row counts towards its beer's brewery, like the beer itself does
+        statements += f"""
+        UPDATE brewery_stats SET available_count = available_count + ({delta})
+        WHERE brewery_id = (SELECT brewery_id FROM beers WHERE id = {row}.beer_id);
+        """
+    return statements
+
+
+def trigger_statements(has_locations, per_brewery=True):
+    """Triggers keeping the aggregates current; per_brewery needs beers.brewery_id."""
+    add_new = _add_beer('NEW', per_brewery, has_locations)
+    remove_old = _remove_beer('OLD', per_brewery, has_locations)
+    update_columns = 'brewery_id, type, abv' if per_brewery else 'type, abv'
+    statements = [
+        f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_beer_insert AFTER INSERT ON beers
+        BEGIN {add_new} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_beer_delete AFTER DELETE ON beers
+        BEGIN {remove_old} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_beer_update AFTER UPDATE OF {update_columns} ON beers
+        BEGIN {remove_old} {add_new} END""",
+    ]
+    if has_locations:
+        statements += [
+            f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_location_insert AFTER INSERT ON beer_locations
+            WHEN NEW.is_available BEGIN {_change_available('NEW', 1, per_brewery)} END""",
+            f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_location_delete AFTER DELETE ON beer_locations
+            WHEN OLD.is_available BEGIN {_change_available('OLD', -1, per_brewery)} END""",
+            f"""CREATE TRIGGER IF NOT EXISTS catalog_stats_location_update
+            AFTER UPDATE OF is_available, beer_id ON beer_locations
+            BEGIN
+                {_change_available('OLD', '-COALESCE(OLD.is_available != 0, 0)', per_brewery)}
+                {_change_available('NEW', 'COALESCE(NEW.is_available != 0, 0)', per_brewery)}
+            END""",
+        ]
+    return statements
+
+
+def rebuild_catalog_stats(conn):
+    """Recompute every aggregate from scratch."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    per_brewery = has_brewery_column(conn)
+    for table in STATS_TABLES:
+        if table in tables:
+            conn.execute(f"DELETE FROM {table}")
+
+    numeric_abv = "CASE WHEN CAST(abv AS REAL) > 0 THEN CAST(abv AS REAL) END"
+    if per_brewery:
+        conn.execute(f"""
+            INSERT INTO brewery_stats (brewery_id, beer_count, abv_count, abv_total, abv_min, abv_max)
+            SELECT brewery_id, COUNT(*), COUNT({numeric_abv}), COALESCE(SUM({numeric_abv}), 0),
+                   MIN({numeric_abv}), MAX({numeric_abv})
+            FROM beers WHERE brewery_id IS NOT NULL
+            GROUP BY brewery_id
+        """)
+        conn.execute("""
+            INSERT INTO brewery_style_counts (brewery_id, type, beer_count)
+            SELECT brewery_id, type, COUNT(*) FROM beers
+            WHERE brewery_id IS NOT NULL AND type != ''
+            GROUP BY brewery_id, type
+        """)
+    conn.execute("""
+        INSERT INTO style_counts (type, beer_count)
+        SELECT type, COUNT(*) FROM beers WHERE type != '' GROUP BY type
+    """)
+    conn.execute(f"""
+        INSERT INTO catalog_stats (id, beer_count, abv_count, abv_total, abv_min, abv_max)
+        SELECT 1, COUNT(*), COUNT({numeric_abv}), COALESCE(SUM({numeric_abv}), 0),
+               MIN({numeric_abv}), MAX({numeric_abv})
+        FROM beers
+    """)
+
+    if 'beer_locations' in tables:
+        if per_brewery:
+            conn.execute("""
+                UPDATE brewery_stats SET available_count = (
+                    SELECT COUNT(*) FROM beer_locations bl
+                    JOIN beers b ON bl.beer_id = b.id
+                    WHERE b.brewery_id = brewery_stats.brewery_id AND bl.is_available
+                )
+            """)
+        conn.execute("""
+            UPDATE catalog_stats SET available_count = (SELECT COUNT(*) FROM beer_locations WHERE is_available)
+        """)
+
+
+def ensure_catalog_stats(conn):
+    """Create the aggregate tables and triggers if needed, backfilling them the first time."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    per_brewery = has_brewery_column(conn)
+    _execute_script(conn, SCHEMA)
+    if per_brewery:
+        _execute_script(conn, BREWERY_SCHEMA)
+    for statement in trigger_statements('beer_locations' in tables, per_brewery):
+        conn.execute(statement)
+    if conn.execute("SELECT 1 FROM catalog_stats WHERE id = 1").fetchone() is None:
+        rebuild_catalog_stats(conn)
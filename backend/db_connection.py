@@ -0,0 +1,163 @@
+"""Shared SQLite connection factory for the scrapers, ETL scripts and the API.
+
+Every connection opened through here runs in WAL mode with a busy timeout,
+so a long ETL run no longer blocks API readers. Writes inside one process are
+funnelled through a single WriterQueue per database file, so concurrent
+scrapers queue up instead of failing with "database is locked".
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'beers.db')
+
+# How long a connection waits on a locked database before raising
+BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+# Waits shorter than this are not counted as lock waits in the writer stats
+LOCK_WAIT_THRESHOLD = 0.001
+
+
+def connect(db_path=None, readonly=False, row_factory=None, check_same_thread=True, immutable=False):
+    """Open a connection to the beer database with the shared pragmas applied.
+
+    Writers get WAL journaling and synchronous=NORMAL. Read-only connections
+    are put in query_only mode so a stray write from the API fails loudly.
+    Immutable connections are for published snapshots that are never written
+    again, and skip SQLite's file locking entirely.
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    if immutable:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True,
+                               check_same_thread=check_same_thread)
+        if row_factory is not None:
+            conn.row_factory = row_factory
+        return conn
+
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000.0,
+                           check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        # journal_mode is persistent in the file, so this is a no-op after the first writer
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    return conn
+
+
+class WriterQueue:
+    """Runs write jobs against one database, one at a time, on a dedicated thread.
+
+    A job is a callable taking the writer connection as its first argument.
+    Each job runs inside its own BEGIN IMMEDIATE transaction which is committed
+    when the job returns and rolled back if it raises.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'jobs': 0,
+            'failures': 0,
+            'lock_waits': 0,
+            'lock_wait_seconds': 0.0,
+            'max_lock_wait_seconds': 0.0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name=f"sqlite-writer:{os.path.basename(self.db_path)}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a write job and return a Future for its result."""
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """Queue a write job and block until it has been committed."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def close(self):
+        """Finish the queued jobs and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _record(self, waited, failed):
+        with self._stats_lock:
+            self.stats['jobs'] += 1
+            if failed:
+                self.stats['failures'] += 1
+            if waited >= LOCK_WAIT_THRESHOLD:
+                self.stats['lock_waits'] += 1
+                self.stats['lock_wait_seconds'] += waited
+                self.stats['max_lock_wait_seconds'] = max(self.stats['max_lock_wait_seconds'], waited)
+
+    def _run(self):
+        conn = connect(self.db_path)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+
+                future, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                waited = 0.0
+                try:
+                    # Take the write lock up front so busy_timeout covers the whole wait
+                    started = time.monotonic()
+                    conn.execute("BEGIN IMMEDIATE")
+                    waited = time.monotonic() - started
+
+                    result = func(conn, *args, **kwargs)
+                    conn.commit()
+                except BaseException as e:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    self._record(waited, failed=True)
+                    future.set_exception(e)
+                else:
+                    self._record(waited, failed=False)
+                    future.set_result(result)
+        finally:
+            conn.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path=None):
+    """Return the process-wide WriterQueue for a database file."""
+    key = os.path.realpath(db_path or DEFAULT_DB_PATH)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = WriterQueue(key)
+        return writer
+
+
+def close_writer(db_path=None):
+    """Drain and stop the WriterQueue for a database file, if one is running."""
+    key = os.path.realpath(db_path or DEFAULT_DB_PATH)
+    with _writers_lock:
+        writer = _writers.pop(key, None)
+    if writer is not None:
+        writer.close()
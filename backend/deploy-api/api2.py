@@ -1,19 +1,60 @@
 import os
+import sys
+import gzip
+import json
+import heapq
+import hashlib
 import sqlite3
 import logging
+import threading
 import traceback
-from flask import Flask, jsonify, request, g
+from flask import Flask, Response, jsonify, redirect, request, g
 from flask_cors import CORS
 
+# Add the backend directory to the path so we can import the shared connection factory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_connection import connect
+from snapshots import current_snapshot
+from query_budget import QueryBudget, RETRY_AFTER_SECONDS, aborted_queries, budget_for, fetch_within_budget
+import rate_limit
+import ranking
+from similarity import SimilarityIndex, TOP_K as SIMILAR_TOP_K
+from map_clusters import MapClusterIndex, parse_bbox
+from geo import BreweryLocations, parse_location
+import taplist_stream
+from shards import shard_url
+from single_flight import SingleFlight
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def query_budget_exceeded():
+    """True if the current request's SQL budget ran out."""
+    budget = getattr(g, 'query_budget', None)
+    return budget is not None and budget.exceeded
+
+def over_budget_response():
+    """503 for a request whose queries were aborted by the SQL budget."""
+    aborted_queries.increment(request.endpoint)
+    logger.warning(f"Query budget of {g.query_budget.budget_ms}ms exceeded for {request.full_path}")
+    response = jsonify({"error": "Query took too long, please narrow your search or retry shortly"})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
 # Add this decorator to log all exceptions
 def log_exceptions(f):
     def wrapper(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if query_budget_exceeded():
+                return over_budget_response()
+            logger.error(f"Exception in {f.__name__}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
         except Exception as e:
             logger.error(f"Exception in {f.__name__}: {str(e)}")
             logger.error(traceback.format_exc())
@@ -25,9 +66,48 @@ def log_exceptions(f):
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "expose_headers": "*"}})
 
+def too_many_requests(message, retry_after):
+    """429 telling the client when to come back."""
+    response = jsonify({"error": message})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(retry_after)))
+    return response
+
+# Endpoints whose identical concurrent requests share one computation
+COALESCED_ENDPOINTS = {'search_beers'}
+
+@app.before_request
+def limit_requests():
+    """Per-client token buckets, plus a cap on concurrent expensive queries."""
+    if request.method == 'OPTIONS' or request.endpoint in rate_limit.EXEMPT_ENDPOINTS:
+        return None
+    
+    cost_class = rate_limit.endpoint_class(request.endpoint)
+    allowed, retry_after = rate_limit.limiters[cost_class].allow(rate_limit.client_key(request))
+    if not allowed:
+        rate_limit.rejections.increment(f"rate_limited_{cost_class}")
+        return too_many_requests("Rate limit exceeded", retry_after)
+    
+    # Coalesced endpoints take their admission slot inside the single-flight leader
+    if cost_class == 'expensive' and request.endpoint not in COALESCED_ENDPOINTS:
+        if not rate_limit.admission.acquire():
+            rate_limit.rejections.increment("server_busy")
+            return too_many_requests("Server busy, please retry", 1)
+        g.admitted = True
+    return None
+
+@app.teardown_request
+def release_admission(exception):
+    if g.pop('admitted', False):
+        rate_limit.admission.release()
+
 @app.route('/')
 def index():
-    return jsonify({"message": "Chicago Beer Finder API", "status": "running"})
+    return jsonify({
+        "message": "Chicago Beer Finder API",
+        "status": "running",
+        "generation": current_snapshot(DATABASE_PATH)['generation']
+    })
 
 
 # Database path - adjust as needed
@@ -37,8 +117,19 @@ def get_db():
     """Get database connection."""
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE_PATH)
-        db.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # Resolve the published generation once per request, so a new snapshot
+        # is picked up between requests and never in the middle of one
+        snapshot = current_snapshot(DATABASE_PATH)
+        g.db_generation = snapshot['generation']
+        if snapshot['generation']:
+            # Published snapshots are never written again, so skip locking entirely
+            db = connect(snapshot['path'], immutable=True, row_factory=sqlite3.Row)
+        else:
+            # WAL + busy_timeout, so a running ETL never blocks API readers
+            db = connect(DATABASE_PATH, readonly=True, row_factory=sqlite3.Row)  # Return rows as dictionaries
+        # Every statement in this request shares one SQL time budget
+        g.query_budget = QueryBudget(request.endpoint, budget_for(request.endpoint)).install(db)
+        g._database = db
     return db
 
 @app.teardown_appcontext
@@ -48,16 +139,221 @@ def close_connection(exception):
     if db is not None:
         db.close()
 
+@app.after_request
+def add_generation_header(response):
+    """Tell clients which catalog generation answered the request."""
+    generation = getattr(g, 'db_generation', None)
+    if generation is not None:
+        response.headers['X-Catalog-Generation'] = str(generation)
+    return response
+
 def dict_factory(cursor, row):
     """Convert SQL rows to dictionaries."""
     return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
 
+# Table names per published generation; generation 0 (the live database) is never cached
+_catalog_tables = {}
+
+def catalog_tables(conn):
+    """Names of the tables in the catalog being served."""
+    generation = getattr(g, 'db_generation', 0)
+    tables = _catalog_tables.get(generation) if generation else None
+    if tables is None:
+        tables = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if generation:
+            _catalog_tables[generation] = tables
+    return tables
+
+# Where /api/breweries puts markers for breweries that haven't been geocoded
+DEFAULT_LAT = 41.8781
+DEFAULT_LNG = -87.6298
+
+def brewery_coordinates(conn, fallback=False):
+    """SQL expressions for a brewery's latitude and longitude.
+    
+    Uses the geocoded latitude/longitude columns when the catalog has them;
+    both are NULL for breweries that haven't been geocoded. fallback=True
+    puts those at DEFAULT_LAT/DEFAULT_LNG instead, for display only: distances
+    and clusters must never be computed from the placeholder.
+    """
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(breweries)")}
+    if 'latitude' in columns and 'longitude' in columns:
+        if fallback:
+            return (f"COALESCE(br.latitude, {DEFAULT_LAT})", f"COALESCE(br.longitude, {DEFAULT_LNG})")
+        return ("br.latitude", "br.longitude")
+    if fallback:
+        return (str(DEFAULT_LAT), str(DEFAULT_LNG))
+    return ("NULL", "NULL")
+
+def catalog_version():
+    """Identify the catalog being served, for caches that are built once per version.
+    
+    Published snapshots are identified by their generation. The live database
+    (generation 0) changes in place, so its file modification times are used.
+    """
+    get_db()
+    if g.db_generation:
+        return g.db_generation
+    stamps = []
+    for suffix in ('', '-wal'):
+        try:
+            stamps.append(os.stat(DATABASE_PATH + suffix).st_mtime_ns)
+        except FileNotFoundError:
+            stamps.append(None)
+    return ('live', tuple(stamps))
+
+# Derived structures (indexes, clusters, documents) built once per catalog version
+_catalog_caches = {}
+_catalog_cache_locks = {}
+_catalog_cache_guard = threading.Lock()
+
+def per_catalog(name, build):
+    """Return the cached value of build(conn) for the current catalog version."""
+    version = catalog_version()
+    entry = _catalog_caches.get(name)
+    if entry and entry[0] == version:
+        return entry[1]
+    
+    with _catalog_cache_guard:
+        lock = _catalog_cache_locks.setdefault(name, threading.Lock())
+    # Only one request builds; the others wait and reuse its result
+    with lock:
+        entry = _catalog_caches.get(name)
+        if entry and entry[0] == version:
+            return entry[1]
+        logger.info(f"Building {name} for catalog version {version}")
+        value = build(get_db())
+        _catalog_caches[name] = (version, value)
+        return value
+
+def requested_fields(allowed, optional=()):
+    """Parse the fields= parameter against a whitelist.
+    
+    Returns (fields, None), or (None, error_response) for unknown fields.
+    Without fields= every allowed field except the optional ones is returned.
+    """
+    raw = request.args.get('fields', '')
+    if not raw:
+        return set(allowed) - set(optional), None
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    unknown = sorted(fields - set(allowed))
+    if unknown:
+        return None, (jsonify({
+            "error": f"Unknown fields: {', '.join(unknown)}",
+            "allowed_fields": list(allowed)
+        }), 400)
+    return fields, None
+
+def brewery_beer_count(conn):
+    """SQL join and expression for a brewery's beer count.
+    
+    Reads the trigger-maintained brewery_stats table when the catalog has it,
+    instead of counting the brewery's beers with a subquery.
+    """
+    if 'brewery_stats' in catalog_tables(conn):
+        return "LEFT JOIN brewery_stats bs ON bs.brewery_id = br.id", "COALESCE(bs.beer_count, 0)"
+    return "", "(SELECT COUNT(*) FROM beers WHERE brewery_id = br.id)"
+
+def build_brewery_locations(conn):
+    lat_expr, lng_expr = brewery_coordinates(conn)
+    rows = conn.execute(f"SELECT br.id as id, {lat_expr} as lat, {lng_expr} as lng FROM breweries br").fetchall()
+    return BreweryLocations.build(rows)
+
+def ranking_columns(conn):
+    """SQL for the rating, rating count and availability of beer b, plus the join they need.
+    
+    Returns (rating_expr, num_ratings_expr, rating_join, availability_expr);
+    the expressions are NULL when the catalog has no ratings or locations.
+    """
+    tables = catalog_tables(conn)
+    if 'beer_ratings' in tables:
+        rating_expr, num_ratings_expr = "r.rating", "r.num_ratings"
+        rating_join = """
+        LEFT JOIN (
+            SELECT beer_id,
+                   SUM(rating * num_ratings) / NULLIF(SUM(num_ratings), 0) as rating,
+                   SUM(num_ratings) as num_ratings
+            FROM beer_ratings
+            GROUP BY beer_id
+        ) r ON r.beer_id = b.id"""
+    else:
+        rating_expr = num_ratings_expr = "NULL"
+        rating_join = ""
+    if 'beer_locations' in tables:
+        availability_expr = "(SELECT MAX(bl.is_available) FROM beer_locations bl WHERE bl.beer_id = b.id)"
+    else:
+        availability_expr = "NULL"
+    return rating_expr, num_ratings_expr, rating_join, availability_expr
+
+# Sort orders /api/search accepts; distance needs lat and lng
+SEARCH_SORTS = ranking.SORT_OPTIONS + ('distance',)
+
+# Largest result set a relevance-sorted search returns when no limit is given;
+# responses cut off by it say so with "limit"
+DEFAULT_RELEVANCE_LIMIT = 200
+MAX_LIMIT = 1000
+
+def parse_limit(value, maximum):
+    """Parse a limit= value, clamped to [1, maximum].
+    
+    Returns None when it's missing; raises ValueError when it isn't an integer.
+    """
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+# Identical searches in flight at the same time share one query
+search_flight = SingleFlight()
+
+def search_key():
+    """Coalescing key for a search: catalog generation plus the parameters exactly as sent.
+    
+    Values aren't stripped or dropped when blank, since run_search reads them
+    raw: 'IPA ' builds a different LIKE pattern than 'IPA', and sort= is a 400.
+    Only the order of differently named parameters is ignored.
+    """
+    params = tuple((name, tuple(values)) for name, values in sorted(request.args.lists()))
+    return (g.db_generation, params)
+
+def serialized_search():
+    """Run a search as the single-flight leader and return (status, body, headers)."""
+    # Only the leader takes an admission slot; waiting followers run no queries
+    if not rate_limit.admission.acquire():
+        rate_limit.rejections.increment("server_busy")
+        response = too_many_requests("Server busy, please retry", 1)
+    else:
+        try:
+            response = app.make_response(run_search())
+        finally:
+            rate_limit.admission.release()
+    return response.status_code, response.get_data(), list(response.headers)
+
+def distance_order(row):
+    """Sort key for sort=distance: nearest first, beers without a distance last."""
+    return (row['distance_km'] is None, row['distance_km'] or 0.0)
+
 # Main search endpoint used by the frontend
 @app.route('/api/search', methods=['GET'])
-@log_exceptions
 def search_beers():
     """Search beers with optional filters."""
+    g.db_generation = current_snapshot(DATABASE_PATH)['generation']
+    status, body, headers = search_flight.do(search_key(), serialized_search)
+    return Response(body, status=status, headers=headers)
+
+@log_exceptions
+def run_search():
+    """Run /api/search for the current request."""
     conn = get_db()
+    
+    # A plain category listing is pre-rendered as a static shard
+    if set(request.args) == {'category_id'} and request.args['category_id'].isdigit():
+        url = shard_url(f"category/{request.args['category_id']}.json", g.db_generation)
+        if url:
+            return redirect(url)
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
@@ -68,26 +364,72 @@ def search_beers():
     max_abv = request.args.get('max_abv', '')
     brewery = request.args.get('brewery', '')
     category_id = request.args.get('category_id', '')
+    limit = request.args.get('limit', '')
+    try:
+        lat, lng, max_km = parse_location(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if lat is not None:
+        default_sort = 'distance'
+    else:
+        default_sort = 'relevance' if query else 'name'
+    sort = request.args.get('sort', default_sort)
+    
+    if sort not in SEARCH_SORTS:
+        return jsonify({"error": f"Invalid sort '{sort}', expected one of: {', '.join(SEARCH_SORTS)}"}), 400
+    if sort == 'distance' and lat is None:
+        return jsonify({"error": "sort=distance requires lat and lng"}), 400
+    try:
+        limit = parse_limit(limit, MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        min_abv = float(min_abv) if min_abv else None
+        max_abv = float(max_abv) if max_abv else None
+    except ValueError:
+        return jsonify({"error": "min_abv and max_abv must be numbers"}), 400
+    
+    # Ratings and availability feed the ranking, when this catalog has them
+    rating_expr, num_ratings_expr, rating_join, availability_expr = ranking_columns(conn)
+    
+    # Columns a client can ask for with fields=, in output order
+    search_fields = {
+        'beer_id': "b.id",
+        'beer': "b.name",
+        'type': "b.type",
+        'abv': "b.abv",
+        'description': "b.description",
+        'brewery': "br.name",
+        'address': "br.location",
+        'state': "COALESCE(SUBSTR(br.location, INSTR(br.location, ', ') + 2), 'IL')",
+        'city': "COALESCE(SUBSTR(br.location, 1, INSTR(br.location, ', ') - 1), 'Chicago')",
+        'website': "br.website",
+        'category': "c.name",
+        'parent_category': "pc.name",
+        'rating': rating_expr,
+        'num_ratings': num_ratings_expr,
+        'is_available': availability_expr,
+    }
+    fields, error = requested_fields(search_fields)
+    if error:
+        return error
+    
+    # Relevance ranking reads these whether or not the client asked for them
+    selected = fields | ranking.RANKING_FIELDS if sort == 'relevance' else fields
+    select_list = ",\n            ".join(f"{expr} as {name}" for name, expr in search_fields.items() if name in selected)
+    if lat is not None:
+        # Distances are per brewery; this is dropped once they're attached
+        select_list += ",\n            br.id as _brewery_id"
     
     # Base query
-    sql_query = """
+    sql_query = f"""
         SELECT 
-            b.id as beer_id,
-            b.name as beer,
-            b.type as type,
-            b.abv as abv,
-            b.description as description,
-            br.name as brewery,
-            br.location as address,
-            COALESCE(SUBSTR(br.location, INSTR(br.location, ', ') + 2), 'IL') as state,
-            COALESCE(SUBSTR(br.location, 1, INSTR(br.location, ', ') - 1), 'Chicago') as city,
-            br.website as website,
-            c.name as category,
-            pc.name as parent_category
+            {select_list}
         FROM beers b
         JOIN breweries br ON b.brewery_id = br.id
         LEFT JOIN beer_categories c ON b.category_id = c.id
-        LEFT JOIN beer_categories pc ON c.parent_id = pc.id
+        LEFT JOIN beer_categories pc ON c.parent_id = pc.id{rating_join}
         WHERE 1=1
     """
     
@@ -105,13 +447,13 @@ def search_beers():
         params.append(f"%{beer_type}%")
     
     # Add ABV filters
-    if min_abv:
+    if min_abv is not None:
         sql_query += " AND b.abv >= ?"
-        params.append(float(min_abv))
+        params.append(min_abv)
     
-    if max_abv:
+    if max_abv is not None:
         sql_query += " AND b.abv <= ?"
-        params.append(float(max_abv))
+        params.append(max_abv)
     
     # Add brewery filter
     if brewery:
@@ -137,33 +479,85 @@ def search_beers():
             sql_query += f" AND b.category_id IN ({placeholders})"
             params.extend(category_ids)
     
-    # Add ordering
-    sql_query += " ORDER BY b.name"
+    # Add location filter: distances to every geocoded brewery in one vectorised pass
+    if lat is not None:
+        distances = per_catalog('brewery_locations', build_brewery_locations).within(lat, lng, max_km)
+        # Without a radius, beers from breweries with no coordinates stay in, with no distance
+        if max_km is not None:
+            if not distances:
+                return jsonify({"results": []})
+            placeholders = ','.join('?' for _ in distances)
+            sql_query += f" AND br.id IN ({placeholders})"
+            params.extend(distances)
+    
+    # Add ordering; relevance is ranked in Python afterwards, with name order breaking ties
+    if sort == 'abv':
+        # Scraped ABVs are sometimes text like "6.5%", which CAST reads as 6.5
+        sql_query += " ORDER BY CAST(b.abv AS REAL) DESC, b.name"
+    elif sort == 'rating':
+        sql_query += (f" ORDER BY (? * ? + COALESCE({rating_expr} * {num_ratings_expr}, 0))"
+                      f" / (? + COALESCE({num_ratings_expr}, 0)) DESC, b.name")
+        params.extend([ranking.PRIOR_COUNT, ranking.PRIOR_MEAN, ranking.PRIOR_COUNT])
+    else:
+        sql_query += " ORDER BY b.name"
     
-    # Execute query
+    if limit and sort not in ('relevance', 'distance'):
+        sql_query += " LIMIT ?"
+        params.append(limit)
+    
+    # Execute query, keeping whatever rows arrived if the budget runs out mid-fetch
     cursor.execute(sql_query, params)
-    results = cursor.fetchall()
+    results, truncated = fetch_within_budget(cursor, g.query_budget)
     
-    return jsonify({
-        "results": results
-    })
+    if lat is not None:
+        for row in results:
+            row['distance_km'] = distances.get(row.pop('_brewery_id'))
+    
+    capped_at = None
+    if sort == 'relevance':
+        if not limit and len(results) > DEFAULT_RELEVANCE_LIMIT:
+            capped_at = DEFAULT_RELEVANCE_LIMIT
+        results = ranking.rank(results, query, limit or DEFAULT_RELEVANCE_LIMIT)
+        for extra in selected - fields:
+            for row in results:
+                del row[extra]
+    elif sort == 'distance':
+        # Rows arrive in name order, which breaks ties between beers at the same brewery;
+        # beers with no distance go after all the ones that have one
+        if limit:
+            results = heapq.nsmallest(limit, results, key=distance_order)
+        else:
+            results.sort(key=distance_order)
+    
+    body = {"results": results}
+    if capped_at:
+        # More beers matched; a larger limit= returns them
+        body["limit"] = capped_at
+    if truncated:
+        aborted_queries.increment(request.endpoint)
+        body["truncated"] = True
+    
+    return jsonify(body)
 
-# Get filter options for the frontend
-@app.route('/api/filters', methods=['GET'])
-@log_exceptions
-def get_filter_options():
-    """Get all possible filter options."""
-    conn = get_db()
+def filter_options(conn):
+    """Types, ABV range, brewery names and the category tree for the filter panel."""
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
-    # Get unique beer types
-    cursor.execute("SELECT DISTINCT type FROM beers WHERE type IS NOT NULL AND type != '' ORDER BY type")
-    types = [row['type'] for row in cursor.fetchall()]
-    
-    # Get ABV range
-    cursor.execute("SELECT MIN(abv) as min, MAX(abv) as max FROM beers WHERE abv IS NOT NULL")
-    abv_range = cursor.fetchone()
+    if 'catalog_stats' in catalog_tables(conn):
+        # Aggregates kept current by triggers, so no scan of the beers table
+        cursor.execute("SELECT type FROM style_counts ORDER BY type")
+        types = [row['type'] for row in cursor.fetchall()]
+        cursor.execute("SELECT abv_min as min, abv_max as max FROM catalog_stats WHERE id = 1")
+        abv_range = cursor.fetchone() or {'min': None, 'max': None}
+    else:
+        # Get unique beer types
+        cursor.execute("SELECT DISTINCT type FROM beers WHERE type IS NOT NULL AND type != '' ORDER BY type")
+        types = [row['type'] for row in cursor.fetchall()]
+        
+        # Get ABV range
+        cursor.execute("SELECT MIN(abv) as min, MAX(abv) as max FROM beers WHERE abv IS NOT NULL")
+        abv_range = cursor.fetchone()
     
     if not abv_range['min']:
         abv_range['min'] = 0
@@ -203,54 +597,111 @@ def get_filter_options():
         
         categories.append(category)
     
-    return jsonify({
+    return {
         'types': types,
         'abv_range': abv_range,
         'breweries': breweries,
         'categories': categories
-    })
+    }
+
+# Get filter options for the frontend
+@app.route('/api/filters', methods=['GET'])
+@log_exceptions
+def get_filter_options():
+    """Get all possible filter options."""
+    conn = get_db()
+    url = shard_url('filters.json', g.db_generation)
+    if url:
+        return redirect(url)
+    return jsonify(filter_options(conn))
 
 # Get all breweries for the map view
 @app.route('/api/breweries', methods=['GET'])
+@log_exceptions
 def get_breweries():
     """Get all breweries."""
     conn = get_db()
     conn.row_factory = dict_factory
     cursor = conn.cursor()
     
-    cursor.execute("""
+    lat_expr, lng_expr = brewery_coordinates(conn, fallback=True)
+    count_join, count_expr = brewery_beer_count(conn)
+    has_stats = 'brewery_stats' in catalog_tables(conn)
+    
+    # Columns a client can ask for with fields=, in output order ('beers' is a nested list)
+    brewery_fields = {
+        'id': "br.id",
+        'name': "br.name",
+        'address': "br.location",
+        'state': "COALESCE(SUBSTR(br.location, INSTR(br.location, ', ') + 2), 'IL')",
+        'city': "COALESCE(SUBSTR(br.location, 1, INSTR(br.location, ', ') - 1), 'Chicago')",
+        'website': "br.website",
+        'description': "br.description",
+        'lat': lat_expr,
+        'lng': lng_expr,
+        'beer_count': count_expr,
+        'beers': None,
+    }
+    # Aggregates from brewery_stats, only returned when asked for
+    stats_fields = {
+        'available_count': "COALESCE(bs.available_count, 0)",
+        'abv_min': "bs.abv_min",
+        'abv_max': "bs.abv_max",
+        'abv_avg': "ROUND(bs.abv_total / NULLIF(bs.abv_count, 0), 2)",
+        'styles': None,
+    } if has_stats else {}
+    brewery_fields.update(stats_fields)
+    fields, error = requested_fields(brewery_fields, optional=stats_fields)
+    if error:
+        return error
+    
+    include_beers = 'beers' in fields
+    include_styles = 'styles' in fields
+    # The nested sub-fetches are keyed on the brewery id
+    selected = fields | {'id'} if include_beers or include_styles else fields
+    select_list = ",\n            ".join(
+        f"{expr} as {name}" for name, expr in brewery_fields.items() if name in selected and expr is not None
+    )
+    
+    cursor.execute(f"""
         SELECT 
-            br.id,
-            br.name,
-            br.location as address,
-            COALESCE(SUBSTR(br.location, INSTR(br.location, ', ') + 2), 'IL') as state,
-            COALESCE(SUBSTR(br.location, 1, INSTR(br.location, ', ') - 1), 'Chicago') as city,
-            br.website,
-            br.description,
-            41.8781 as lat,  -- Default to Chicago's coordinates for demo
-            -87.6298 as lng,
-            (SELECT COUNT(*) FROM beers WHERE brewery_id = br.id) as beer_count
+            {select_list}
         FROM breweries br
+        {count_join}
     """)
     
     breweries = cursor.fetchall()
     
-    # For each brewery, get their beers
-    for brewery in breweries:
-        cursor.execute("""
-            SELECT 
-                b.name,
-                b.type,
-                b.abv,
-                b.description,
-                c.name as category
-            FROM beers b
-            LEFT JOIN beer_categories c ON b.category_id = c.id
-            WHERE b.brewery_id = ?
-            ORDER BY b.name
-        """, (brewery['id'],))
-        
-        brewery['beers'] = cursor.fetchall()
+    # Style distribution per brewery, from the trigger-maintained counts
+    if include_styles:
+        styles = {}
+        cursor.execute("SELECT brewery_id, type, beer_count FROM brewery_style_counts ORDER BY beer_count DESC, type")
+        for row in cursor.fetchall():
+            styles.setdefault(row['brewery_id'], {})[row['type']] = row['beer_count']
+        for brewery in breweries:
+            brewery['styles'] = styles.get(brewery['id'], {})
+    
+    # For each brewery, get their beers - only when the client wants them
+    if include_beers:
+        for brewery in breweries:
+            cursor.execute("""
+                SELECT 
+                    b.name,
+                    b.type,
+                    b.abv,
+                    b.description,
+                    c.name as category
+                FROM beers b
+                LEFT JOIN beer_categories c ON b.category_id = c.id
+                WHERE b.brewery_id = ?
+                ORDER BY b.name
+            """, (brewery['id'],))
+            
+            brewery['beers'] = cursor.fetchall()
+    
+    if (include_beers or include_styles) and 'id' not in fields:
+        for brewery in breweries:
+            del brewery['id']
     
     return jsonify({
         "breweries": breweries
@@ -258,6 +709,7 @@ def get_breweries():
 
 # Get details for a specific beer
 @app.route('/api/beer/<int:beer_id>', methods=['GET'])
+@log_exceptions
 def get_beer_detail(beer_id):
     """Get detailed information about a specific beer."""
     conn = get_db()
@@ -292,6 +744,236 @@ def get_beer_detail(beer_id):
     
     return jsonify([beer])  # Return as array for compatibility with existing frontend
 
+def build_similarity_index(conn):
+    # Only beers the API can serve (i.e. with a brewery) are candidates
+    rows = conn.execute("""
+        SELECT b.id, b.type, b.description, b.abv
+        FROM beers b
+        JOIN breweries br ON b.brewery_id = br.id
+        ORDER BY b.id
+    """).fetchall()
+    return SimilarityIndex.build(rows)
+
+# Beers similar to a given beer, from the precomputed TF-IDF neighbours
+@app.route('/api/beer/<int:beer_id>/similar', methods=['GET'])
+@log_exceptions
+def get_similar_beers(beer_id):
+    """Get the beers most similar to a specific beer."""
+    try:
+        limit = parse_limit(request.args.get('limit') or '5', SIMILAR_TOP_K)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    index = per_catalog('similarity_index', build_similarity_index)
+    neighbors = index.similar(beer_id, limit)
+    if neighbors is None:
+        return jsonify({"error": "Beer not found"}), 404
+    if not neighbors:
+        return jsonify({"results": []})
+    
+    conn = get_db()
+    conn.row_factory = dict_factory
+    placeholders = ','.join('?' for _ in neighbors)
+    rows = conn.execute(f"""
+        SELECT 
+            b.id as beer_id,
+            b.name as beer,
+            b.type as type,
+            b.abv as abv,
+            br.name as brewery,
+            c.name as category
+        FROM beers b
+        JOIN breweries br ON b.brewery_id = br.id
+        LEFT JOIN beer_categories c ON b.category_id = c.id
+        WHERE b.id IN ({placeholders})
+    """, [neighbor_id for neighbor_id, _ in neighbors]).fetchall()
+    
+    beers_by_id = {row['beer_id']: row for row in rows}
+    results = []
+    for neighbor_id, score in neighbors:
+        beer = beers_by_id.get(neighbor_id)
+        if beer:
+            beer['similarity'] = score
+            results.append(beer)
+    
+    return jsonify({"results": results})
+
+def build_map_index(conn):
+    conn.row_factory = dict_factory
+    lat_expr, lng_expr = brewery_coordinates(conn)
+    count_join, count_expr = brewery_beer_count(conn)
+    breweries = conn.execute(f"""
+        SELECT 
+            br.id,
+            br.name,
+            {lat_expr} as lat,
+            {lng_expr} as lng,
+            {count_expr} as beer_count
+        FROM breweries br
+        {count_join}
+    """).fetchall()
+    return MapClusterIndex.build(breweries)
+
+# GeoJSON clusters for the map, precomputed per zoom level
+@app.route('/api/map', methods=['GET'])
+@log_exceptions
+def get_map():
+    """Get clustered brewery locations inside a bounding box."""
+    try:
+        bbox = parse_bbox(request.args.get('bbox', ''))
+        zoom = int(request.args.get('zoom', 11))
+    except ValueError:
+        return jsonify({"error": "bbox must be minLng,minLat,maxLng,maxLat and zoom an integer"}), 400
+    
+    index = per_catalog('map_clusters', build_map_index)
+    response = jsonify(index.features(bbox, zoom))
+    response.mimetype = 'application/geo+json'
+    return response
+
+# Beers shown on first paint, before the user has searched for anything
+FEATURED_LIMIT = 20
+
+def build_bootstrap(conn):
+    """Assemble, serialize and compress the first-paint document for one catalog version."""
+    conn.row_factory = dict_factory
+    filters = filter_options(conn)
+    categories = filters.pop('categories')
+    
+    lat_expr, lng_expr = brewery_coordinates(conn, fallback=True)
+    count_join, count_expr = brewery_beer_count(conn)
+    breweries = conn.execute(f"""
+        SELECT 
+            br.id as id,
+            br.name as name,
+            br.location as address,
+            COALESCE(SUBSTR(br.location, INSTR(br.location, ', ') + 2), 'IL') as state,
+            COALESCE(SUBSTR(br.location, 1, INSTR(br.location, ', ') - 1), 'Chicago') as city,
+            br.website as website,
+            {lat_expr} as lat,
+            {lng_expr} as lng,
+            {count_expr} as beer_count
+        FROM breweries br
+        {count_join}
+        ORDER BY br.name
+    """).fetchall()
+    
+    # Featured beers: the relevance ranking with no query favours beers on tap and well rated
+    rating_expr, num_ratings_expr, rating_join, availability_expr = ranking_columns(conn)
+    candidates = conn.execute(f"""
+        SELECT 
+            b.id as beer_id,
+            b.name as beer,
+            b.type as type,
+            b.abv as abv,
+            b.description as description,
+            br.name as brewery,
+            c.name as category,
+            {rating_expr} as rating,
+            {num_ratings_expr} as num_ratings,
+            {availability_expr} as is_available
+        FROM beers b
+        JOIN breweries br ON b.brewery_id = br.id
+        LEFT JOIN beer_categories c ON b.category_id = c.id{rating_join}
+        ORDER BY b.name
+    """).fetchall()
+    featured = ranking.rank(candidates, '', FEATURED_LIMIT)
+    for beer in featured:
+        del beer['relevance']
+    
+    body = json.dumps({
+        'generation': g.db_generation,
+        'filters': filters,
+        'categories': categories,
+        'breweries': breweries,
+        'featured': featured,
+    }, separators=(',', ':')).encode('utf-8')
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9),
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+    }
+
+# Everything the frontend needs on first paint, in one cached round-trip
+@app.route('/api/bootstrap', methods=['GET'])
+@log_exceptions
+def get_bootstrap():
+    """Get filters, categories, brewery summaries and featured beers in one document."""
+    document = per_catalog('bootstrap', build_bootstrap)
+    
+    if request.if_none_match.contains(document['etag']):
+        response = app.response_class(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = app.response_class(document['gzip'], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(document['body'], mimetype='application/json')
+    response.set_etag(document['etag'])
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Always revalidate: the ETag changes with every published generation
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+taplist_broadcaster = taplist_stream.TaplistBroadcaster(DATABASE_PATH)
+
+# Live tap-list changes as Server-Sent Events, fanned out from one shared loop
+@app.route('/api/stream/taplist', methods=['GET'])
+@log_exceptions
+def stream_taplist():
+    """Stream beers added, removed or back on tap as each catalog generation is published."""
+    brewery = request.args.get('brewery', '')
+    category_id = request.args.get('category_id', '')
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', ''))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+    
+    category_ids = None
+    if category_id:
+        # Resolve subcategories once here, so matching an event is a set lookup
+        conn = get_db()
+        category_ids = [row['id'] for row in conn.execute("""
+            WITH RECURSIVE subcategories AS (
+                SELECT id FROM beer_categories WHERE id = ?
+                UNION
+                SELECT bc.id FROM beer_categories bc
+                JOIN subcategories sc ON bc.parent_id = sc.id
+            )
+            SELECT id FROM subcategories
+        """, (category_id,)).fetchall()]
+    
+    subscription, broadcast_from = taplist_broadcaster.subscribe(brewery, category_ids)
+    if subscription is None:
+        rate_limit.rejections.increment("stream_full")
+        return too_many_requests("Too many open streams, please retry", taplist_stream.RECONNECT_MS // 1000)
+    
+    # Events the client missed that the broadcaster won't send again
+    backlog = []
+    snapshot = current_snapshot(DATABASE_PATH)
+    if last_event_id is not None and snapshot['generation']:
+        backlog = [
+            event for event in taplist_stream.read_events(snapshot['path'], last_event_id, broadcast_from)
+            if subscription.matches(event)
+        ]
+    
+    response = Response(taplist_stream.stream(taplist_broadcaster, subscription, backlog),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Operational counters for monitoring
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get API counters."""
+    return jsonify({
+        "aborted_queries": aborted_queries.snapshot(),
+        "rejected_requests": rate_limit.rejections.snapshot(),
+        "taplist_stream": taplist_broadcaster.get_stats(),
+        "coalesced_requests": {"search_beers": search_flight.get_stats()}
+    })
+
 if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.environ.get('PORT', 8080))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Export static JSON shards for the catalog generation the API is serving.
+
+Each shard is rendered by calling the API's own view functions against the
+published snapshot, so a shard is byte-for-byte what Flask would have sent.
+
+    python export_shards.py
+    python export_shards.py --db beers.db --out static/api
+"""
+import argparse
+import json
+import os
+
+from flask import request
+
+import api2
+import shards
+from shards import SHARD_DIR, write_manifest, write_shard
+from snapshots import current_snapshot
+
+
+def render(path):
+    """Run the view for a GET path outside the rate limiter; returns the response body."""
+    with api2.app.test_request_context(path):
+        response = api2.app.view_functions[request.endpoint]()
+        if isinstance(response, tuple) or response.status_code != 200:
+            raise RuntimeError(f"Rendering {path} failed")
+        return response.get_data()
+
+
+def export_shards(db_path=api2.DATABASE_PATH, shard_dir=SHARD_DIR):
+    """Write every shard for the current generation of db_path.
+    
+    Returns the manifest's file map, or None if a new generation was published
+    mid-export (the manifest is then left alone and the next export catches up).
+    """
+    api2.DATABASE_PATH = db_path
+    # Render the real responses, never redirects to the shards being replaced
+    shards.SHARD_BASE_URL = ''
+    generation = current_snapshot(db_path)['generation']
+    files = {}
+
+    filters_body = render('/api/filters')
+    files['filters.json'] = write_shard(shard_dir, 'filters.json', filters_body)
+
+    filters = json.loads(filters_body)
+    category_ids = []
+    for category in filters['categories']:
+        category_ids.append(category['id'])
+        category_ids.extend(subcategory['id'] for subcategory in category['subcategories'])
+    for category_id in category_ids:
+        name = f"category/{category_id}.json"
+        files[name] = write_shard(shard_dir, name, render(f"/api/search?category_id={category_id}"))
+
+    # One document per brewery: its summary and its beers
+    breweries = json.loads(render(
+        '/api/breweries?fields=id,name,address,city,state,website,lat,lng,beer_count,beers'
+    ))['breweries']
+    for brewery in breweries:
+        name = f"brewery/{brewery['id']}.json"
+        body = json.dumps(brewery, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        files[name] = write_shard(shard_dir, name, body)
+
+    if current_snapshot(db_path)['generation'] != generation:
+        return None
+    write_manifest(shard_dir, generation, files)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export static API shards for the current catalog generation")
+    parser.add_argument("--db", default=api2.DATABASE_PATH, help="Database path the API is configured with")
+    parser.add_argument("--out", default=SHARD_DIR, help="Directory to write shards into")
+    args = parser.parse_args()
+
+    files = export_shards(os.path.abspath(args.db), args.out)
+    if files is None:
+        print("A new generation was published during the export; run it again")
+        return
+    total = sum(entry['gzip_bytes'] for entry in files.values())
+    print(f"Wrote {len(files)} shards ({total / 1024:.1f} KB gzipped) to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
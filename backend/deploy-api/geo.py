@@ -0,0 +1,62 @@
+"""Distance from the user to every brewery, computed in one vectorised pass.
+
+Beers don't have their own location, so distance is worked out per brewery
+(tens to hundreds of them) rather than per matching beer row, and joined
+back onto the search results by brewery id.
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def parse_location(args):
+    """Read lat, lng and max_km from request args.
+
+    Returns (lat, lng, max_km) with None for anything missing; raises
+    ValueError for bad values or a radius without a location.
+    """
+    lat, lng, max_km = args.get('lat', ''), args.get('lng', ''), args.get('max_km', '')
+    if not lat and not lng:
+        if max_km:
+            raise ValueError("max_km requires lat and lng")
+        return None, None, None
+    if not lat or not lng:
+        raise ValueError("lat and lng must be given together")
+
+    lat, lng = float(lat), float(lng)
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise ValueError("lat must be within [-90, 90] and lng within [-180, 180]")
+    max_km = float(max_km) if max_km else None
+    if max_km is not None and max_km <= 0:
+        raise ValueError("max_km must be positive")
+    return lat, lng, max_km
+
+
+class BreweryLocations:
+    """Brewery coordinates as NumPy arrays for one catalog version."""
+
+    def __init__(self, ids, lats, lngs):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+    @classmethod
+    def build(cls, rows):
+        """Build from rows with id, lat and lng."""
+        rows = [row for row in rows if row['lat'] is not None and row['lng'] is not None]
+        return cls([row['id'] for row in rows], [row['lat'] for row in rows], [row['lng'] for row in rows])
+
+    def within(self, lat, lng, max_km=None):
+        """Return {brewery_id: distance_km} for breweries inside the radius (or all of them)."""
+        distances = haversine_km(lat, lng, self.lats, self.lngs)
+        mask = distances <= max_km if max_km is not None else np.ones(len(distances), dtype=bool)
+        return {int(brewery_id): round(float(distance), 3)
+                for brewery_id, distance in zip(self.ids[mask], distances[mask])}
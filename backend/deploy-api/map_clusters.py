@@ -0,0 +1,125 @@
+"""Server-side clustering of brewery locations for the Leaflet map.
+
+Clusters are precomputed once per catalog version for every zoom level by
+snapping breweries to a grid in Web Mercator pixel space, the same space
+Leaflet tiles use, so a cluster is roughly CLUSTER_RADIUS_PX across on screen
+at every zoom. Each zoom level's clusters are kept sorted by longitude, so
+answering a pan or zoom is a bisect over one list plus a latitude filter.
+Breweries that haven't been geocoded are left off the map and only counted,
+as the collection's 'ungeocoded' member.
+"""
+import math
+from bisect import bisect_left, bisect_right
+
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+
+# At and above this zoom every brewery is its own point
+POINT_ZOOM = 15
+
+TILE_SIZE = 256
+CLUSTER_RADIUS_PX = 60
+
+MAX_LATITUDE = 85.05112878
+
+
+def project(lat, lng, zoom):
+    """Latitude/longitude to Web Mercator world pixel coordinates at a zoom level."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    size = TILE_SIZE * (2 ** zoom)
+    x = (lng + 180.0) / 360.0 * size
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * size
+    return x, y
+
+
+def parse_bbox(value):
+    """Parse 'minLng,minLat,maxLng,maxLat'. Returns None for a missing bbox."""
+    if not value:
+        return None
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be minLng,minLat,maxLng,maxLat")
+    return parts
+
+
+def _point_feature(brewery):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [brewery['lng'], brewery['lat']]},
+        'properties': {
+            'cluster': False,
+            'id': brewery['id'],
+            'name': brewery['name'],
+            'beer_count': brewery['beer_count'],
+        },
+    }
+
+
+def _cluster_feature(members, zoom):
+    lat = sum(member['lat'] for member in members) / len(members)
+    lng = sum(member['lng'] for member in members) / len(members)
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+        'properties': {
+            'cluster': True,
+            'point_count': len(members),
+            'beer_count': sum(member['beer_count'] for member in members),
+            # Zooming to here splits the cluster up at least a little
+            'expansion_zoom': min(zoom + 1, POINT_ZOOM),
+        },
+    }
+
+
+class MapClusterIndex:
+    """Precomputed GeoJSON features for every zoom level."""
+
+    def __init__(self, levels, ungeocoded=0):
+        # zoom -> (sorted longitudes, features in the same order)
+        self.levels = levels
+        # Breweries left off the map because they have no coordinates
+        self.ungeocoded = ungeocoded
+
+    @classmethod
+    def build(cls, breweries):
+        """Build from dicts with id, name, lat, lng and beer_count; lat/lng are None if not geocoded."""
+        total = len(breweries)
+        breweries = [brewery for brewery in breweries if brewery['lat'] is not None and brewery['lng'] is not None]
+        levels = {}
+        for zoom in range(MIN_ZOOM, POINT_ZOOM + 1):
+            if zoom == POINT_ZOOM:
+                features = [_point_feature(brewery) for brewery in breweries]
+            else:
+                cells = {}
+                for brewery in breweries:
+                    x, y = project(brewery['lat'], brewery['lng'], zoom)
+                    key = (int(x // CLUSTER_RADIUS_PX), int(y // CLUSTER_RADIUS_PX))
+                    cells.setdefault(key, []).append(brewery)
+                features = [
+                    _point_feature(members[0]) if len(members) == 1 else _cluster_feature(members, zoom)
+                    for members in cells.values()
+                ]
+
+            features.sort(key=lambda feature: feature['geometry']['coordinates'][0])
+            longitudes = [feature['geometry']['coordinates'][0] for feature in features]
+            levels[zoom] = (longitudes, features)
+        return cls(levels, total - len(breweries))
+
+    def features(self, bbox, zoom):
+        """GeoJSON FeatureCollection of the clusters/points inside bbox at a zoom level."""
+        zoom = max(MIN_ZOOM, min(POINT_ZOOM, int(zoom)))
+        longitudes, features = self.levels[zoom]
+
+        if bbox is None:
+            selected = features
+        else:
+            min_lng, min_lat, max_lng, max_lat = bbox
+            start = bisect_left(longitudes, min_lng)
+            stop = bisect_right(longitudes, max_lng)
+            selected = [
+                feature for feature in features[start:stop]
+                if min_lat <= feature['geometry']['coordinates'][1] <= max_lat
+            ]
+
+        return {'type': 'FeatureCollection', 'zoom': zoom, 'features': selected, 'ungeocoded': self.ungeocoded}
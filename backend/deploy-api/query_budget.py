@@ -0,0 +1,96 @@
+"""Per-request SQL time budgets enforced with SQLite's progress handler.
+
+Every request gets a deadline when its connection is opened. SQLite calls the
+progress handler every PROGRESS_INTERVAL virtual machine instructions, and the
+handler aborts the running statement once the deadline has passed, so one
+pathological search can't tie up a worker for its whole duration.
+"""
+import os
+import threading
+import time
+
+# SQLite VM instructions between deadline checks
+PROGRESS_INTERVAL = 1000
+
+DEFAULT_BUDGET_MS = 500
+
+# Budgets per Flask endpoint name, overridable with QUERY_BUDGET_MS_<ENDPOINT>
+ENDPOINT_BUDGETS_MS = {
+    'search_beers': 500,
+    'get_filter_options': 300,
+    'get_breweries': 1000,
+    'get_beer_detail': 100,
+    # Only runs when a new catalog generation is first requested
+    'get_bootstrap': 2000,
+}
+
+# Seconds clients are told to wait before retrying an aborted request
+RETRY_AFTER_SECONDS = int(os.environ.get('QUERY_BUDGET_RETRY_AFTER', 2))
+
+
+def budget_for(endpoint):
+    """Return the SQL budget in milliseconds for a Flask endpoint."""
+    override = os.environ.get(f"QUERY_BUDGET_MS_{(endpoint or '').upper()}")
+    if override:
+        return int(override)
+    return ENDPOINT_BUDGETS_MS.get(endpoint, DEFAULT_BUDGET_MS)
+
+
+class QueryBudget:
+    """Deadline for all statements run on one connection during one request."""
+
+    def __init__(self, endpoint, budget_ms):
+        self.endpoint = endpoint
+        self.budget_ms = budget_ms
+        self.deadline = time.perf_counter() + budget_ms / 1000.0
+        self.exceeded = False
+
+    def install(self, conn):
+        conn.set_progress_handler(self._check, PROGRESS_INTERVAL)
+        return self
+
+    def _check(self):
+        # A non-zero return makes SQLite interrupt the statement
+        if time.perf_counter() > self.deadline:
+            self.exceeded = True
+            return 1
+        return 0
+
+
+def fetch_within_budget(cursor, budget, batch_size=200):
+    """Fetch all rows from an executed cursor, stopping early if the budget runs out.
+
+    Returns (rows, truncated). Statements that are interrupted before producing
+    any rows re-raise, so the caller can answer with a 503 instead.
+    """
+    rows = []
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return rows, False
+            rows.extend(batch)
+    except Exception:
+        if budget is not None and budget.exceeded and rows:
+            return rows, True
+        raise
+
+
+class AbortCounter:
+    """Thread-safe count of over-budget queries, per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def increment(self, endpoint):
+        with self._lock:
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {'total': sum(counts.values()), 'by_endpoint': counts}
+
+
+aborted_queries = AbortCounter()
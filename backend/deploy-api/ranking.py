@@ -0,0 +1,98 @@
+"""Relevance ranking for /api/search.
+
+SQL still does the matching; this module scores the matched rows and keeps
+the best k with a bounded heap, so ranking costs O(n log k) instead of a full
+sort of every match.
+
+A row's score is the sum of:
+  * field-weighted text relevance per query token (name > type > description)
+  * bonuses for an exact or prefix match of the whole query on the name
+  * a small boost for beers currently on tap and a penalty for ones that aren't
+  * a Bayesian-averaged rating, so a single 5-star review doesn't beat 200 4.5s
+"""
+import heapq
+import re
+
+SORT_OPTIONS = ('relevance', 'name', 'abv', 'rating')
+
+# Result fields score_row reads
+RANKING_FIELDS = {'beer', 'type', 'description', 'is_available', 'rating', 'num_ratings'}
+
+FIELD_WEIGHTS = {'name': 3.0, 'type': 2.0, 'description': 1.0}
+WORD_PREFIX_BONUS = 1.0
+EXACT_NAME_BONUS = 5.0
+PREFIX_NAME_BONUS = 2.0
+
+AVAILABLE_BONUS = 0.5
+UNAVAILABLE_PENALTY = -1.0
+
+# Bayesian rating prior: every beer starts with PRIOR_COUNT ratings of PRIOR_MEAN
+PRIOR_MEAN = 3.5
+PRIOR_COUNT = 10
+RATING_WEIGHT = 1.0
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def bayesian_rating(rating, num_ratings):
+    """Shrink a beer's average rating toward the prior by how few ratings it has."""
+    if rating is None or not num_ratings:
+        return PRIOR_MEAN
+    return (PRIOR_COUNT * PRIOR_MEAN + rating * num_ratings) / (PRIOR_COUNT + num_ratings)
+
+
+def text_score(query, tokens, row):
+    name = (row.get('beer') or '').lower()
+    beer_type = (row.get('type') or '').lower()
+    description = (row.get('description') or '').lower()
+    name_words = tokenize(name)
+
+    score = 0.0
+    for token in tokens:
+        if token in name:
+            score += FIELD_WEIGHTS['name']
+            if any(word.startswith(token) for word in name_words):
+                score += WORD_PREFIX_BONUS
+        elif token in beer_type:
+            score += FIELD_WEIGHTS['type']
+        elif token in description:
+            score += FIELD_WEIGHTS['description']
+    if tokens:
+        score /= len(tokens)
+
+    if name == query:
+        score += EXACT_NAME_BONUS
+    elif name.startswith(query):
+        score += PREFIX_NAME_BONUS
+    return score
+
+
+def score_row(query, tokens, row):
+    score = text_score(query, tokens, row)
+
+    available = row.get('is_available')
+    if available is not None:
+        score += AVAILABLE_BONUS if available else UNAVAILABLE_PENALTY
+
+    score += RATING_WEIGHT * (bayesian_rating(row.get('rating'), row.get('num_ratings')) - PRIOR_MEAN)
+    return score
+
+
+def rank(rows, query, k):
+    """Return the k highest-scoring rows, best first, each with a 'relevance' field."""
+    query = (query or '').strip().lower()
+    tokens = tokenize(query)
+
+    scored = ((score_row(query, tokens, row), index, row) for index, row in enumerate(rows))
+    # The row index breaks ties so equal scores keep their (name) order
+    top = heapq.nsmallest(k, scored, key=lambda item: (-item[0], item[1]))
+
+    results = []
+    for score, _, row in top:
+        row['relevance'] = round(score, 3)
+        results.append(row)
+    return results
@@ -0,0 +1,159 @@
+"""In-process rate limiting and admission control for the public API.
+
+Clients are keyed by API key when they send one, otherwise by IP address.
+Each client gets a token bucket per endpoint class, so a bot hammering
+/api/search runs out of search tokens without touching anyone else's budget.
+Expensive endpoints additionally go through an AdmissionController that caps
+how many queries run at once and turns clients away with a fast 429 once the
+wait queue is full.
+
+Buckets live in striped dicts, each behind its own lock, so concurrent
+requests from different clients rarely contend.
+"""
+import math
+import os
+import threading
+import time
+
+STRIPES = 16
+
+# Buckets idle long enough to be full again are dropped once a stripe grows past this
+MAX_KEYS_PER_STRIPE = 2048
+
+# Endpoints that run heavy queries; everything else is 'cheap'
+EXPENSIVE_ENDPOINTS = {'search_beers', 'get_breweries'}
+
+# Number of proxies in front of the API that append to X-Forwarded-For. 0 when
+# clients reach the API directly: X-Forwarded-For is then ignored, since a
+# client could send a different one with every request to get a fresh bucket
+TRUSTED_PROXY_HOPS = max(0, int(os.environ.get('TRUSTED_PROXY_HOPS', 1)))
+
+# Known API keys (comma separated); unknown keys fall back to IP limiting,
+# otherwise a client could dodge its bucket by sending a fresh key each time
+API_KEYS = {key.strip() for key in os.environ.get('API_KEYS', '').split(',') if key.strip()}
+
+# Endpoints that are never limited
+EXEMPT_ENDPOINTS = {'index', 'get_metrics'}
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by client, refilled lazily on each request."""
+
+    def __init__(self, rate, burst, stripes=STRIPES):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._buckets = [{} for _ in range(stripes)]
+
+    def allow(self, key, cost=1.0):
+        """Take tokens for one request. Returns (allowed, retry_after_seconds)."""
+        stripe = hash(key) % len(self._locks)
+        buckets = self._buckets[stripe]
+        now = time.monotonic()
+
+        with self._locks[stripe]:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= MAX_KEYS_PER_STRIPE:
+                    self._evict_idle(buckets, now)
+                bucket = buckets[key] = [self.burst, now]
+
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0
+            bucket[0] = tokens
+
+        return False, math.ceil((cost - tokens) / self.rate)
+
+    def _evict_idle(self, buckets, now):
+        refill_time = self.burst / self.rate
+        for key in [key for key, (_, last) in buckets.items() if now - last > refill_time]:
+            del buckets[key]
+
+
+class AdmissionController:
+    """Caps concurrent expensive queries, with a bounded wait queue."""
+
+    def __init__(self, max_in_flight, max_queue, queue_timeout):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def acquire(self):
+        """Try to admit a request. Returns False if it should be turned away."""
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self):
+        self._slots.release()
+
+
+class RejectionCounter:
+    """Thread-safe count of rejected requests, by reason."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def increment(self, reason):
+        with self._lock:
+            self._counts[reason] = self._counts.get(reason, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+limiters = {
+    'expensive': TokenBucketLimiter(
+        _env_float('RATE_LIMIT_EXPENSIVE_PER_SEC', 2), _env_float('RATE_LIMIT_EXPENSIVE_BURST', 10)
+    ),
+    'cheap': TokenBucketLimiter(
+        _env_float('RATE_LIMIT_CHEAP_PER_SEC', 10), _env_float('RATE_LIMIT_CHEAP_BURST', 40)
+    ),
+}
+
+admission = AdmissionController(
+    int(_env_float('MAX_IN_FLIGHT_QUERIES', 8)),
+    int(_env_float('MAX_QUEUED_QUERIES', 16)),
+    _env_float('QUERY_QUEUE_TIMEOUT', 2),
+)
+
+rejections = RejectionCounter()
+
+
+def client_key(request):
+    """Identify the caller: API key if given, else the original client IP."""
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in API_KEYS:
+        return f"key:{api_key}"
+    if not TRUSTED_PROXY_HOPS:
+        return f"ip:{request.remote_addr}"
+    # Proxies append to X-Forwarded-For, so only the entries they added can be
+    # trusted; anything further left may have been sent by the client itself
+    forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+    if forwarded:
+        return f"ip:{forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]}"
+    return f"ip:{request.remote_addr}"
+
+
+def endpoint_class(endpoint):
+    return 'expensive' if endpoint in EXPENSIVE_ENDPOINTS else 'cheap'
@@ -0,0 +1,103 @@
+"""Static JSON shards of the most common API responses.
+
+export_shards.py writes, for one catalog generation, the exact bytes the API
+would return for /api/filters and per-category searches, plus one document
+per brewery, as plain and gzip-compressed files any static host or CDN can
+serve. manifest.json lists every shard with its content hash and is written
+last, so a manifest never points at a shard from another generation.
+
+When SHARD_BASE_URL is set, the API redirects requests that exactly match a
+shard to it, as long as the manifest is for the generation being served.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+SHARD_DIR = os.environ.get('SHARD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'api'))
+
+# Public URL the shard directory is served from, e.g. https://cdn.example.com/static/api
+SHARD_BASE_URL = os.environ.get('SHARD_BASE_URL', '').rstrip('/')
+
+MANIFEST = 'manifest.json'
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_shard(shard_dir, name, body):
+    """Write name and name.gz; return the manifest entry."""
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    write_atomic(os.path.join(shard_dir, name), body)
+    write_atomic(os.path.join(shard_dir, name + '.gz'), compressed)
+    return {
+        'sha256': hashlib.sha256(body).hexdigest(),
+        'bytes': len(body),
+        'gzip_bytes': len(compressed),
+    }
+
+
+def write_manifest(shard_dir, generation, files):
+    """Write the manifest, then delete shards the previous manifest listed and this one doesn't.
+
+    Only files an earlier export wrote are removed, so the shard directory can
+    share a static root with other files.
+    """
+    try:
+        with open(os.path.join(shard_dir, MANIFEST), 'r') as f:
+            previous = json.load(f)['files']
+    except (OSError, ValueError, KeyError, TypeError):
+        previous = {}
+
+    manifest = {'generation': generation, 'files': files}
+    write_atomic(os.path.join(shard_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    for name in set(previous) - set(files):
+        for stale in (name, name + '.gz'):
+            try:
+                os.remove(os.path.join(shard_dir, stale))
+            except FileNotFoundError:
+                pass
+
+
+_manifest_cache = {'stamp': None, 'manifest': None}
+_manifest_lock = threading.Lock()
+
+
+def load_manifest(shard_dir=SHARD_DIR):
+    """The current manifest, re-read only when the file changes. None if there isn't one."""
+    path = os.path.join(shard_dir, MANIFEST)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _manifest_lock:
+        if _manifest_cache['stamp'] == stamp:
+            return _manifest_cache['manifest']
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    with _manifest_lock:
+        _manifest_cache.update(stamp=stamp, manifest=manifest)
+    return manifest
+
+
+def shard_url(name, generation):
+    """Public URL of a shard if it exists for this generation, else None."""
+    if not SHARD_BASE_URL:
+        return None
+    manifest = load_manifest()
+    if not manifest or manifest['generation'] != generation or name not in manifest['files']:
+        return None
+    # The content hash busts CDN caches when a shard changes
+    return f"{SHARD_BASE_URL}/{name}?v={manifest['files'][name]['sha256'][:12]}"
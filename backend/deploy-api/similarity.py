@@ -0,0 +1,151 @@
+"""Precomputed "similar beers" from TF-IDF vectors of description and type.
+
+The index is built once per catalog version: every beer's description and
+type are turned into an L2-normalised TF-IDF vector, stored as a CSR matrix
+in plain NumPy arrays. Cosine similarity is computed block by block with a
+sparse x dense product, and for beers that share at least one term it is
+blended with ABV closeness; only the top neighbours of each beer are kept. Serving /api/beer/<id>/similar is then a
+dictionary lookup.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+# Neighbours kept per beer; also the largest limit the endpoint accepts
+TOP_K = 20
+
+# Share of the similarity that comes from ABV closeness rather than text
+ABV_WEIGHT = 0.2
+
+# Rows of the similarity matrix computed at once
+BLOCK_SIZE = 64
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'beer', 'but', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to', 'was', 'we',
+    'with', 'you', 'your', 'abv', 'unknown',
+}
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def parse_abv(value):
+    """ABV as a float, tolerating scraped strings like '6.5%'."""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = re.search(r"\d+(?:\.\d+)?", value or '')
+    return float(match.group(0)) if match else None
+
+
+def build_tfidf(documents):
+    """Return (indptr, indices, data, vocabulary_size) for L2-normalised TF-IDF rows."""
+    token_lists = [tokenize(document) for document in documents]
+    document_frequency = Counter()
+    for tokens in token_lists:
+        document_frequency.update(set(tokens))
+
+    vocabulary = {term: index for index, term in enumerate(sorted(document_frequency))}
+    n_documents = len(documents)
+
+    indptr = [0]
+    indices = []
+    data = []
+    for tokens in token_lists:
+        counts = Counter(tokens)
+        weights = {}
+        for term, count in counts.items():
+            idf = math.log((1 + n_documents) / (1 + document_frequency[term])) + 1
+            weights[vocabulary[term]] = (1 + math.log(count)) * idf
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        for column in sorted(weights):
+            indices.append(column)
+            data.append(weights[column] / norm)
+        indptr.append(len(indices))
+
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(data, dtype=np.float32),
+        len(vocabulary),
+    )
+
+
+def csr_times_dense(indptr, indices, data, dense):
+    """(n x V CSR) @ (V x B dense) using only NumPy."""
+    n_rows = len(indptr) - 1
+    out = np.zeros((n_rows, dense.shape[1]), dtype=np.float32)
+    if len(data) == 0:
+        return out
+    products = data[:, None] * dense[indices]
+    starts = indptr[:-1]
+    non_empty = starts < indptr[1:]
+    out[non_empty] = np.add.reduceat(products, starts[non_empty], axis=0)
+    return out
+
+
+class SimilarityIndex:
+    """Top-k most similar beers for every beer in one catalog version."""
+
+    def __init__(self, neighbors):
+        self.neighbors = neighbors
+
+    @classmethod
+    def build(cls, rows, top_k=TOP_K):
+        """Build from rows with id, type, description and abv."""
+        ids = [row['id'] for row in rows]
+        n = len(ids)
+        if n < 2:
+            return cls({beer_id: [] for beer_id in ids})
+
+        documents = [f"{row['type'] or ''} {row['type'] or ''} {row['description'] or ''}" for row in rows]
+        indptr, indices, data, vocabulary_size = build_tfidf(documents)
+
+        abvs = np.array([parse_abv(row['abv']) or np.nan for row in rows], dtype=np.float32)
+        has_abv = ~np.isnan(abvs)
+        abv_range = float(np.nanmax(abvs) - np.nanmin(abvs)) if has_abv.any() else 0.0
+        k = min(top_k, n - 1)
+
+        neighbors = {}
+        for start in range(0, n, BLOCK_SIZE):
+            stop = min(start + BLOCK_SIZE, n)
+
+            # Dense copy of this block's rows, transposed to V x B
+            block = np.zeros((vocabulary_size, stop - start), dtype=np.float32)
+            for local, row in enumerate(range(start, stop)):
+                row_slice = slice(indptr[row], indptr[row + 1])
+                block[indices[row_slice], local] = data[row_slice]
+            scores = csr_times_dense(indptr, indices, data, block).T  # B x n cosine similarities
+            # Only beers sharing some style or description terms are candidates;
+            # a close ABV alone doesn't make two beers similar
+            related = scores > 0
+
+            if abv_range > 0:
+                closeness = 1 - np.abs(abvs[start:stop, None] - abvs[None, :]) / abv_range
+                both = has_abv[start:stop, None] & has_abv[None, :]
+                scores = np.where(both, (1 - ABV_WEIGHT) * scores + ABV_WEIGHT * closeness, scores)
+            scores = np.where(related, scores, -np.inf)
+
+            # A beer is not similar to itself
+            scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for local, row in enumerate(range(start, stop)):
+                candidates = top[local][np.argsort(-scores[local, top[local]])]
+                neighbors[ids[row]] = [
+                    (ids[column], round(float(scores[local, column]), 4))
+                    for column in candidates if scores[local, column] > 0
+                ]
+
+        return cls(neighbors)
+
+    def similar(self, beer_id, limit):
+        """Return [(beer_id, score)] for the closest beers, or None for an unknown beer."""
+        if beer_id not in self.neighbors:
+            return None
+        return self.neighbors[beer_id][:limit]
@@ -0,0 +1,83 @@
+"""Single-flight coalescing of identical concurrent computations.
+
+When several callers ask for the same key at the same time, only the first
+(the leader) runs the computation; the others wait for it and receive the
+same result, or the same exception. Nothing is cached: once the leader
+finishes the key is forgotten and the next caller computes afresh.
+
+Threads and asyncio tasks share one table of in-flight keys, each backed by a
+concurrent.futures.Future, so a thread and a coroutine asking for the same key
+coalesce with each other too.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Table of in-flight computations keyed by a hashable request key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'errors': 0, 'max_waiters': 0}
+        self._waiters = {}
+
+    def _join(self, key):
+        """Return (future, is_leader) for a key."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                self._waiters[key] += 1
+                self._stats['max_waiters'] = max(self._stats['max_waiters'], self._waiters[key])
+                return future, False
+            future = self._calls[key] = Future()
+            self._waiters[key] = 0
+            self._stats['leaders'] += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+            del self._waiters[key]
+            if error is not None:
+                self._stats['errors'] += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func, *args):
+        """Run func(*args) once for all concurrent callers with the same key."""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, func, *args):
+        """Await func(*args) (a coroutine function) once for all concurrent callers with the same key."""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await func(*args)
+        except BaseException as e:
+            # Includes cancellation, so waiters are never left hanging
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats, in_flight=len(self._calls))
+        total = stats['leaders'] + stats['coalesced']
+        stats['coalesced_ratio'] = round(stats['coalesced'] / total, 4) if total else 0.0
+        return stats
@@ -0,0 +1,185 @@
+"""Server-Sent Events fan-out for tap-list changes.
+
+The ETL pipeline records added/removed/back-on-tap events in each catalog
+generation it publishes (see taplist_events.py). One broadcaster thread per
+process watches the snapshot pointer, reads the new events once when a
+generation is published, and pushes them to every subscriber whose brewery
+and category filters match. Clients never query the database themselves
+while connected, so a thousand open streams cost one stat() per poll.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+from snapshots import current_snapshot
+
+# Seconds between checks of the snapshot pointer
+POLL_INTERVAL = float(os.environ.get('TAPLIST_POLL_SECONDS', 2))
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+
+# Milliseconds clients wait before reconnecting (sent as the SSE retry field)
+RECONNECT_MS = 5000
+
+# Events buffered per subscriber; a client that falls further behind is disconnected
+# and catches up by reconnecting with Last-Event-ID
+MAX_QUEUED_EVENTS = 256
+
+MAX_SUBSCRIBERS = int(os.environ.get('TAPLIST_MAX_SUBSCRIBERS', 500))
+
+EVENT_FIELDS = ('id', 'event', 'beer_id', 'beer_name', 'brewery_id', 'brewery_name', 'category_id', 'generation')
+
+
+def read_events(path, after_id, up_to_id=None):
+    """Events in a published generation with after_id < id <= up_to_id."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+    try:
+        has_events = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'taplist_events'"
+        ).fetchone()
+        if not has_events:
+            return []
+        sql = f"SELECT {', '.join(EVENT_FIELDS)} FROM taplist_events WHERE id > ?"
+        params = [after_id]
+        if up_to_id is not None:
+            sql += " AND id <= ?"
+            params.append(up_to_id)
+        return [dict(zip(EVENT_FIELDS, row)) for row in conn.execute(sql + " ORDER BY id", params)]
+    finally:
+        conn.close()
+
+
+def format_event(event):
+    """One SSE message."""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+class Subscription:
+    """One connected client: its filters and its queue of pending events."""
+
+    def __init__(self, brewery=None, category_ids=None):
+        self.brewery = (brewery or '').lower() or None
+        self.category_ids = set(category_ids) if category_ids is not None else None
+        self.queue = queue.Queue(maxsize=MAX_QUEUED_EVENTS)
+        self.dropped = False
+
+    def matches(self, event):
+        if self.brewery and self.brewery not in (event['brewery_name'] or '').lower():
+            return False
+        if self.category_ids is not None and event['category_id'] not in self.category_ids:
+            return False
+        return True
+
+
+class TaplistBroadcaster:
+    """Single polling loop shared by every stream subscriber."""
+
+    def __init__(self, db_path, poll_interval=POLL_INTERVAL):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._generation = None
+        self.last_event_id = 0
+        self.stats = {'events_broadcast': 0, 'deliveries': 0, 'dropped_subscribers': 0}
+
+    def subscribe(self, brewery=None, category_ids=None):
+        """Register a client. Returns (subscription, last_event_id) or (None, None) when full.
+
+        Events after last_event_id will be delivered to the subscription's
+        queue; anything the client missed up to it has to be replayed by the caller.
+        """
+        self._ensure_started()
+        with self._lock:
+            if len(self._subscribers) >= MAX_SUBSCRIBERS:
+                return None, None
+            subscription = Subscription(brewery, category_ids)
+            self._subscribers.add(subscription)
+            return subscription, self.last_event_id
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, subscribers=len(self._subscribers), last_event_id=self.last_event_id)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Start from the newest event; older ones are only sent on request
+            snapshot = current_snapshot(self.db_path)
+            self._generation = snapshot['generation']
+            if snapshot['generation']:
+                events = read_events(snapshot['path'], 0)
+                self.last_event_id = events[-1]['id'] if events else 0
+            self._thread = threading.Thread(target=self._run, name='taplist-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.poll_interval):
+            snapshot = current_snapshot(self.db_path)
+            if snapshot['generation'] == self._generation:
+                continue
+            self._generation = snapshot['generation']
+            if not snapshot['generation']:
+                continue
+            try:
+                events = read_events(snapshot['path'], self.last_event_id)
+            except sqlite3.Error:
+                # The generation may have been pruned already; pick up the next one
+                continue
+            self._broadcast(events)
+
+    def _broadcast(self, events):
+        if not events:
+            return
+        with self._lock:
+            self.last_event_id = events[-1]['id']
+            subscribers = list(self._subscribers)
+            self.stats['events_broadcast'] += len(events)
+
+        deliveries = 0
+        for subscription in subscribers:
+            for event in events:
+                if not subscription.matches(event):
+                    continue
+                try:
+                    subscription.queue.put_nowait(event)
+                    deliveries += 1
+                except queue.Full:
+                    subscription.dropped = True
+                    self.unsubscribe(subscription)
+                    with self._lock:
+                        self.stats['dropped_subscribers'] += 1
+                    break
+
+        with self._lock:
+            self.stats['deliveries'] += deliveries
+
+
+def stream(broadcaster, subscription, backlog):
+    """Generator of SSE messages for one subscription, starting with its backlog."""
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        for event in backlog:
+            yield format_event(event)
+        while True:
+            if subscription.dropped and subscription.queue.empty():
+                # Fell too far behind; the client reconnects with Last-Event-ID
+                return
+            try:
+                event = subscription.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Build, validate and publish a new catalog generation for the API.
+
+beers.db stays the working database the scrapers write into. This script
+copies it into a staging database, runs the ETL steps against the copy,
+validates the result and publishes it as the next generation. The API keeps
+serving the previous generation until the pointer file is swapped.
+
+    python etl_pipeline.py
+    python etl_pipeline.py --source beers.db --target deploy-api/beers.db
+    python etl_pipeline.py --shards deploy-api/static/api
+
+--target defaults to deploy-api/beers.db, the database the API serves.
+"""
+import argparse
+import os
+import sys
+
+from db_connection import DEFAULT_DB_PATH, close_writer, get_writer
+from snapshots import (
+    SnapshotValidationError, build_staging, generation_path, publish_snapshot, read_pointer, validate_snapshot
+)
+from taplist_events import record_taplist_changes
+from catalog_stats import ensure_catalog_stats
+from percolator import percolate_generation
+from etl_beer_data import etl_beer_data
+from assign_categories_to_beers import assign_categories_to_beers
+from improved_database_cleanup import fix_database
+
+# Where deploy-api/api2.py reads its catalog from
+API_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deploy-api', 'beers.db')
+
+
+def run_pipeline(source_path, target_path, shard_dir=None):
+    """Run the ETL into a staging copy and publish it. Returns the new generation or None."""
+    print(f"Building staging database from {source_path}...")
+    staging = build_staging(source_path, target_path)
+
+    # Aggregate tables are kept current by triggers from here on
+    get_writer(staging).run(ensure_catalog_stats)
+    etl_beer_data(db_path=staging)
+    # The ETL writes through the writer queue; stop it before the file is moved
+    close_writer(staging)
+
+    assign_categories_to_beers(db_path=staging)
+    fix_database(db_path=staging, backup=False)
+
+    previous = read_pointer(target_path)
+    events = record_taplist_changes(
+        previous['path'] if previous and os.path.exists(previous['path']) else None,
+        staging,
+        (previous['generation'] if previous else 0) + 1,
+    )
+    print(f"Recorded {events} tap-list changes")
+
+    try:
+        stats = validate_snapshot(staging, target_path)
+    except SnapshotValidationError as e:
+        print(f"ERROR: Staging database failed validation, not publishing: {e}")
+        return None
+
+    generation = publish_snapshot(staging, target_path, stats)
+    print(f"Published generation {generation} ({stats['beer_count']} beers) for {target_path}")
+
+    # Saved searches and their outbox belong to the working database, not the snapshot
+    queued = percolate_generation(source_path, generation_path(target_path, generation), generation)
+    close_writer(source_path)
+    print(f"Queued {queued} saved-search notifications")
+
+    if shard_dir:
+        # The exporter renders shards through the API's views in deploy-api/
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deploy-api'))
+        from export_shards import export_shards
+        files = export_shards(os.path.abspath(target_path), shard_dir)
+        if files is None:
+            print("WARNING: A newer generation was published during the shard export; shards not updated")
+        else:
+            print(f"Exported {len(files)} static shards to {shard_dir}")
+    return generation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and publish a catalog snapshot")
+    parser.add_argument("--source", default=DEFAULT_DB_PATH, help="Working database the scrapers write into")
+    parser.add_argument("--target", default=API_DB_PATH, help="Database path the API is configured with")
+    parser.add_argument("--shards", help="Also export static API shards into this directory after publishing")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"ERROR: Database not found at {args.source}")
+        sys.exit(1)
+
+    generation = run_pipeline(args.source, args.target, args.shards)
+    sys.exit(0 if generation else 1)
+
+
+if __name__ == '__main__':
+    main()
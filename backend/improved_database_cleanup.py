@@ -3,6 +3,8 @@ import os
 import re
 from datetime import datetime
 
+from db_connection import connect
+
 def backup_database(db_path):
     """Create a backup of the database"""
     backup_path = f"{db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -10,16 +12,14 @@ def backup_database(db_path):
         dst.write(src.read())
     print(f"Created backup at {backup_path}")
 
-def fix_database():
+def fix_database(db_path="beers.db", backup=True):
     """Fix brewery and beer data issues with improved naming cleanup"""
-    db_path = "beers.db"
-    
-    # Create backup first
-    backup_database(db_path)
+    # Create backup first (not needed when cleaning up a staging copy)
+    if backup:
+        backup_database(db_path)
     
     # Connect to the database
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = connect(db_path, row_factory=sqlite3.Row)
     cursor = conn.cursor()
     
     # 1. Fix problematic brewery entries - more comprehensive pattern matching
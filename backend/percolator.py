@@ -0,0 +1,295 @@
+"""Saved searches, and matching new beers against them.
+
+Users save a search (the same filters /api/search takes) and want to hear when
+a new beer matches it. Re-running every saved search after each ETL run costs
+O(searches x beers), so the searches themselves are indexed instead: each one
+is filed under the anchor keys of a single filter (category, brewery, type,
+query text or ABV range), whichever the fewest catalog beers would hit. A new
+beer looks up only the anchors it could possibly satisfy and the full filters
+are checked for those candidates alone.
+
+Text filters match like SQL LIKE '%...%', so text anchors are character
+trigrams: a search for type 'hazy' can be filed under 'azy', and a beer whose
+type contains 'hazy' necessarily produces that trigram.
+
+saved_searches and notification_outbox live in the working database; the
+ETL pipeline percolates each published generation's added and back-on-tap
+beers and queues one outbox row per (saved search, beer).
+"""
+import re
+import sqlite3
+from collections import Counter, defaultdict
+
+from db_connection import connect, get_writer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_searches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL,
+    name TEXT,
+    query TEXT,
+    type TEXT,
+    brewery TEXT,
+    category_id INTEGER,
+    min_abv REAL,
+    max_abv REAL,
+    active INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    saved_search_id INTEGER NOT NULL,
+    beer_id INTEGER NOT NULL,
+    beer_name TEXT,
+    brewery_name TEXT,
+    event TEXT,
+    generation INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP,
+    UNIQUE (saved_search_id, beer_id, generation),
+    FOREIGN KEY (saved_search_id) REFERENCES saved_searches (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_unsent
+    ON notification_outbox (sent_at) WHERE sent_at IS NULL;
+"""
+
+SEARCH_FIELDS = ('id', 'query', 'type', 'brewery', 'category_id', 'min_abv', 'max_abv')
+
+# ABV range covered by the per-percent buckets; anything above shares the last one
+MAX_ABV_BUCKET = 20
+
+TRIGRAM_PATTERN = re.compile(r"[a-z0-9]{3,}")
+
+
+def ensure_tables(conn):
+    # Statement by statement: executescript would commit the caller's transaction
+    for statement in SCHEMA.split(';'):
+        if statement.strip():
+            conn.execute(statement)
+
+
+def save_search(conn, email, name=None, query=None, beer_type=None, brewery=None,
+                category_id=None, min_abv=None, max_abv=None):
+    """Store a saved search and return its id."""
+    cursor = conn.execute("""
+        INSERT INTO saved_searches (email, name, query, type, brewery, category_id, min_abv, max_abv)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (email, name, query or None, beer_type or None, brewery or None, category_id, min_abv, max_abv))
+    return cursor.lastrowid
+
+
+def trigrams(text):
+    """Every trigram inside the alphanumeric runs of text."""
+    grams = set()
+    for run in TRIGRAM_PATTERN.findall((text or '').lower()):
+        grams.update(run[i:i + 3] for i in range(len(run) - 2))
+    return grams
+
+
+def parse_abv(value):
+    """ABV as a float, tolerating scraped strings like '6.5%'."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d+)?", value or '')
+    return float(match.group(0)) if match else None
+
+
+def abv_bucket(abv):
+    return min(int(abv), MAX_ABV_BUCKET) if abv > 0 else 0
+
+
+def matches(search, beer, category_ids):
+    """Check every filter of a saved search against a beer, like /api/search would."""
+    if search['query']:
+        query = search['query'].lower()
+        if not any(query in (beer[field] or '').lower() for field in ('name', 'description', 'type')):
+            return False
+    if search['type'] and search['type'].lower() not in (beer['type'] or '').lower():
+        return False
+    if search['brewery'] and search['brewery'].lower() not in (beer['brewery'] or '').lower():
+        return False
+    if search['category_id'] is not None and beer['category_id'] not in category_ids:
+        return False
+    if search['min_abv'] is not None or search['max_abv'] is not None:
+        if beer['abv'] is None:
+            return False
+        if search['min_abv'] is not None and beer['abv'] < search['min_abv']:
+            return False
+        if search['max_abv'] is not None and beer['abv'] > search['max_abv']:
+            return False
+    return True
+
+
+def load_category_tree(conn):
+    """Map each category id to its direct subcategory ids."""
+    children = defaultdict(list)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'beer_categories' in tables:
+        for category_id, parent_id in conn.execute("SELECT id, parent_id FROM beer_categories"):
+            if parent_id is not None:
+                children[parent_id].append(category_id)
+    return children
+
+
+class Percolator:
+    """Saved searches indexed by anchor key, for matching one beer at a time."""
+
+    def __init__(self, category_children=None, key_frequency=None):
+        # parent id -> child ids, to expand a category filter to its subcategories
+        self.category_children = category_children or {}
+        # How many catalog beers produce each key, to pick the rarest anchor
+        self.key_frequency = key_frequency or {}
+        self.searches = {}
+        self.index = defaultdict(list)
+        # search id -> set of category ids it accepts
+        self.category_sets = {}
+
+    @classmethod
+    def load(cls, conn, catalog_beers=None):
+        """Build from the active saved searches and category tree in a database.
+
+        catalog_beers (dicts like match() takes) are used to pick anchors that
+        few beers hit; without them the first filter is used.
+        """
+        percolator = cls(load_category_tree(conn))
+        if catalog_beers:
+            percolator.key_frequency = percolator.count_keys(catalog_beers)
+        for row in conn.execute(f"SELECT {', '.join(SEARCH_FIELDS)} FROM saved_searches WHERE active = 1"):
+            percolator.add(dict(zip(SEARCH_FIELDS, row)))
+        return percolator
+
+    def count_keys(self, beers):
+        frequency = Counter()
+        for beer in beers:
+            frequency.update(set(self.candidate_keys(dict(beer, abv=parse_abv(beer['abv'])))))
+        return frequency
+
+    def _descendants(self, category_id):
+        found, stack = set(), [category_id]
+        while stack:
+            current = stack.pop()
+            if current not in found:
+                found.add(current)
+                stack.extend(self.category_children.get(current, ()))
+        return found
+
+    def anchor_options(self, search):
+        """Each filter's index keys; a matching beer hits at least one key of every option."""
+        options = []
+        if search['category_id'] is not None:
+            categories = self._descendants(search['category_id'])
+            self.category_sets[search['id']] = categories
+            options.append([('category', category_id) for category_id in categories])
+
+        # Every trigram of a text filter appears in any text containing it
+        for field in ('brewery', 'type', 'query'):
+            options.extend([(field, gram)] for gram in trigrams(search[field]))
+
+        if search['min_abv'] is not None or search['max_abv'] is not None:
+            low = abv_bucket(search['min_abv'] or 0)
+            high = abv_bucket(search['max_abv']) if search['max_abv'] is not None else MAX_ABV_BUCKET
+            options.append([('abv', bucket) for bucket in range(low, high + 1)])
+        return options
+
+    def add(self, search):
+        """Index a saved search (a dict with SEARCH_FIELDS) under its rarest anchor."""
+        self.searches[search['id']] = search
+        options = self.anchor_options(search)
+        if not options:
+            # No usable anchor (e.g. only a two-letter query): checked against every beer
+            options = [[('all',)]]
+
+        keys = min(options, key=lambda keys: sum(self.key_frequency.get(key, 0) for key in keys))
+        for key in keys:
+            self.index[key].append(search['id'])
+
+    def candidate_keys(self, beer):
+        keys = [('all',), ('category', beer['category_id'])]
+        keys.extend(('brewery', gram) for gram in trigrams(beer['brewery']))
+        keys.extend(('type', gram) for gram in trigrams(beer['type']))
+        text = ' '.join(beer[field] or '' for field in ('name', 'description', 'type'))
+        keys.extend(('query', gram) for gram in trigrams(text))
+        if beer['abv'] is not None:
+            keys.append(('abv', abv_bucket(beer['abv'])))
+        return keys
+
+    def match(self, beer):
+        """Return the ids of the saved searches a beer satisfies.
+
+        beer is a dict with name, type, description, brewery, category_id and abv.
+        """
+        beer = dict(beer, abv=parse_abv(beer['abv']))
+        results = []
+        seen = set()
+        for key in self.candidate_keys(beer):
+            for search_id in self.index.get(key, ()):
+                if search_id in seen:
+                    continue
+                seen.add(search_id)
+                if matches(self.searches[search_id], beer, self.category_sets.get(search_id, ())):
+                    results.append(search_id)
+        return results
+
+
+def new_beers(snapshot_path, generation):
+    """Beers added or back on tap in a published generation, with the fields percolation needs."""
+    conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro&immutable=1", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("""
+            SELECT e.event, b.id, b.name, b.type, b.description, b.abv, b.category_id,
+                   e.brewery_name as brewery
+            FROM taplist_events e
+            JOIN beers b ON e.beer_id = b.id
+            WHERE e.generation = ? AND e.event IN ('added', 'back_on_tap')
+            ORDER BY e.id
+        """, (generation,))]
+    finally:
+        conn.close()
+
+
+def catalog_beers(snapshot_path):
+    """Every beer in a published generation, for anchor selection."""
+    conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro&immutable=1", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("""
+            SELECT b.id, b.name, b.type, b.description, b.abv, b.category_id, br.name as brewery
+            FROM beers b
+            LEFT JOIN breweries br ON b.brewery_id = br.id
+        """)]
+    finally:
+        conn.close()
+
+
+def queue_notifications(conn, percolator, beers, generation):
+    """Match beers and insert one outbox row per new (saved search, beer). Returns rows queued."""
+    queued = 0
+    for beer in beers:
+        for search_id in percolator.match(beer):
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO notification_outbox
+                    (saved_search_id, beer_id, beer_name, brewery_name, event, generation)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (search_id, beer['id'], beer['name'], beer['brewery'], beer['event'], generation))
+            queued += cursor.rowcount
+    return queued
+
+
+def percolate_generation(db_path, snapshot_path, generation):
+    """Queue notifications in db_path for a published generation's new beers. Returns rows queued."""
+    writer = get_writer(db_path)
+    writer.run(ensure_tables)
+
+    beers = new_beers(snapshot_path, generation)
+    if not beers:
+        return 0
+
+    conn = connect(db_path, readonly=True)
+    try:
+        percolator = Percolator.load(conn, catalog_beers(snapshot_path))
+    finally:
+        conn.close()
+    return writer.run(queue_notifications, percolator, beers, generation)
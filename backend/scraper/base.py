@@ -6,6 +6,10 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+from db_connection import get_writer
+from scraper.breweries.html_parser import make_soup
+from scraper.breweries.http_cache import cached_get
+
 class BaseScraper:
     """Base class for all brewery scrapers"""
     
@@ -24,19 +28,19 @@ class BaseScraper:
         self.logger = logging.getLogger(f"scraper.{name.replace(' ', '_').lower()}")
         
     def get_page(self, url: Optional[str] = None) -> Optional[BeautifulSoup]:
-        """Fetch a page and return a BeautifulSoup object"""
+        """Fetch a page and return a BeautifulSoup object (a SelectolaxNode with the selectolax backend)"""
         try:
             target_url = url or self.url
             self.logger.info(f"Fetching {target_url}")
             
-            response = requests.get(target_url, headers={
+            response = cached_get(target_url, headers={
                 'User-Agent': 'ChicagoBeerFinder/1.0 (educational project)',
                 'Accept': 'text/html,application/xhtml+xml,application/xml',
                 'Accept-Language': 'en-US,en;q=0.9',
             }, timeout=30)
             
             response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
+            return make_soup(response.text, fast=True)
         except requests.RequestException as e:
             self.logger.error(f"Failed to fetch {url or self.url}: {str(e)}")
             return None
@@ -55,69 +59,70 @@ class BaseScraper:
             return False
             
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get existing beers for this brewery to compare
-            cursor.execute("""
-                SELECT b.id, b.name FROM beers b
-                JOIN beer_locations bl ON b.id = bl.beer_id
-                WHERE bl.brewery_id = ?
-            """, (self.brewery_id,))
-            
-            existing_beers = {name: beer_id for beer_id, name in cursor.fetchall()}
-            
-            # Count stats for logging
-            stats = {
-                'added': 0,
-                'updated': 0,
-                'unchanged': 0
-            }
-            
-            # Process each beer
-            for beer in beers:
-                beer_name = beer['name']
-                
-                if beer_name in existing_beers:
-                    # Update existing beer
-                    beer_id = existing_beers[beer_name]
-                    cursor.execute("""
-                        UPDATE beers
-                        SET type = ?, abv = ?, description = ?
-                        WHERE id = ?
-                    """, (beer['type'], beer['abv'], beer.get('description', ''), beer_id))
-                    
-                    if cursor.rowcount > 0:
-                        stats['updated'] += 1
-                    else:
-                        stats['unchanged'] += 1
-                else:
-                    # Insert new beer
-                    cursor.execute("""
-                        INSERT INTO beers (name, type, abv, description)
-                        VALUES (?, ?, ?, ?)
-                    """, (beer_name, beer['type'], beer['abv'], beer.get('description', '')))
-                    
-                    beer_id = cursor.lastrowid
-                    
-                    # Create beer_location relationship
-                    cursor.execute("""
-                        INSERT INTO beer_locations (beer_id, brewery_id, is_available, last_updated)
-                        VALUES (?, ?, 1, CURRENT_TIMESTAMP)
-                    """, (beer_id, self.brewery_id))
-                    
-                    stats['added'] += 1
-            
-            conn.commit()
+            # Writes go through the shared writer queue so concurrent scrapers don't collide
+            stats = get_writer(self.db_path).run(self._write_beers, beers)
             self.logger.info(f"Saved {len(beers)} beers: {stats['added']} added, {stats['updated']} updated, {stats['unchanged']} unchanged")
             return True
             
         except sqlite3.Error as e:
             self.logger.error(f"Database error: {str(e)}")
             return False
-        finally:
-            if conn:
-                conn.close()
+    
+    def _write_beers(self, conn: sqlite3.Connection, beers: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Write job run by the writer queue inside a single transaction"""
+        cursor = conn.cursor()
+        
+        # Get existing beers for this brewery to compare
+        cursor.execute("""
+            SELECT b.id, b.name FROM beers b
+            JOIN beer_locations bl ON b.id = bl.beer_id
+            WHERE bl.brewery_id = ?
+        """, (self.brewery_id,))
+        
+        existing_beers = {name: beer_id for beer_id, name in cursor.fetchall()}
+        
+        # Count stats for logging
+        stats = {
+            'added': 0,
+            'updated': 0,
+            'unchanged': 0
+        }
+        
+        # Process each beer
+        for beer in beers:
+            beer_name = beer['name']
+            
+            if beer_name in existing_beers:
+                # Update existing beer
+                beer_id = existing_beers[beer_name]
+                cursor.execute("""
+                    UPDATE beers
+                    SET type = ?, abv = ?, description = ?
+                    WHERE id = ?
+                """, (beer['type'], beer['abv'], beer.get('description', ''), beer_id))
+                
+                if cursor.rowcount > 0:
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+            else:
+                # Insert new beer
+                cursor.execute("""
+                    INSERT INTO beers (name, type, abv, description)
+                    VALUES (?, ?, ?, ?)
+                """, (beer_name, beer['type'], beer['abv'], beer.get('description', '')))
+                
+                beer_id = cursor.lastrowid
+                
+                # Create beer_location relationship
+                cursor.execute("""
+                    INSERT INTO beer_locations (beer_id, brewery_id, is_available, last_updated)
+                    VALUES (?, ?, 1, CURRENT_TIMESTAMP)
+                """, (beer_id, self.brewery_id))
+                
+                stats['added'] += 1
+        
+        return stats
     
     def run(self) -> bool:
         """Run the scraper and save results"""
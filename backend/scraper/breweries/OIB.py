@@ -1,11 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 import json
 import os
 import time
 from datetime import datetime
 import random
 
+from async_fetcher import fetch_pages
+from http_cache import cached_get, get_cache, memoize
+
 class OldIrvingBreweryScraper:
     def __init__(self):
         self.base_url = "https://oldirvingbrewing.com"
@@ -37,7 +39,7 @@ class OldIrvingBreweryScraper:
                     print(f"  Retrying in {delay:.1f} seconds (attempt {attempt+1}/{retry_count})")
                     time.sleep(delay)
                 
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = cached_get(url, headers=self.headers, timeout=10)
                 
                 if response.status_code == 200:
                     return response
@@ -64,12 +66,13 @@ class OldIrvingBreweryScraper:
             print("Failed to fetch beer list after multiple attempts")
             return []
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         
         # Find all beer buttons on the main page
         beer_buttons = soup.find_all('span', class_='elementor-button-text')
         
         beers_data = []
+        beer_pages = []
         for button in beer_buttons:
             beer_name = button.text.strip()
             if not beer_name:  # Skip empty buttons
@@ -99,13 +102,28 @@ class OldIrvingBreweryScraper:
             if not beer_url.startswith('http'):
                 beer_url = f"{self.base_url}{beer_url}"
             
-            # Get beer details
-            beer_details = self.get_beer_details(beer_url, beer_name, beer_type)
+            beer_pages.append((beer_url, beer_name, beer_type))
+        
+        # Fetch all detail pages at once; the fetcher keeps us within the site's rate limit
+        # Unchanged pages reuse last run's parse
+        def parse(index, beer_url, html):
+            _, beer_name, beer_type = beer_pages[index]
+            return memoize(beer_url, f"oib:{beer_name}:{beer_type}", html,
+                           lambda html: self.parse_beer_details(html, beer_url, beer_name, beer_type))
+        
+        details = fetch_pages([page[0] for page in beer_pages], parse, headers=self.headers)
+        scraped_date = datetime.now().strftime('%Y-%m-%d')
+        timestamp = datetime.now().isoformat()
+        for (beer_url, beer_name, _), beer_details in zip(beer_pages, details):
             if beer_details:
+                beer_details.update(scraped_date=scraped_date, timestamp=timestamp)
                 beers_data.append(beer_details)
-            
-            # Be nice to the server
-            time.sleep(2 + random.random() * 2)
+            else:
+                print(f"  Failed to fetch beer details for {beer_name} from {beer_url}")
+        
+        cache = get_cache()
+        if cache:
+            print(cache.report('oldirvingbrewing.com'))
         
         # Save the data
         self.save_data(beers_data)
@@ -119,7 +137,14 @@ class OldIrvingBreweryScraper:
                 print(f"  Failed to fetch beer details after multiple attempts")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return self.parse_beer_details(response.text, beer_url, beer_name, beer_type)
+        except Exception as e:
+            print(f"  Error getting details for {beer_name}: {str(e)}")
+            return None
+    
+    def parse_beer_details(self, html, beer_url, beer_name, beer_type):
+        try:
+            soup = make_soup(html)
             
             # Extract beer description
             description = ""
@@ -165,7 +190,7 @@ class OldIrvingBreweryScraper:
                 'timestamp': timestamp
             }
         except Exception as e:
-            print(f"  Error getting details for {beer_name}: {str(e)}")
+            print(f"  Error parsing details for {beer_name}: {str(e)}")
             return None
     
     def save_data(self, beers_data):
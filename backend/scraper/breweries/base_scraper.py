@@ -1,9 +1,10 @@
 # base_scraper.py
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
 
+from html_parser import make_soup
+from http_cache import cached_get
+
 class BreweryScraper:
     def __init__(self, brewery_name, website_url, location="Chicago, IL"):
         self.brewery_name = brewery_name
@@ -20,16 +21,14 @@ class BreweryScraper:
             url = self.beer_url
             
         print(f"Retrieving content from {url}...")
-        response = requests.get(url, headers=self.headers)
+        response = cached_get(url, headers=self.headers)
+        if not response.changed:
+            print(f"{url} unchanged since the last run")
         return response.text
     
     def parse_html(self, html):
-        """Parse HTML with BeautifulSoup"""
-        soup = BeautifulSoup(html, 'html.parser')
-        # Remove scripts and styles for cleaner text
-        for script in soup(["script", "style"]):
-            script.extract()
-        return soup
+        """Parse HTML for searching, without scripts and styles for cleaner text"""
+        return make_soup(html, strip=("script", "style"), fast=True)
     
     def clean_text(self, text):
         """Clean up text content"""
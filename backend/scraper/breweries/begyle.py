@@ -1,5 +1,5 @@
 import requests
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 import json
 import os
 from datetime import datetime
@@ -8,7 +8,7 @@ def parse_begyle_beers(html_content):
     """
     Parse Begyle Brewing beers from the provided HTML content
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     
     beers = []
     
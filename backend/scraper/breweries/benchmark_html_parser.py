@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Parse and extract time per HTML parser backend over the stored brewery pages.
+
+Every page is parsed the way BreweryScraper.parse_html does (scripts and
+styles stripped), then run through the searches the scrapers make: links by
+href, paragraphs and divs, class-filtered containers, CSS selects and text
+extraction. Each backend must extract the same results as html.parser, or the
+page is reported as a mismatch.
+
+    python benchmark_html_parser.py
+    python benchmark_html_parser.py --rounds 20 --cassette cassettes/default
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from html_parser import LXML_AVAILABLE, SELECTOLAX_AVAILABLE, make_soup
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STORED_PAGES = [
+    'chicago_beer_data/*.html',
+    'debug/*.html',
+    '*paste.txt',
+]
+
+
+def load_pages(cassette=None):
+    pages = {}
+    for pattern in STORED_PAGES:
+        for path in sorted(glob.glob(os.path.join(HERE, pattern))):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages[os.path.relpath(path, HERE)] = f.read()
+    if cassette:
+        with open(os.path.join(cassette, 'index.json')) as f:
+            index = json.load(f)
+        for url, entry in sorted(index.items()):
+            if entry['content_type'].startswith('text/html'):
+                with open(os.path.join(cassette, entry['file']), 'r', encoding='utf-8', errors='replace') as f:
+                    pages[url] = f.read()
+    return pages
+
+
+def extract(soup):
+    """The scrapers' typical searches; returns plain data so backends can be compared."""
+    links = [a.get('href') for a in soup.find_all('a', href=lambda href: href and ('/beer' in href or '/apex' in href))]
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all(['p', 'div'], limit=200)]
+    items = [len(item.find_all(['li', 'div', 'a']))
+             for item in soup.find_all(['div', 'li'], class_=lambda c: c and ('item' in c.lower() or 'beer' in c.lower()))]
+    headings = [h.get_text(' ', strip=True) for h in soup.select('h1, h2, h3')]
+    images = [img.get('src') for img in soup.select('img[src]')]
+    return {'links': links, 'paragraphs': len(paragraphs), 'items': items, 'headings': headings, 'images': images}
+
+
+def run(backend, pages, rounds):
+    parse_seconds = extract_seconds = 0.0
+    results = {}
+    for _ in range(rounds):
+        for name, html in pages.items():
+            started = time.perf_counter()
+            soup = make_soup(html, strip=('script', 'style'), backend=backend)
+            parsed = time.perf_counter()
+            results[name] = extract(soup)
+            parse_seconds += parsed - started
+            extract_seconds += time.perf_counter() - parsed
+    return parse_seconds, extract_seconds, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on stored pages")
+    parser.add_argument("--rounds", type=int, default=5, help="Times to parse every page")
+    parser.add_argument("--cassette", help="Also use the HTML pages of a recorded cassette")
+    args = parser.parse_args()
+
+    pages = load_pages(args.cassette)
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {args.rounds} rounds")
+
+    backends = ['html.parser']
+    if LXML_AVAILABLE:
+        backends.append('lxml')
+    if SELECTOLAX_AVAILABLE:
+        backends.append('selectolax')
+
+    baseline = None
+    for backend in backends:
+        parse_seconds, extract_seconds, results = run(backend, pages, args.rounds)
+        total = parse_seconds + extract_seconds
+        if baseline is None:
+            baseline = (total, results)
+        mismatches = [name for name in pages if results[name] != baseline[1][name]]
+        per_page = 1000 / (len(pages) * args.rounds)
+        print(f"{backend:>12}: parse {parse_seconds * per_page:7.2f} ms/page, "
+              f"extract {extract_seconds * per_page:7.2f} ms/page, "
+              f"{baseline[0] / total:5.1f}x html.parser"
+              + (f", differs on {', '.join(mismatches)}" if mismatches else ""))
+
+
+if __name__ == '__main__':
+    main()
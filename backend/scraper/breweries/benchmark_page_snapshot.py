@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""WebDriver round-trips and time: per-element extraction versus one page snapshot.
+
+Each page is loaded once in a pooled browser, then the Goose Island and
+Revolution extractions run twice: the old way, with find_element(s),
+get_attribute and .text for every element, and from take_snapshot(). Both must
+find the same links and beers.
+
+    python benchmark_page_snapshot.py
+    python benchmark_page_snapshot.py --rounds 5 --url https://revbrew.com/visit/brewery/tap-room-dl
+    SCRAPER_MODE=replay python benchmark_page_snapshot.py
+
+--offline skips the browser and times only the local side, parsing and
+extracting the stored pages in chicago_beer_data/.
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+from page_snapshot import PageSnapshot, take_snapshot, text_of
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PAGES = [
+    "https://www.gooseisland.com/view-all",
+    "https://www.gooseisland.com/beers/312-wheat-ale",
+    "https://revbrew.com/visit/brewery/tap-room-dl",
+]
+
+STORED_PAGES = [
+    'chicago_beer_data/goose_island_*.html',
+    'chicago_beer_data/revolution_*.html',
+]
+
+BEER_LINK_PATHS = ("/beers/", "/our-beers/")
+CAPSULE_FIELDS = ["name", "style", "abv", "ibu", "price"]
+ABV_PATTERN = re.compile(r'(\d+\.?\d*)%')
+
+
+def per_element(driver):
+    """The extraction as the scrapers did it before, one WebDriver call at a time."""
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
+    links = set()
+    for link in driver.find_elements(By.TAG_NAME, "a"):
+        href = link.get_attribute("href")
+        if href and any(path in href for path in BEER_LINK_PATHS):
+            links.add(href)
+
+    capsules = []
+    for element in driver.find_elements(By.CSS_SELECTOR, ".untapped-beer-capsule"):
+        capsule = {}
+        for field in CAPSULE_FIELDS:
+            try:
+                capsule[field] = element.find_element(By.CLASS_NAME, f"untapped-beer-capsule__{field}").text.strip()
+            except NoSuchElementException:
+                capsule[field] = None
+        capsules.append(capsule)
+
+    abv_texts = [elem.text for elem in driver.find_elements(By.XPATH, "//*[contains(@class, 'abv')]")]
+    abv = next((m.group(1) for m in map(ABV_PATTERN.search, abv_texts) if m), None)
+    body_text = driver.find_element(By.TAG_NAME, "body").text
+    return {'links': links, 'capsules': capsules, 'abv': abv, 'text_length': len(body_text)}
+
+
+def from_snapshot(page):
+    """The same extraction against a PageSnapshot."""
+    links = {href for href in page.links if href and any(path in href for path in BEER_LINK_PATHS)}
+    capsules = [
+        {field: text_of(element, f".untapped-beer-capsule__{field}") for field in CAPSULE_FIELDS}
+        for element in page.soup.select(".untapped-beer-capsule")
+    ]
+    abv_texts = [elem.get_text(' ', strip=True) for elem in page.soup.select("[class*='abv']")]
+    abv = next((m.group(1) for m in map(ABV_PATTERN.search, abv_texts) if m), None)
+    return {'links': links, 'capsules': capsules, 'abv': abv, 'text_length': len(page.text)}
+
+
+def timed(driver, extract):
+    commands = driver.commands
+    started = time.perf_counter()
+    result = extract()
+    return result, driver.commands - commands, time.perf_counter() - started
+
+
+def run_browser(urls, rounds):
+    from webdriver_pool import acquire_driver, get_pool, release_driver
+
+    driver = acquire_driver()
+    try:
+        for url in urls:
+            driver.get(url)
+            time.sleep(3)
+            before = after = None
+            for _ in range(rounds):
+                before = timed(driver, lambda: per_element(driver))
+                after = timed(driver, lambda: from_snapshot(take_snapshot(driver)))
+            # Visible text differs slightly between innerText and WebElement.text
+            same = {k: v for k, v in before[0].items() if k != 'text_length'} == \
+                   {k: v for k, v in after[0].items() if k != 'text_length'}
+            print(url)
+            print(f"  per element: {before[1]:5d} round-trips, {before[2]:6.2f}s")
+            print(f"  snapshot:    {after[1]:5d} round-trips, {after[2]:6.2f}s "
+                  f"({before[2] / max(after[2], 1e-6):.0f}x faster)"
+                  + ("" if same else ", results differ"))
+            print(f"  {len(after[0]['links'])} beer links, {len(after[0]['capsules'])} capsules")
+    finally:
+        release_driver(driver)
+        get_pool().close()
+
+
+def run_offline(rounds):
+    for path in STORED_PAGES:
+        for filename in sorted(glob.glob(os.path.join(HERE, path))):
+            with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+                html = f.read()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                page = PageSnapshot("https://www.example.com/", "", html, "", [])
+                result = from_snapshot(page)
+            elapsed = (time.perf_counter() - started) / rounds
+            print(f"{os.path.relpath(filename, HERE)}: {len(html) / 1024:.0f} KB, "
+                  f"parse and extract {elapsed * 1000:.1f} ms, {len(result['capsules'])} capsules")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-element WebDriver extraction with page snapshots")
+    parser.add_argument("--rounds", type=int, default=3, help="Times to extract each page")
+    parser.add_argument("--url", action="append", help="Page to load (repeatable); defaults to the Goose and Revolution pages")
+    parser.add_argument("--offline", action="store_true", help="Only time local extraction on the stored pages")
+    args = parser.parse_args()
+
+    if args.offline:
+        run_offline(args.rounds)
+    else:
+        run_browser(args.url or PAGES, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""Compare Chrome startup time and memory: a browser per scraper vs the shared pool.
+
+Replays the page loads of a full run of the Selenium scrapers (each brewery's
+start page, one "scraper" per brewery) twice: once launching and quitting a
+fresh Chrome per scraper like the scrapers used to, once borrowing from a
+WebDriverPool. Memory is the peak RSS of all Chrome processes, sampled while
+the run is in progress.
+
+    python benchmark_webdriver_pool.py
+    python benchmark_webdriver_pool.py --rounds 3 --pool-size 2
+    python benchmark_webdriver_pool.py --url http://localhost:8000/a.html --url http://localhost:8000/b.html
+"""
+import argparse
+import os
+import threading
+import time
+
+from selenium import webdriver
+
+from webdriver_pool import WebDriverPool, chrome_options, process_tree_rss_mb
+
+# The pages each Selenium scraper opens first
+SCRAPER_PAGES = {
+    "Goose Island": ["https://www.gooseisland.com/view-all"],
+    "Half Acre": ["https://www.halfacrebeer.com/beer"],
+    "Maplewood": ["https://maplewoodbrew.com/beer/calendar", "https://maplewoodbrew.com/beer/archive"],
+    "Hopewell": ["https://www.hopewellbrewing.com"],
+    "Revolution": ["https://revbrew.com/visit/brewery/tap-room-dl"],
+}
+
+
+class RssSampler:
+    """Background thread recording the peak RSS of this process's children (Chrome and chromedriver)."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own_mb = process_tree_rss_mb(os.getpid()) or 0.0
+        while not self._stop.is_set():
+            total = process_tree_rss_mb(os.getpid())
+            if total is not None:
+                self.peak_mb = max(self.peak_mb, total - own_mb)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def load(driver, url):
+    try:
+        driver.get(url)
+    except Exception as e:
+        print(f"  {url}: {e}")
+
+
+def run_fresh(scraper_pages, workers):
+    """Every scraper launches and quits its own Chrome."""
+    startup = []
+    lock = threading.Lock()
+
+    def scrape(urls):
+        started = time.perf_counter()
+        driver = webdriver.Chrome(options=chrome_options())
+        with lock:
+            startup.append(time.perf_counter() - started)
+        try:
+            for url in urls:
+                load(driver, url)
+        finally:
+            driver.quit()
+
+    run_concurrently(scrape, scraper_pages, workers)
+    return {'launches': len(startup), 'startup_seconds': sum(startup)}
+
+
+def run_pooled(scraper_pages, workers):
+    pool = WebDriverPool(size=workers)
+
+    def scrape(urls):
+        driver = pool.acquire()
+        try:
+            for url in urls:
+                load(driver, url)
+        finally:
+            pool.release(driver)
+
+    try:
+        run_concurrently(scrape, scraper_pages, workers)
+        return pool.get_stats()
+    finally:
+        pool.close()
+
+
+def run_concurrently(scrape, scraper_pages, workers):
+    pending = list(scraper_pages)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                urls = pending.pop(0)
+            scrape(urls)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def measure(name, run, scraper_pages, workers):
+    started = time.perf_counter()
+    with RssSampler() as sampler:
+        stats = run(scraper_pages, workers)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>6}: {elapsed:6.1f}s wall, {stats['launches']:3d} launches, "
+          f"{stats['startup_seconds']:6.1f}s starting Chrome, peak {sampler.peak_mb:6.0f} MB")
+    return elapsed, stats['startup_seconds'], sampler.peak_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared WebDriver pool")
+    parser.add_argument("--rounds", type=int, default=1, help="Full scraper runs to replay per mode")
+    parser.add_argument("--pool-size", type=int, default=2, help="Browsers in the pool, and scrapers run at once")
+    parser.add_argument("--url", action="append", help="Load these pages instead, one scraper per URL")
+    args = parser.parse_args()
+
+    if args.url:
+        scraper_pages = [[url] for url in args.url]
+    else:
+        scraper_pages = list(SCRAPER_PAGES.values())
+    scraper_pages = scraper_pages * args.rounds
+    print(f"{len(scraper_pages)} scrapers, {sum(len(urls) for urls in scraper_pages)} page loads, "
+          f"{args.pool_size} at a time")
+
+    fresh = measure("fresh", run_fresh, scraper_pages, args.pool_size)
+    pooled = measure("pooled", run_pooled, scraper_pages, args.pool_size)
+    print(f"Saved {fresh[1] - pooled[1]:.1f}s of Chrome startup and {fresh[0] - pooled[0]:.1f}s wall-clock; "
+          f"peak memory {pooled[2] - fresh[2]:+.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""Record scraper traffic to a cassette and replay it from a local server.
+
+SCRAPER_MODE selects what fetches do:
+
+    live    (default) talk to the brewery sites
+    record  talk to the sites and store every response in the cassette
+    replay  never touch the network; everything is served from the cassette
+
+A cassette is a directory (SCRAPER_CASSETTE_DIR) holding one file per
+response body plus index.json, which maps each URL to its status, content type
+and body file. requests-based fetches are recorded as they come back. Selenium
+page loads are recorded from Chrome's performance log, which covers the
+document and everything it loaded (scripts, XHR, JSON), so JavaScript-heavy
+pages render the same on replay.
+
+In replay mode a ReplayServer on 127.0.0.1 serves the cassette. Scrapers and
+headless Chrome are pointed at it with local_url(), which maps
+https://host/path?query to http://127.0.0.1:PORT/https/host/path?query.
+For Chrome, absolute URLs inside text responses are rewritten the same way;
+HTTP clients send RAW_HEADER and get the bodies exactly as recorded, so the
+links scrapers parse out of them are the real ones. Chrome also
+gets a host resolver rule that fails every other host, so a replay can't
+quietly fall back to the network.
+
+    SCRAPER_MODE=record python scraper_runner.py
+    SCRAPER_MODE=replay SCRAPER_FETCH_INTERVAL=0 python scraper_runner.py
+    python cassettes.py serve --port 8799
+    python cassettes.py add https://www.hopbutcher.com debug/hop_butcher_page_source.html
+    python cassettes.py list
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+
+MODE = os.environ.get('SCRAPER_MODE', 'live')
+CASSETTE_DIR = os.environ.get(
+    'SCRAPER_CASSETTE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cassettes', 'default')
+)
+REPLAY_PORT = int(os.environ.get('SCRAPER_REPLAY_PORT', 0))
+
+INDEX = 'index.json'
+
+# Bodies of these types get their absolute URLs pointed at the replay server
+TEXT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/x-javascript', 'application/xml')
+
+URL_PATTERN = re.compile(r'https?://[^\s"\'<>()\\]+')
+
+# Request header asking for the recorded body without URL rewriting
+RAW_HEADER = 'X-Cassette-Raw'
+
+
+def normalize(url):
+    """Cassette key for a URL: no fragment, and a path of at least '/'."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+class Cassette:
+    def __init__(self, path=CASSETTE_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._server = None
+        try:
+            with open(os.path.join(path, INDEX), 'r') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+
+    def _save_index(self):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, INDEX + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.path, INDEX))
+
+    def record(self, url, status, content, content_type=None):
+        """Store one response. Later responses for the same URL replace earlier ones."""
+        if not url.startswith(('http://', 'https://')):
+            return
+        key = normalize(url)
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, name), 'wb') as f:
+            f.write(content)
+        with self._lock:
+            self.entries[key] = {
+                'status': status,
+                'content_type': content_type or 'text/html; charset=utf-8',
+                'file': name,
+                'bytes': len(content),
+            }
+            self._save_index()
+
+    def record_browser(self, driver):
+        """Store every response Chrome received since the last call, from its performance log."""
+        try:
+            log = driver.get_log('performance')
+        except Exception:
+            # Chrome wasn't started with performance logging
+            return
+        for entry in log:
+            message = json.loads(entry['message'])['message']
+            if message['method'] != 'Network.responseReceived':
+                continue
+            response = message['params']['response']
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': message['params']['requestId']})
+            except Exception:
+                # Redirects, aborted requests and evicted resources have no body to fetch
+                continue
+            if body['base64Encoded']:
+                content = base64.b64decode(body['body'])
+                content_type = response.get('mimeType')
+            else:
+                content = body['body'].encode('utf-8')
+                content_type = f"{response.get('mimeType') or 'text/html'}; charset=utf-8"
+            self.record(response['url'], response['status'], content, content_type)
+
+    def lookup(self, url):
+        """(status, content_type, body) for a recorded URL, or None."""
+        entry = self.entries.get(normalize(url))
+        if entry is None:
+            return None
+        with open(os.path.join(self.path, entry['file']), 'rb') as f:
+            return entry['status'], entry['content_type'], f.read()
+
+    def server(self):
+        """The replay server for this cassette, started on first use."""
+        with self._lock:
+            if self._server is None:
+                self._server = ReplayServer(self, port=REPLAY_PORT)
+                self._server.start()
+            return self._server
+
+    def local_url(self, url):
+        return self.server().local_url(url)
+
+    def replay_headers(self, headers=None):
+        """Request headers for fetching a recorded body verbatim."""
+        return dict(headers or {}, **{RAW_HEADER: '1'})
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server.replay
+        url = server.original_url(self.path, self.headers.get('Referer'))
+        found = server.cassette.lookup(url) if url else None
+        if found is None:
+            self.send_error(404, f"Not in cassette: {url or self.path}")
+            return
+        status, content_type, body = found
+        if content_type.startswith(TEXT_TYPES) and not self.headers.get(RAW_HEADER):
+            charset = 'utf-8'
+            if 'charset=' in content_type:
+                charset = content_type.split('charset=', 1)[1].split(';')[0].strip()
+            text = body.decode(charset, errors='replace')
+            body = URL_PATTERN.sub(lambda match: server.local_url(match.group(0)), text).encode(charset, errors='replace')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Serves a cassette on 127.0.0.1 in a background thread."""
+
+    def __init__(self, cassette, port=0):
+        self.cassette = cassette
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.replay = self
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def local_url(self, url):
+        if url.startswith(self.base_url):
+            return url
+        parts = urlsplit(url)
+        return urlunsplit(('http', f"127.0.0.1:{self.port}", f"/{parts.scheme}/{parts.netloc}{parts.path or '/'}",
+                           parts.query, parts.fragment))
+
+    def original_url(self, path, referer=None):
+        """The URL a local path stands for. Root-relative paths take the referring page's host."""
+        parts = urlsplit(path)
+        segments = parts.path.lstrip('/').split('/', 2)
+        if len(segments) >= 2 and segments[0] in ('http', 'https'):
+            rest = '/' + segments[2] if len(segments) == 3 else '/'
+            return urlunsplit((segments[0], segments[1], rest, parts.query, ''))
+        if referer and referer.startswith(self.base_url):
+            page = urlsplit(self.original_url(urlsplit(referer).path) or '')
+            if page.netloc:
+                return urlunsplit((page.scheme, page.netloc, parts.path, parts.query, ''))
+        return None
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """The active cassette, or None in live mode."""
+    global _cassette
+    if MODE not in ('record', 'replay'):
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+        return _cassette
+
+
+def recording():
+    return MODE == 'record'
+
+
+def replaying():
+    return MODE == 'replay'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, extend and serve scraper cassettes")
+    parser.add_argument("--cassette", default=CASSETTE_DIR, help="Cassette directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Serve the cassette until interrupted")
+    serve.add_argument("--port", type=int, default=REPLAY_PORT or 8799)
+    add = commands.add_parser("add", help="Add a saved page to the cassette")
+    add.add_argument("url")
+    add.add_argument("file")
+    add.add_argument("--content-type", default="text/html; charset=utf-8")
+    commands.add_parser("list", help="List the recorded URLs")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    if args.command == "add":
+        with open(args.file, 'rb') as f:
+            cassette.record(args.url, 200, f.read(), args.content_type)
+        print(f"Added {args.url} ({os.path.getsize(args.file)} bytes)")
+    elif args.command == "list":
+        for url, entry in sorted(cassette.entries.items()):
+            print(f"{entry['status']} {entry['bytes']:>9} {url}")
+    else:
+        server = ReplayServer(cassette, port=args.port)
+        print(f"Replaying {len(cassette.entries)} responses from {args.cassette} at {server.base_url}")
+        print(f"e.g. {server.local_url(next(iter(cassette.entries), 'https://example.com/'))}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
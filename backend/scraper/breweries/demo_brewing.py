@@ -1,5 +1,5 @@
 import requests
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 import json
 import os
 import re
@@ -21,7 +21,7 @@ Garnish with an orange and 🌾 🫵 💛 👉</p><div class="MuiBox-root css-1y
 
     def scrape(self):
         # Parse the HTML
-        soup = BeautifulSoup(self.html_content, 'html.parser')
+        soup = make_soup(self.html_content)
         
         # Find beer elements
         beer_elements = soup.find_all('div', class_='MuiGrid-root MuiGrid-item MuiGrid-grid-mobile-12 MuiGrid-grid-tablet-6 css-rvmsug')
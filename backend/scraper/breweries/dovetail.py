@@ -1,5 +1,5 @@
-import requests
-from bs4 import BeautifulSoup
+from http_cache import cached_get
+from html_parser import make_soup
 import json
 import os
 import re
@@ -14,7 +14,7 @@ class DovetailScraper:
     def scrape(self):
         # Make the request to the brewery website
         print(f"Scraping {self.brewery_name}...")
-        response = requests.get(self.url)
+        response = cached_get(self.url)
         
         # Check if the request was successful
         if response.status_code != 200:
@@ -22,7 +22,7 @@ class DovetailScraper:
             return None
             
         # Parse the HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         # Find all beer entries
         beers = []
@@ -2,7 +2,7 @@ import os
 import json
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 
 def scrape_forbidden_root_from_html(html_file=None, html_content=None):
     """
@@ -31,7 +31,7 @@ def scrape_forbidden_root_from_html(html_file=None, html_content=None):
             return beers
         
         # Parse HTML with BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         # Find all beer container items
         beer_items = soup.select('div.jet-listing-grid__item')
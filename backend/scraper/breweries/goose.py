@@ -1,20 +1,31 @@
 import requests
-from bs4 import BeautifulSoup
 import json
 import os
 import time
 from datetime import datetime
 import re
-import shutil
-import tempfile
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
+
+from page_snapshot import is_visible, page_links, take_snapshot
+from page_waits import wait_until_quiet, wait_until_stable
+from politeness import HostLimiter, host_of
+from session_store import pass_gate, restore_browser
+from webdriver_pool import acquire_driver, release_driver
+
+AGE_FORM = "#ageForm"
+
+# Stored age-verification cookies are kept under this domain
+SESSION_DOMAIN = "gooseisland.com"
+
+# Seconds between beer page loads
+BEER_PAGE_INTERVAL = 1.0
+
+BEER_LINK_PATHS = ("/beers/", "/our-beers/")
 
 class GooseIslandScraper:
     def __init__(self, output_dir="scraped_data"):
@@ -30,29 +41,21 @@ class GooseIslandScraper:
             os.makedirs(output_dir)
     
     def scrape(self):
-        # Create a temporary directory for Chrome user data
-        temp_dir = tempfile.mkdtemp()
-        
-        # Set up Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument(f"--user-data-dir={temp_dir}")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
+        driver = None
         try:
-            print(f"Starting Chrome with temporary user data directory: {temp_dir}")
-            driver = webdriver.Chrome(options=chrome_options)
+            # Borrow a browser from the shared pool; leases don't share cookies or storage
+            driver = acquire_driver()
+            
+            # Cookies from the last run's age verification, if there are any
+            restored = restore_browser(driver, SESSION_DOMAIN)
             
             # Go to the website
             print(f"Navigating to {self.beer_page_url}")
             driver.get(self.beer_page_url)
+            wait_until_quiet(driver, "goose.age_gate_check", 5)
             
-            # Try multiple methods to bypass age verification
-            self._handle_age_verification(driver)
+            # Bypass age verification, unless the stored cookies already did
+            self._pass_age_gate(driver, restored)
             
             # Try to get all beer links from multiple sources
             all_beer_links = self._collect_beer_links(driver)
@@ -60,15 +63,19 @@ class GooseIslandScraper:
             
             # Visit each beer page and extract information
             beers = []
+            beer_pages = HostLimiter(concurrency=1, interval=BEER_PAGE_INTERVAL)
             for url in all_beer_links:
                 try:
                     print(f"Visiting beer page: {url}")
+                    commands_before = driver.commands
                     
                     # Use retry logic for loading the page
                     max_retries = 3
                     for retry in range(max_retries):
                         try:
-                            driver.get(url)
+                            # Be nice to the server
+                            with beer_pages.limit(host_of(url)):
+                                driver.get(url)
                             break
                         except Exception as e:
                             if retry < max_retries - 1:
@@ -78,23 +85,24 @@ class GooseIslandScraper:
                                 print(f"Failed to load page after {max_retries} attempts: {str(e)}")
                                 raise
                     
-                    # Check if we need to do age verification again
-                    try:
-                        if self._is_age_verification_present(driver):
-                            self._handle_age_verification(driver)
-                    except:
-                        pass
-                    
                     # Wait for page to load
-                    time.sleep(3)
-                    
+                    wait_until_quiet(driver, "goose.beer_page", 3)
+
+                    # Read the whole page in one round-trip; everything below works on the snapshot
+                    page = take_snapshot(driver, visible=[AGE_FORM])
+
+                    # Check if we need to do age verification again
+                    if page.is_visible(AGE_FORM):
+                        self._pass_age_gate(driver)
+                        page = take_snapshot(driver)
+
                     # Check if we got a 404 page
-                    if "404" in driver.title or "not found" in driver.title.lower():
+                    if "404" in page.title or "not found" in page.title.lower():
                         print(f"Skipping 404 page: {url}")
                         continue
-                    
+
                     # Try a first method to extract beer details
-                    beer_info = self._extract_beer_info(driver)
+                    beer_info = self._extract_beer_info(page)
                     
                     # If we got basic info but missing ABV or type, try additional methods
                     if beer_info and beer_info.get('name'):
@@ -104,18 +112,16 @@ class GooseIslandScraper:
                             continue
                             
                         if not beer_info.get('abv') or not beer_info.get('type'):
-                            self._enhance_beer_info(driver, beer_info)
-                        
+                            self._enhance_beer_info(page, beer_info)
+
                         beers.append(beer_info)
                         print(f"Added beer: {beer_info.get('name')}")
                         print(f"  ABV: {beer_info.get('abv') or 'Not found'}")
                         print(f"  Type: {beer_info.get('type') or 'Not found'}")
+                        print(f"  WebDriver round-trips: {driver.commands - commands_before}")
                     else:
                         print(f"Could not extract beer info from {url}")
                     
-                    # Be nice to the server
-                    time.sleep(1)
-                    
                 except Exception as e:
                     print(f"Error processing beer page {url}: {str(e)}")
             
@@ -133,16 +139,9 @@ class GooseIslandScraper:
             print(f"Error scraping {self.brewery_name}: {str(e)}")
             return []
         finally:
-            # Clean up
-            if 'driver' in locals():
-                driver.quit()
-            
-            # Remove temporary directory
-            try:
-                shutil.rmtree(temp_dir)
-                print(f"Removed temporary directory: {temp_dir}")
-            except Exception as e:
-                print(f"Error removing temporary directory: {str(e)}")
+            # Return the browser to the pool
+            if driver:
+                release_driver(driver)
 
     def _collect_beer_links(self, driver):
         """Collect beer links from multiple sources with progressive scrolling"""
@@ -152,7 +151,7 @@ class GooseIslandScraper:
         # Method 1: Direct beer links from the main page with scrolling
         try:
             # Wait for the page to load initially
-            time.sleep(5)
+            wait_until_quiet(driver, "goose.view_all", 5)
             
             # Implement progressive scrolling to load all content
             print("Starting progressive scroll to load all content...")
@@ -171,26 +170,13 @@ class GooseIslandScraper:
                 # Scroll down to bottom
                 driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
                 
-                # Wait to load page
-                time.sleep(3)
-                
-                # Calculate new scroll height and compare with last scroll height
-                new_height = driver.execute_script("return document.body.scrollHeight")
+                # Wait for the new content to load, up to 3 seconds
+                _, new_height = wait_until_stable(driver, "goose.view_all_scroll", 3, "a[href]")
                 
-                # Gather links after each scroll
-                all_links = driver.find_elements(By.TAG_NAME, "a")
-                beer_links_found = 0
-                
-                for link in all_links:
-                    try:
-                        href = link.get_attribute("href")
-                        if href and ("/beers/" in href or "/our-beers/" in href):
-                            all_beer_links.add(href)
-                            beer_links_found += 1
-                    except StaleElementReferenceException:
-                        continue
-                    except Exception as e:
-                        print(f"Error extracting href: {str(e)}")
+                # Gather links after each scroll, all of them in one round-trip
+                beer_links = self._beer_links(page_links(driver))
+                beer_links_found = len(beer_links)
+                all_beer_links.update(beer_links)
                 
                 print(f"Found {beer_links_found} beer links, {len(all_beer_links)} unique links total after scroll")
                 
@@ -238,19 +224,11 @@ class GooseIslandScraper:
                             try:
                                 print(f"Clicking 'load more' element: {element.text if element.text else 'no text'}")
                                 driver.execute_script("arguments[0].click();", element)
-                                time.sleep(3)  # Wait for content to load
+                                wait_until_stable(driver, "goose.load_more", 3, "a[href]")  # Wait for content to load
                                 
                                 # Check for new links
-                                new_links = driver.find_elements(By.TAG_NAME, "a")
                                 before_count = len(all_beer_links)
-                                
-                                for link in new_links:
-                                    try:
-                                        href = link.get_attribute("href")
-                                        if href and ("/beers/" in href or "/our-beers/" in href):
-                                            all_beer_links.add(href)
-                                    except:
-                                        continue
+                                all_beer_links.update(self._beer_links(page_links(driver)))
                                 
                                 print(f"Found {len(all_beer_links) - before_count} more beer links after clicking load more")
                             except:
@@ -261,19 +239,24 @@ class GooseIslandScraper:
         except Exception as e:
             print(f"Error during scrolling and link collection: {str(e)}")
         
+        # Methods 2-4 search one snapshot of the page instead of querying the browser per element
+        page = None
+        try:
+            page = take_snapshot(driver)
+        except Exception as e:
+            print(f"Error taking page snapshot: {str(e)}")
+        
         # Method 2: Using BeautifulSoup
         try:
             # Save page source for analysis
-            page_source = driver.page_source
             with open("goose_island_page.html", "w", encoding="utf-8") as f:
-                f.write(page_source)
+                f.write(page.html)
                 print("Saved HTML to goose_island_page.html for analysis")
             
             # Use BeautifulSoup to find beer links
-            soup = BeautifulSoup(page_source, 'html.parser')
-            for a in soup.find_all('a', href=True):
+            for a in page.soup.find_all('a', href=True):
                 href = a['href']
-                if '/beers/' in href or '/our-beers/' in href:
+                if any(path in href for path in BEER_LINK_PATHS):
                     full_url = self.brewery_url + href if href.startswith('/') else href
                     print(f"Found beer link via BeautifulSoup: {full_url}")
                     all_beer_links.add(full_url)
@@ -288,17 +271,9 @@ class GooseIslandScraper:
                 "[class*='beer-list']", "[class*='product-list']"
             ]
             for selector in grid_selectors:
-                grids = driver.find_elements(By.CSS_SELECTOR, selector)
-                for grid in grids:
-                    links = grid.find_elements(By.TAG_NAME, "a")
-                    for link in links:
-                        try:
-                            href = link.get_attribute("href")
-                            if href and ("/beers/" in href or "/our-beers/" in href):
-                                print(f"Found beer link from grid: {href}")
-                                all_beer_links.add(href)
-                        except:
-                            continue
+                for href in self._beer_links(page.links_within(selector)):
+                    print(f"Found beer link from grid: {href}")
+                    all_beer_links.add(href)
         except Exception as e:
             print(f"Error finding beer links in grid: {str(e)}")
         
@@ -311,30 +286,13 @@ class GooseIslandScraper:
             ]
             
             for selector in card_selectors:
-                cards = driver.find_elements(By.CSS_SELECTOR, selector)
+                cards = page.soup.select(selector)
                 print(f"Found {len(cards)} potential beer cards with selector: {selector}")
                 
-                for card in cards:
-                    try:
-                        # First try to find links inside the card
-                        card_links = card.find_elements(By.TAG_NAME, "a")
-                        for link in card_links:
-                            try:
-                                href = link.get_attribute("href")
-                                if href and ("/beers/" in href or "/our-beers/" in href):
-                                    print(f"Found beer link from card: {href}")
-                                    all_beer_links.add(href)
-                            except:
-                                continue
-                        
-                        # If no links found, check if the card itself is clickable
-                        if not card_links:
-                            href = card.get_attribute("href")
-                            if href and ("/beers/" in href or "/our-beers/" in href):
-                                print(f"Found beer link from clickable card: {href}")
-                                all_beer_links.add(href)
-                    except:
-                        continue
+                # Links inside the cards, or the cards themselves when they're links
+                for href in self._beer_links(page.links_within(selector)):
+                    print(f"Found beer link from card: {href}")
+                    all_beer_links.add(href)
         except Exception as e:
             print(f"Error finding beer links in cards: {str(e)}")
         
@@ -346,25 +304,18 @@ class GooseIslandScraper:
                 driver.get(our_beers_url)
                 
                 # Handle age verification if needed
-                if self._is_age_verification_present(driver):
-                    self._handle_age_verification(driver)
+                self._pass_age_gate(driver)
                 
                 # Wait for page to load
-                time.sleep(5)
+                wait_until_quiet(driver, "goose.category_page", 5)
                 
                 # Scroll this page too
                 self._scroll_page(driver)
                 
                 # Find links
-                beer_links = driver.find_elements(By.TAG_NAME, "a")
-                for link in beer_links:
-                    try:
-                        href = link.get_attribute("href")
-                        if href and ("/beers/" in href or "/our-beers/" in href):
-                            print(f"Found beer link from 'Our Beers' page: {href}")
-                            all_beer_links.add(href)
-                    except:
-                        continue
+                for href in self._beer_links(page_links(driver)):
+                    print(f"Found beer link from 'Our Beers' page: {href}")
+                    all_beer_links.add(href)
         except Exception as e:
             print(f"Error visiting 'Our Beers' page: {str(e)}")
         
@@ -381,25 +332,18 @@ class GooseIslandScraper:
                 driver.get(category_url)
                 
                 # Handle age verification if needed
-                if self._is_age_verification_present(driver):
-                    self._handle_age_verification(driver)
+                self._pass_age_gate(driver)
                 
                 # Wait for page to load
-                time.sleep(5)
+                wait_until_quiet(driver, "goose.category_page", 5)
                 
                 # Scroll this page too
                 self._scroll_page(driver)
                 
                 # Find links
-                all_links = driver.find_elements(By.TAG_NAME, "a")
-                for link in all_links:
-                    try:
-                        href = link.get_attribute("href")
-                        if href and ("/beers/" in href or "/our-beers/" in href):
-                            print(f"Found beer link from category page: {href}")
-                            all_beer_links.add(href)
-                    except:
-                        continue
+                for href in self._beer_links(page_links(driver)):
+                    print(f"Found beer link from category page: {href}")
+                    all_beer_links.add(href)
             except Exception as e:
                 print(f"Error visiting category page {category_url}: {str(e)}")
         
@@ -426,6 +370,10 @@ class GooseIslandScraper:
         
         return list(all_beer_links)
     
+    def _beer_links(self, hrefs):
+        """The hrefs that point at beer pages"""
+        return [href for href in hrefs if href and any(path in href for path in BEER_LINK_PATHS)]
+    
     def _scroll_page(self, driver):
         """Helper method to scroll a page to load all content"""
         print("Scrolling page to load all content...")
@@ -441,11 +389,8 @@ class GooseIslandScraper:
             # Scroll down to bottom
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             
-            # Wait to load page
-            time.sleep(3)
-            
-            # Calculate new scroll height and compare with last scroll height
-            new_height = driver.execute_script("return document.body.scrollHeight")
+            # Wait for the new content to load, up to 3 seconds
+            _, new_height = wait_until_stable(driver, "goose.category_scroll", 3, "a[href]")
             
             # If no change in height, break the loop
             if new_height == last_height:
@@ -460,10 +405,15 @@ class GooseIslandScraper:
     def _is_age_verification_present(self, driver):
         """Check if the age verification form is present"""
         try:
-            return driver.find_element(By.ID, "ageForm").is_displayed()
+            return is_visible(driver, AGE_FORM)
         except:
             return False
     
+    def _pass_age_gate(self, driver, restored=False):
+        """Get past the age form, with the stored session if it works and the bypass methods if not"""
+        return pass_gate(driver, SESSION_DOMAIN, restored, self._is_age_verification_present,
+                         self._handle_age_verification)
+    
     def _handle_age_verification(self, driver):
         """Try multiple methods to bypass age verification"""
         try:
@@ -516,7 +466,7 @@ class GooseIslandScraper:
                     pass
                 
                 # Wait for page to load after verification
-                time.sleep(5)
+                wait_until_quiet(driver, "goose.age_gate", 5)
                 
             except Exception as e:
                 print(f"Error with standard age verification: {str(e)}")
@@ -532,7 +482,7 @@ class GooseIslandScraper:
                 
                 # Refresh the page
                 driver.refresh()
-                time.sleep(3)
+                wait_until_quiet(driver, "goose.age_gate_refresh", 3)
                 
             except Exception as e:
                 print(f"Error with localStorage bypass: {str(e)}")
@@ -542,14 +492,13 @@ class GooseIslandScraper:
         except Exception as e:
             print(f"Error handling age verification: {str(e)}")
     
-    def _extract_beer_info(self, driver):
-        """Extract beer details from the beer page"""
+    def _extract_beer_info(self, page):
+        """Extract beer details from a snapshot of the beer page"""
         try:
-            # Get page source for parsing
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            soup = page.soup
             
             # Skip if this is a 404 page
-            if "404" in soup.title.string if soup.title else "" or "not found" in soup.title.string.lower() if soup.title else "":
+            if "404" in page.title or "not found" in page.title.lower():
                 print("Detected 404 page, skipping")
                 return {}
             
@@ -671,24 +620,23 @@ class GooseIslandScraper:
                 "description": description,
                 "brewery": self.brewery_name,
                 "location": self.brewery_location,
-                "url": driver.current_url
+                "url": page.url
             }
             
         except Exception as e:
             print(f"Error extracting beer info: {str(e)}")
             return {}
     
-    def _enhance_beer_info(self, driver, beer_info):
-        """Try alternative methods to extract missing information"""
+    def _enhance_beer_info(self, page, beer_info):
+        """Try alternative methods to extract missing information from a snapshot of the beer page"""
         try:
             # Get the beer name
             beer_name = beer_info.get("name", "")
             
             # Try to get JSON-LD structured data
             try:
-                json_ld_script = driver.execute_script(
-                    "return document.querySelector('script[type=\"application/ld+json\"]')?.textContent"
-                )
+                json_ld = page.soup.select_one('script[type="application/ld+json"]')
+                json_ld_script = json_ld.string if json_ld else None
                 
                 if json_ld_script:
                     try:
@@ -725,7 +673,7 @@ class GooseIslandScraper:
             if not beer_info.get("abv"):
                 print(f"Trying to find ABV for {beer_name} using alternative methods...")
                 
-                # Method 1: Look for ABV in any element's text
+                # Method 1: Look for ABV in the page's visible text
                 abv_patterns = [
                     r'(\d+\.?\d*)%\s*(ABV|abv|Abv|alcohol)',
                     r'ABV\s*:?\s*(\d+\.?\d*)%',
@@ -733,24 +681,13 @@ class GooseIslandScraper:
                     r'(\d+\.?\d*)%'
                 ]
                 
-                all_elements = driver.find_elements(By.XPATH, "//*")
-                for elem in all_elements:
-                    try:
-                        text = elem.text
-                        if not text:
-                            continue
-                            
-                        for pattern in abv_patterns:
-                            abv_match = re.search(pattern, text, re.IGNORECASE)
-                            if abv_match:
-                                beer_info["abv"] = abv_match.group(1)
-                                print(f"Found ABV via text search: {beer_info['abv']}%")
-                                break
-                        
-                        if beer_info.get("abv"):
-                            break
-                    except:
-                        continue
+                # The first element searched used to be <html>, whose text is the whole page
+                for pattern in abv_patterns:
+                    abv_match = re.search(pattern, page.text, re.IGNORECASE)
+                    if abv_match:
+                        beer_info["abv"] = abv_match.group(1)
+                        print(f"Found ABV via text search: {beer_info['abv']}%")
+                        break
                 
                 # Method 2: Try to find ABV in description (some beers list it there)
                 if not beer_info.get("abv") and beer_info.get("description"):
@@ -764,10 +701,10 @@ class GooseIslandScraper:
                 # Method 3: Look for elements with specific classes that might contain ABV
                 abv_class_patterns = ['abv', 'alcohol', 'strength', 'stats']
                 for pattern in abv_class_patterns:
-                    elements = driver.find_elements(By.XPATH, f"//*[contains(@class, '{pattern}')]")
+                    elements = page.soup.select(f"[class*='{pattern}']")
                     for elem in elements:
                         try:
-                            text = elem.text
+                            text = elem.get_text(' ', strip=True)
                             if not text:
                                 continue
                                 
@@ -830,8 +767,7 @@ class GooseIslandScraper:
                     style_keywords = ["ale", "lager", "stout", "porter", "ipa", "pilsner", "saison"]
                     style_pattern = re.compile(r'\b(pale ale|ipa|lager|pilsner|stout|porter|wheat ale|belgian|saison)\b', re.IGNORECASE)
                     
-                    page_text = driver.find_element(By.TAG_NAME, "body").text
-                    match = style_pattern.search(page_text)
+                    match = style_pattern.search(page.text)
                     if match:
                         beer_info["type"] = match.group(1).title()
                         print(f"Found beer type through page scan: {beer_info['type']}")
@@ -2,15 +2,15 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import json
-import time
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from page_waits import wait_until_quiet, wait_until_stable
+from webdriver_pool import acquire_driver, release_driver
+
 class HalfAcreScraper:
     def __init__(self):
         self.brewery_name = "Half Acre Beer Co."
@@ -45,21 +45,12 @@ class HalfAcreScraper:
         """Use Selenium to extract beers from Half Acre's website while handling age verification"""
         print("Setting up Selenium for Half Acre Brewing...")
         
-        # Set up Selenium options
-        options = Options()
-        options.add_argument("--headless")  # Run in headless mode (no browser UI)
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
         driver = None
         beers = []
         
         try:
-            # Initialize the driver
-            driver = webdriver.Chrome(options=options)
+            # Borrow a browser from the shared pool
+            driver = acquire_driver()
             
             # Navigate to the beer page
             beer_url = "https://www.halfacrebeer.com/beer"
@@ -67,7 +58,7 @@ class HalfAcreScraper:
             driver.get(beer_url)
             
             # Wait for page to initially load
-            time.sleep(3)
+            wait_until_quiet(driver, "half_acre.beer_page", 3)
             
             print(f"Page title: {driver.title}")
             
@@ -94,7 +85,7 @@ class HalfAcreScraper:
                         print(f"Found age verification button with selector: {selector}")
                         verify_button.click()
                         print("Clicked age verification button")
-                        time.sleep(2)  # Wait for page to update after click
+                        wait_until_quiet(driver, "half_acre.age_gate", 2)  # Wait for page to update after click
                         break
                     except:
                         continue
@@ -108,18 +99,12 @@ class HalfAcreScraper:
                             print(f"Found age verification button with text: {button.text}")
                             button.click()
                             print("Clicked age verification button")
-                            time.sleep(2)
+                            wait_until_quiet(driver, "half_acre.age_gate", 2)
                             break
             
             except Exception as e:
                 print(f"No age verification found or error handling it: {str(e)}")
             
-            # Wait for the content to load
-            time.sleep(3)
-            
-            # Extract the beer information
-            print("Looking for beer elements...")
-            
             # Try different selectors that might contain beer information
             beer_selectors = [
                 ".beer-card", 
@@ -129,6 +114,12 @@ class HalfAcreScraper:
                 ".beer-item"
             ]
             
+            # Wait for the content to load: until the beer elements stop appearing
+            wait_until_stable(driver, "half_acre.beer_list", 3, ", ".join(beer_selectors))
+            
+            # Extract the beer information
+            print("Looking for beer elements...")
+            
             beer_elements = []
             for selector in beer_selectors:
                 elements = driver.find_elements(By.CSS_SELECTOR, selector)
@@ -219,9 +210,9 @@ class HalfAcreScraper:
         except Exception as e:
             print(f"Error with Selenium: {str(e)}")
         finally:
-            # Clean up
+            # Return the browser to the pool
             if driver:
-                driver.quit()
+                release_driver(driver)
         
         return beers
 
@@ -1,14 +1,15 @@
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 from datetime import datetime
 import logging
 import traceback
 import re
-import time
 from urllib.parse import urljoin
 
+from async_fetcher import fetch_pages
+from http_cache import cached_get, get_cache, memoize
+
 class HopButcherScraper:
     def __init__(self):
         # Configure logging
@@ -60,20 +61,24 @@ class HopButcherScraper:
             
             self.logger.info(f"Found {len(beer_links)} beer links")
             
-            # Scrape details for each beer
-            all_beers = []
-            for name, link in beer_links:
+            # Fetch every beer page at once and parse each as it arrives
+            def parse(index, url, html):
+                name = beer_links[index][0]
                 try:
-                    beer_details = self.scrape_beer_page(name, link)
-                    if beer_details:
-                        all_beers.append(beer_details)
-                    
-                    # Be nice to the server
-                    time.sleep(1)
+                    # Unchanged pages reuse last run's parse
+                    return memoize(url, f"hop_butcher:{name}", html,
+                                   lambda html: self.parse_beer_page(name, url, html))
                 except Exception as e:
                     self.logger.error(f"Error scraping beer {name}: {e}")
+                    return None
+            
+            pages = fetch_pages([link for _, link in beer_links], parse, headers=self.headers)
+            all_beers = [beer_details for beer_details in pages if beer_details]
             
             self.logger.info(f"Successfully scraped {len(all_beers)} beers")
+            cache = get_cache()
+            if cache:
+                self.logger.info(cache.report('hopbutcher.com'))
             return all_beers
             
         except Exception as e:
@@ -92,14 +97,14 @@ class HopButcherScraper:
         
         try:
             # Fetch the main page
-            response = requests.get(self.base_url, headers=self.headers)
+            response = cached_get(self.base_url, headers=self.headers)
             self.logger.info(f"Response status code: {response.status_code}")
             
             # Save raw HTML for debugging
             self.save_debug_html(response.text)
             
             # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
             
             # Find all beer links
             beer_links = []
@@ -163,14 +168,34 @@ class HopButcherScraper:
         
         try:
             # Fetch the beer page
-            response = requests.get(url, headers=self.headers)
+            response = cached_get(url, headers=self.headers)
             
             if response.status_code != 200:
                 self.logger.error(f"Error fetching {url}: status code {response.status_code}")
                 return None
             
+            return self.parse_beer_page(beer_name, url, response.text)
+        
+        except Exception as e:
+            self.logger.error(f"Error scraping beer page {url}: {e}")
+            self.logger.error(traceback.format_exc())
+            return None
+
+    def parse_beer_page(self, beer_name, url, html):
+        """
+        Extract details from an individual beer page's HTML
+        
+        Args:
+            beer_name (str): The beer name
+            url (str): URL of the beer page
+            html (str): HTML content of the page
+            
+        Returns:
+            dict: Dictionary with beer details
+        """
+        try:
             # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(html)
             
             # Initialize beer details
             beer = {
@@ -218,7 +243,7 @@ class HopButcherScraper:
             return beer
         
         except Exception as e:
-            self.logger.error(f"Error scraping beer page {url}: {e}")
+            self.logger.error(f"Error parsing beer page {url}: {e}")
             self.logger.error(traceback.format_exc())
             return None
 
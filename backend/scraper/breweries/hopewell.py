@@ -8,22 +8,29 @@ import json
 import os
 import re
 import logging
-import time
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 
 try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from page_snapshot import is_visible
+    from page_waits import wait_until_quiet
+    from webdriver_pool import acquire_driver, release_driver
     SELENIUM_AVAILABLE = True
 except ImportError:
     SELENIUM_AVAILABLE = False
     print("Warning: Selenium not available. Web scraping mode will not work.")
 
+from session_store import pass_gate, restore_browser
+
+POPUP_CLOSE = "button.mc-closeModal[data-action='close-mc-modal']"
+
+# Stored popup-dismissal cookies are kept under this domain
+SESSION_DOMAIN = "hopewellbrewing.com"
+
 class HopewellScraper:
     """
     Scraper for Hopewell Brewing's website.
@@ -64,19 +71,12 @@ class HopewellScraper:
         return logger
     
     def _setup_webdriver(self):
-        """Set up Chrome webdriver with headless option"""
+        """Borrow a headless Chrome from the shared WebDriver pool"""
         if not SELENIUM_AVAILABLE:
             self.logger.error("Selenium not available. Cannot set up webdriver.")
             return None
             
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        # Initialize browser
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
+        return acquire_driver()
     
     def _handle_popup(self, driver):
         """Close the newsletter popup if it appears"""
@@ -86,11 +86,11 @@ class HopewellScraper:
         try:
             # Wait for popup to appear (up to 5 seconds)
             WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "button.mc-closeModal[data-action='close-mc-modal']"))
+                EC.presence_of_element_located((By.CSS_SELECTOR, POPUP_CLOSE))
             )
             
             # Close the popup
-            close_button = driver.find_element(By.CSS_SELECTOR, "button.mc-closeModal[data-action='close-mc-modal']")
+            close_button = driver.find_element(By.CSS_SELECTOR, POPUP_CLOSE)
             driver.execute_script("arguments[0].click();", close_button)  # Use JavaScript click for more reliability
             self.logger.info("Newsletter popup closed")
         except TimeoutException:
@@ -109,6 +109,14 @@ class HopewellScraper:
             except Exception:
                 self.logger.warning("Failed to close popup with alternative method")
     
+    def _popup_present(self, driver):
+        """Whether the newsletter popup is showing once the page has settled"""
+        wait_until_quiet(driver, "hopewell.popup_check", 5)
+        try:
+            return is_visible(driver, POPUP_CLOSE)
+        except Exception:
+            return False
+    
     def scrape(self):
         """Main method to scrape the Hopewell website"""
         self.logger.info(f"Starting scrape of {self.brewery_name}")
@@ -122,12 +130,15 @@ class HopewellScraper:
             return self.beers
         
         try:
+            # Cookies from dismissing the popup last time, if there are any
+            restored = restore_browser(driver, SESSION_DOMAIN)
+            
             # Visit the main page
             self.logger.info(f"Navigating to {self.brewery_url}")
             driver.get(self.brewery_url)
             
-            # Handle popup if it appears
-            self._handle_popup(driver)
+            # Handle popup if it appears and the stored cookies didn't keep it away
+            pass_gate(driver, SESSION_DOMAIN, restored, self._popup_present, self._handle_popup)
             
             # Add debug info
             self.logger.info("Waiting for beer content to load...")
@@ -152,7 +163,7 @@ class HopewellScraper:
                     self.logger.warning(f"Error finding beer links: {str(e)}")
             
             # Give the page time to load
-            time.sleep(2)
+            wait_until_quiet(driver, "hopewell.beer_page", 2)
             
             # Wait for beer elements with a more flexible approach
             try:
@@ -174,7 +185,7 @@ class HopewellScraper:
             self.logger.info(f"Page source length: {len(page_source)} characters")
             
             # Parse the page with BeautifulSoup
-            soup = BeautifulSoup(page_source, 'html.parser')
+            soup = make_soup(page_source)
             
             # Try multiple selectors to find beer elements
             beer_elements = []
@@ -230,7 +241,7 @@ class HopewellScraper:
         except Exception as e:
             self.logger.error(f"Error scraping {self.brewery_name}: {e}")
         finally:
-            driver.quit()
+            release_driver(driver)
             
         self.logger.info(f"Completed scrape of {self.brewery_name}. Found {len(self.beers)} beers.")
         return self.beers
@@ -251,7 +262,7 @@ class HopewellScraper:
         
         try:
             # Parse the HTML with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # Find beer elements
             beer_elements = soup.select(".beer-thumbnail")
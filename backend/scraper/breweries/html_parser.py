@@ -0,0 +1,206 @@
+"""HTML parsing for the scrapers, on the fastest backend available.
+
+make_soup() replaces BeautifulSoup(html, 'html.parser'). By default it builds
+a BeautifulSoup tree with lxml, several times faster than the pure-Python
+html.parser, and falls back to html.parser when lxml isn't installed.
+
+Call sites that only search the tree (select, select_one, find_all, find,
+get, get_text) can pass fast=True. With SCRAPER_HTML_PARSER=selectolax they
+then get a selectolax (lexbor) document behind SelectolaxNode, a shim that
+answers those calls the way BeautifulSoup does. The tree-walking API
+(find_parent, next_sibling, ...) is BeautifulSoup-only.
+
+strip= drops elements such as script and style before parsing instead of
+walking the finished tree to extract them.
+
+    SCRAPER_HTML_PARSER=lxml | html.parser | selectolax
+"""
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401  (BeautifulSoup loads it by feature name)
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+TREE_BACKEND = 'lxml' if LXML_AVAILABLE else 'html.parser'
+FAST_BACKEND = os.environ.get('SCRAPER_HTML_PARSER', TREE_BACKEND)
+if FAST_BACKEND == 'selectolax' and not SELECTOLAX_AVAILABLE:
+    print("Warning: selectolax not available. Falling back to BeautifulSoup.")
+    FAST_BACKEND = TREE_BACKEND
+if FAST_BACKEND == 'lxml' and not LXML_AVAILABLE:
+    FAST_BACKEND = 'html.parser'
+
+
+def _strip_pattern(tags):
+    names = '|'.join(re.escape(tag) for tag in tags)
+    # An element's raw text ends at the first matching close tag, as in HTML itself
+    return re.compile(rf'<({names})\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+
+_strip_patterns = {}
+
+
+def make_soup(markup, strip=(), fast=False, backend=None):
+    """Parse HTML into a BeautifulSoup tree, or a SelectolaxNode when fast and configured."""
+    backend = backend or (FAST_BACKEND if fast else TREE_BACKEND)
+
+    if backend == 'selectolax':
+        tree = LexborHTMLParser(markup)
+        if strip:
+            tree.strip_tags(list(strip))
+        return SelectolaxNode(tree.root)
+
+    if strip:
+        if isinstance(markup, bytes):
+            markup = markup.decode('utf-8', errors='replace')
+        key = tuple(strip)
+        if key not in _strip_patterns:
+            _strip_patterns[key] = _strip_pattern(strip)
+        markup = _strip_patterns[key].sub('', markup)
+    return BeautifulSoup(markup, backend)
+
+
+def _matches(value, expected):
+    """BeautifulSoup's rules for one filter value: string, list, regex, callable or True."""
+    if expected is True:
+        return value is not None
+    if callable(expected):
+        return bool(expected(value))
+    if value is None:
+        return False
+    if isinstance(expected, (list, tuple, set)):
+        return value in expected
+    if hasattr(expected, 'search'):
+        return expected.search(value) is not None
+    return value == expected
+
+
+class SelectolaxNode:
+    """The subset of bs4.Tag the fast call sites use, on a selectolax node."""
+
+    def __init__(self, node):
+        self._node = node
+
+    # --- attributes and text
+
+    @property
+    def name(self):
+        return self._node.tag
+
+    @property
+    def attrs(self):
+        attrs = dict(self._node.attributes)
+        if 'class' in attrs:
+            attrs['class'] = (attrs['class'] or '').split()
+        return attrs
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def has_attr(self, key):
+        return key in self._node.attributes
+
+    def get_text(self, separator='', strip=False):
+        if not strip:
+            return self._node.text(deep=True, separator=separator)
+        # BeautifulSoup drops the strings that strip to nothing before joining
+        strings = (node.text_content.strip() for node in self._node.traverse(include_text=True) if node.is_text_node)
+        return separator.join(string for string in strings if string)
+
+    @property
+    def text(self):
+        return self._node.text(deep=True)
+
+    @property
+    def string(self):
+        """Text of the only child, BeautifulSoup-style; None for mixed content."""
+        children = list(self._node.iter(include_text=True))
+        if len(children) != 1:
+            return None
+        child = children[0]
+        if child.tag == '-text':
+            return child.text_content
+        return SelectolaxNode(child).string
+
+    @property
+    def parent(self):
+        parent = self._node.parent
+        return SelectolaxNode(parent) if parent is not None else None
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, SelectolaxNode) and self._node == other._node
+
+    def __hash__(self):
+        return hash(self._node.mem_id)
+
+    def __repr__(self):
+        return self._node.html or ''
+
+    __str__ = __repr__
+
+    # --- searching
+
+    def select(self, selector, limit=None):
+        nodes = [SelectolaxNode(node) for node in self._node.css(selector)]
+        return nodes[:limit] if limit else nodes
+
+    def select_one(self, selector):
+        node = self._node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def _match(self, node, name, attrs, string):
+        if name is not None and not _matches(node.tag, name):
+            return False
+        node_attrs = node.attributes
+        for key, expected in attrs.items():
+            value = node_attrs.get(key)
+            if key == 'class' and value is not None:
+                # Like BeautifulSoup: match any single class, or the whole attribute
+                if not (any(_matches(c, expected) for c in value.split()) or _matches(value, expected)):
+                    return False
+            elif not _matches(value, expected):
+                return False
+        return string is None or _matches(SelectolaxNode(node).string, string)
+
+    def find_all(self, name=None, attrs=None, recursive=True, string=None, limit=None, class_=None, text=None, **kwargs):
+        if name is True:
+            name = None
+        filters = dict(attrs or {})
+        filters.update(kwargs)
+        if class_ is not None:
+            filters['class'] = class_
+        if string is None:
+            string = text
+
+        found = []
+        nodes = self._node.traverse() if recursive else self._node.iter()
+        for node in nodes:
+            if not node.is_element_node or node.mem_id == self._node.mem_id:
+                continue
+            if self._match(node, name, filters, string):
+                found.append(SelectolaxNode(node))
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    __call__ = find_all
+
+    def find(self, name=None, attrs=None, recursive=True, string=None, **kwargs):
+        found = self.find_all(name, attrs, recursive, string, limit=1, **kwargs)
+        return found[0] if found else None
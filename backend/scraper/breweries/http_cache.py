@@ -0,0 +1,293 @@
+"""On-disk HTTP cache with conditional requests for scraper fetches.
+
+Brewery sites change rarely, so every fetch goes through a cache keyed by URL
+that keeps the last body along with its ETag, Last-Modified and sha256. The
+next fetch of the URL sends If-None-Match / If-Modified-Since; a 304, or a 200
+whose body hashes the same as before, counts as a hit and the page is
+reported as unchanged.
+
+memo() remembers what a parse function returned for a page's content, so
+scrapers skip parsing pages that haven't changed since the last run.
+
+Bodies live in SCRAPER_CACHE_DIR next to a small sqlite index. Once they add
+up to more than SCRAPER_CACHE_MB, the least recently used pages are evicted.
+Set SCRAPER_HTTP_CACHE=0 to turn the cache off. It's also off while
+recording or replaying a cassette, which need every response in full.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+try:
+    from cassettes import get_cassette, recording, replaying
+    from politeness import host_of
+    from session_store import cookies_for
+except ImportError:  # imported as scraper.breweries.http_cache
+    from .cassettes import get_cassette, recording, replaying
+    from .politeness import host_of
+    from .session_store import cookies_for
+
+CACHE_ENABLED = os.environ.get('SCRAPER_HTTP_CACHE', '1') != '0'
+CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache'))
+MAX_CACHE_BYTES = int(float(os.environ.get('SCRAPER_CACHE_MB', 200)) * 1024 * 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT NOT NULL,
+    encoding TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_last_used ON pages(last_used);
+CREATE TABLE IF NOT EXISTS parsed (
+    url TEXT NOT NULL,
+    key TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (url, key)
+);
+"""
+
+
+class CachedPage:
+    """A fetched page, whether it came over the wire or out of the cache."""
+
+    def __init__(self, url, status_code, content, encoding, sha256, changed, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.sha256 = sha256
+        self.changed = changed
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 300
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+class HttpCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, 'bodies'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._stats = {}
+
+    def _body_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'bodies', key[:2], key)
+
+    def _entry(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, sha256, encoding FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _count(self, url, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(host_of(url), {
+                'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0, 'errors': 0,
+            })
+            stats['requests'] += 1
+            stats[outcome] += 1
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a URL we have a body for."""
+        entry = self._entry(url)
+        if entry is None or not os.path.exists(self._body_path(url)):
+            return {}
+        etag, last_modified, _, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, url, status_code, content, headers, encoding=None):
+        """Record a response and return the page it stands for.
+
+        A 304 returns the cached body. Other non-2xx responses are passed
+        through uncached.
+        """
+        entry = self._entry(url)
+        path = self._body_path(url)
+        now = time.time()
+
+        if status_code == 304 and entry is not None:
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError:
+                content = None
+            if content is not None:
+                with self._lock:
+                    self._conn.execute("UPDATE pages SET last_used = ? WHERE url = ?", (now, url))
+                    self._conn.commit()
+                self._count(url, 'not_modified')
+                return CachedPage(url, 200, content, entry[3], entry[2], changed=False, from_cache=True)
+
+        if not 200 <= status_code < 300:
+            self._count(url, 'errors')
+            return CachedPage(url, status_code, content or b'', encoding, None, changed=True, from_cache=False)
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        changed = entry is None or entry[2] != sha256
+        self._count(url, 'new' if entry is None else 'changed' if changed else 'unchanged')
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO pages (url, etag, last_modified, sha256, encoding, size, fetched_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (url, headers.get('ETag'), headers.get('Last-Modified'), sha256, encoding, len(content), now, now))
+            self._conn.commit()
+        if changed:
+            self.evict()
+        return CachedPage(url, status_code, content, encoding, sha256, changed=changed, from_cache=False)
+
+    def get(self, url, session=None, headers=None, timeout=30, cookies=None):
+        """GET a URL through the cache with requests. Network errors propagate."""
+        request_headers = dict(headers or {})
+        request_headers.update(self.conditional_headers(url))
+        response = (session or requests).get(url, headers=request_headers, timeout=timeout, cookies=cookies)
+        # Decode the way requests' .text would
+        encoding = response.encoding or response.apparent_encoding
+        return self.store(url, response.status_code, response.content, response.headers, encoding)
+
+    def memo(self, url, key, html, parse):
+        """parse(html), or what it returned last time for the same content of this URL.
+
+        The result must be JSON-serializable. key names the parse function and
+        anything besides the page content its result depends on.
+        """
+        sha256 = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, value FROM parsed WHERE url = ? AND key = ?", (url, key)
+            ).fetchone()
+        if row is not None and row[0] == sha256:
+            return json.loads(row[1])
+
+        value = parse(html)
+        if value is not None:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO parsed (url, key, sha256, value) VALUES (?, ?, ?, ?)",
+                    (url, key, sha256, json.dumps(value))
+                )
+                self._conn.commit()
+        return value
+
+    def evict(self):
+        """Drop least recently used pages until the cache is back under 90% of max_bytes."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = self.max_bytes * 0.9
+            evicted = []
+            for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY last_used"):
+                if total <= target:
+                    break
+                evicted.append(url)
+                total -= size
+            for url in evicted:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._conn.execute("DELETE FROM parsed WHERE url = ?", (url,))
+            self._conn.commit()
+        for url in evicted:
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+        return len(evicted)
+
+    def get_stats(self, host=None):
+        """Counts for one host, or summed over all hosts, with the hit rate."""
+        with self._lock:
+            per_host = [dict(stats) for name, stats in self._stats.items() if host is None or name == host]
+        stats = {'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'new': 0, 'errors': 0}
+        for host_stats in per_host:
+            for name, count in host_stats.items():
+                stats[name] += count
+        hits = stats['not_modified'] + stats['unchanged']
+        stats['hit_rate'] = round(hits / stats['requests'], 4) if stats['requests'] else 0.0
+        return stats
+
+    def report(self, host=None):
+        stats = self.get_stats(host)
+        hits = stats['not_modified'] + stats['unchanged']
+        return (f"HTTP cache: {hits}/{stats['requests']} unchanged ({stats['hit_rate']:.0%}), "
+                f"{stats['not_modified']} not modified, {stats['changed']} changed, "
+                f"{stats['new']} new, {stats['errors']} errors")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The shared cache, or None when SCRAPER_HTTP_CACHE=0 or a cassette is in use."""
+    global _cache
+    if not CACHE_ENABLED or get_cassette() is not None:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def cached_get(url, session=None, headers=None, timeout=30):
+    """requests-style GET through the shared cache, or straight to the network (or cassette) if it's off.
+
+    Stored age-gate and consent cookies for the site go along with the request.
+    """
+    cache = get_cache()
+    cookies = cookies_for(url)
+    if cache is None:
+        cassette = get_cassette()
+        fetch_url = url
+        if replaying():
+            fetch_url, headers = cassette.local_url(url), cassette.replay_headers(headers)
+        response = (session or requests).get(fetch_url, headers=headers, timeout=timeout, cookies=cookies)
+        content = response.content
+        if recording():
+            cassette.record(url, response.status_code, content, response.headers.get('Content-Type'))
+        sha256 = hashlib.sha256(content).hexdigest()
+        return CachedPage(url, response.status_code, content, response.encoding or response.apparent_encoding,
+                          sha256, changed=True, from_cache=False)
+    return cache.get(url, session, headers, timeout, cookies)
+
+
+def memoize(url, key, html, parse):
+    """HttpCache.memo() on the shared cache; just parse(html) if it's off."""
+    cache = get_cache()
+    if cache is None:
+        return parse(html)
+    return cache.memo(url, key, html, parse)
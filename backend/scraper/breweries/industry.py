@@ -2,8 +2,9 @@ import os
 import json
 import re
 import requests
+from http_cache import cached_get
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 
 class IndustryAlesScraper:
     def __init__(self):
@@ -16,7 +17,7 @@ class IndustryAlesScraper:
     def fetch_beer_list(self):
         """Fetch the beer list page from the brewery website"""
         try:
-            response = requests.get(self.beer_list_url)
+            response = cached_get(self.beer_list_url)
             response.raise_for_status()  # Raise an exception for 4XX/5XX status codes
             return response.text
         except requests.exceptions.RequestException as e:
@@ -29,7 +30,7 @@ class IndustryAlesScraper:
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         beers = []
         
         # Find all beer menu items
@@ -2,18 +2,16 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import json
-import time
 import os
 import traceback
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
+
+from page_waits import wait_until_quiet, wait_until_stable
+from webdriver_pool import acquire_driver, release_driver
 
 class MaplewoodScraper:
     def __init__(self):
@@ -35,24 +33,6 @@ class MaplewoodScraper:
         except Exception as e:
             print(f"Failed to take screenshot: {e}")
 
-    def _setup_chrome_options(self):
-        """Setup Chrome options for Selenium"""
-        options = Options()
-        
-        # Headless mode and other compatibility options
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        
-        # Window size
-        options.add_argument("--window-size=1920,1080")
-        
-        # User agent
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        return options
-
     def scrape(self):
         """Scrape beers from Maplewood website"""
         print(f"Scraping {self.brewery_name}...")
@@ -106,14 +86,8 @@ class MaplewoodScraper:
         beers = []
         
         try:
-            # Setup Chrome options
-            options = self._setup_chrome_options()
-            
-            # Setup Chrome WebDriver
-            service = Service(ChromeDriverManager().install())
-            
-            print("Initializing WebDriver...")
-            driver = webdriver.Chrome(service=service, options=options)
+            print("Borrowing a WebDriver from the pool...")
+            driver = acquire_driver()
             
             # Configure wait
             wait = WebDriverWait(driver, 15)
@@ -162,7 +136,7 @@ class MaplewoodScraper:
                     strategy()
                     
                     # Wait for potential page load
-                    time.sleep(3)
+                    wait_until_quiet(driver, "maplewood.age_gate", 3)
                     print(f"Current URL after verification: {driver.current_url}")
                     
                     # Take screenshot after verification
@@ -197,7 +171,7 @@ class MaplewoodScraper:
                 return []
             
             # Wait for page to load
-            time.sleep(5)
+            wait_until_quiet(driver, "maplewood.beer_page", 5)
             
             # Scroll to load all elements on archive page
             if is_current == False:  # Only do this for archive page
@@ -208,11 +182,8 @@ class MaplewoodScraper:
                     # Scroll down to bottom
                     driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
                     
-                    # Wait to load page
-                    time.sleep(2)
-                    
-                    # Calculate new scroll height and compare with last scroll height
-                    new_height = driver.execute_script("return document.body.scrollHeight")
+                    # Wait for the new content to load, up to 2 seconds
+                    _, new_height = wait_until_stable(driver, "maplewood.archive_scroll", 2)
                     
                     # If heights are the same, it means we've reached the bottom
                     if new_height == last_height:
@@ -281,12 +252,9 @@ class MaplewoodScraper:
             print(traceback.format_exc())
         
         finally:
-            # Clean up
+            # Return the browser to the pool
             if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
+                release_driver(driver)
         
         return beers
 
@@ -0,0 +1,156 @@
+"""Read Untappd for Business menus over plain HTTP instead of rendering them in Chrome.
+
+Taprooms embed their Untappd menu with one of two snippets:
+
+    <script src="https://business.untappd.com/locations/1234/themes/5678/js"></script>
+
+    <script src="https://embed-menu-preloader.untappdapi.com/embed-menu-preloader.min.js"></script>
+    <script>PreloadEmbedMenu("menu-container", 1234, 5678);</script>
+
+Both load the location's menu, rendered with the given theme, from the theme
+script, which writes the menu HTML into the page. extract_menu() fetches the
+taproom page with cached_get() (stored age-gate cookies go along), reads any
+menu the server already rendered, and otherwise finds the embeds and pulls the
+menu HTML straight out of their theme scripts. Either way the items come back
+as plain dicts:
+
+    {"name", "type", "abv", "ibu", "brewery", "description", "price_info"}
+
+An empty list means there was no menu to read over HTTP, and the scraper
+should fall back to Selenium.
+"""
+import re
+
+from html_parser import make_soup
+from http_cache import cached_get, memoize
+
+THEME_SCRIPT = "https://business.untappd.com/locations/{location}/themes/{theme}/js"
+
+THEME_SCRIPT_PATTERN = re.compile(r'business\.untappd\.com/locations/(\d+)/themes/(\d+)/js')
+PRELOADER_PATTERN = re.compile(r'PreloadEmbedMenu\(\s*["\'][^"\']*["\']\s*,\s*(\d+)\s*,\s*(\d+)\s*\)')
+
+# JavaScript string literals, for digging HTML out of a theme script
+JS_STRING_PATTERN = re.compile(r'"((?:[^"\\\n]|\\.)*)"|\'((?:[^\'\\\n]|\\.)*)\'')
+JS_ESCAPE_PATTERN = re.compile(r'\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|.)', re.DOTALL)
+JS_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+ABV_PATTERN = re.compile(r'(\d+\.?\d*)\s*%')
+IBU_PATTERN = re.compile(r'(\d+)\s*IBU', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'(\d+)')
+
+# (item selector, field -> selector) for each way the menus are marked up
+CAPSULE_LAYOUT = (".untapped-beer-capsule", {
+    "name": ".untapped-beer-capsule__name",
+    "type": ".untapped-beer-capsule__style",
+    "abv": ".untapped-beer-capsule__abv",
+    "ibu": ".untapped-beer-capsule__ibu",
+    "price_info": ".untapped-beer-capsule__price",
+})
+UNTAPPD_LAYOUT = (".menu-item, .item", {
+    "name": ".item-name, .beer-name, .item-title",
+    "type": ".item-style, .item-category, .beer-style",
+    "abv": ".item-abv, .abv",
+    "ibu": ".item-ibu, .ibu",
+    "brewery": ".item-brewery, .brewery",
+    "description": ".item-description, .beer-description",
+    "price_info": ".item-price, .price",
+})
+
+PAGE_LAYOUTS = [CAPSULE_LAYOUT]
+EMBED_LAYOUTS = [CAPSULE_LAYOUT, UNTAPPD_LAYOUT]
+
+
+def find_menu_embeds(html):
+    """(location, theme) of every Untappd menu embedded in a page, in page order."""
+    embeds = []
+    for match in list(THEME_SCRIPT_PATTERN.finditer(html)) + list(PRELOADER_PATTERN.finditer(html)):
+        embed = (match.group(1), match.group(2))
+        if embed not in embeds:
+            embeds.append(embed)
+    return embeds
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0] in 'xu':
+        return chr(int(escape[1:], 16))
+    return JS_ESCAPES.get(escape, escape)
+
+
+def _js_strings(script):
+    """The string literals of a script, unescaped."""
+    for match in JS_STRING_PATTERN.finditer(script):
+        raw = match.group(1) if match.group(1) is not None else match.group(2)
+        yield JS_ESCAPE_PATTERN.sub(_unescape, raw)
+
+
+def menu_html_from_script(script):
+    """The menu HTML a theme script writes into the page."""
+    return "".join(string for string in _js_strings(script) if '<' in string)
+
+
+def _number(pattern, text, convert):
+    match = pattern.search(text or "")
+    return convert(match.group(1)) if match else None
+
+
+def parse_menu_items(soup, layouts=EMBED_LAYOUTS):
+    """Menu items in a parsed page or menu, with the first layout that finds any."""
+    for item_selector, fields in layouts:
+        elements = soup.select(item_selector)
+        items = []
+        seen = set()
+        for element in elements:
+            values = {}
+            for field, selector in fields.items():
+                match = element.select_one(selector)
+                values[field] = match.get_text(" ", strip=True) if match is not None else None
+            # Item selectors can match both a wrapper and the item inside it
+            if not values.get("name") or (values["name"], values.get("type")) in seen:
+                continue
+            seen.add((values["name"], values.get("type")))
+            text = element.get_text(" ", strip=True)
+            abv = _number(ABV_PATTERN, values.get("abv"), float)
+            if abv is None and values.get("abv") is None:
+                # Some themes run ABV into the style line
+                abv = _number(ABV_PATTERN, text, float)
+            ibu = _number(NUMBER_PATTERN, values.get("ibu"), int)
+            if ibu is None and values.get("ibu") is None:
+                ibu = _number(IBU_PATTERN, text, int)
+            items.append({
+                "name": values["name"],
+                "type": values.get("type") or "Unknown",
+                "abv": abv,
+                "ibu": ibu,
+                "brewery": values.get("brewery"),
+                "description": values.get("description") or "",
+                "price_info": values.get("price_info") or "",
+            })
+        if items:
+            return items
+    return []
+
+
+def _fetch(url):
+    response = cached_get(url, timeout=15)
+    response.raise_for_status()
+    return response.text
+
+
+def extract_menu(page_url):
+    """Menu items for a taproom page, read over HTTP; [] if the page has no menu we can read that way."""
+    html = _fetch(page_url)
+    items = memoize(page_url, "menu_embeds:page", html,
+                    lambda html: parse_menu_items(make_soup(html, fast=True), PAGE_LAYOUTS))
+    if items:
+        print(f"Read {len(items)} menu items from the page at {page_url}")
+        return items
+
+    for location, theme in find_menu_embeds(html):
+        script_url = THEME_SCRIPT.format(location=location, theme=theme)
+        script = _fetch(script_url)
+        menu = memoize(script_url, "menu_embeds:theme", script,
+                       lambda script: parse_menu_items(make_soup(menu_html_from_script(script), fast=True)))
+        print(f"Read {len(menu)} menu items from Untappd location {location}, theme {theme}")
+        items.extend(menu)
+    return items
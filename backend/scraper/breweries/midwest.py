@@ -2,9 +2,10 @@ import os
 import json
 import time
 import requests
+from http_cache import cached_get
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 import traceback
 
 def scrape_midwest_coast():
@@ -51,7 +52,7 @@ def scrape_midwest_coast():
         for url in urls_to_try:
             try:
                 print(f"Trying URL: {url}")
-                response = session.get(url, timeout=10)
+                response = cached_get(url, session, timeout=10)
                 if response.status_code == 200:
                     page_content = response.text
                     url_used = url
@@ -71,7 +72,7 @@ def scrape_midwest_coast():
             f.write(page_content)
         
         # Parse the HTML with BeautifulSoup
-        soup = BeautifulSoup(page_content, 'html.parser')
+        soup = make_soup(page_content)
         
         # Look for age verification elements, but we can't interact with them
         # Just logging for debugging purposes
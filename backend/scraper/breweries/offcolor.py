@@ -1,5 +1,5 @@
 from base_scraper import BreweryScraper
-import requests
+from http_cache import cached_get
 from bs4 import BeautifulSoup
 import re
 import json
@@ -72,7 +72,7 @@ class OffColorScraper(BreweryScraper):
         # Original implementation here (copy from previous document)
         beers = []
         try:
-            response = requests.get(self.beer_url, headers=self.headers)
+            response = cached_get(self.beer_url, headers=self.headers)
             soup = self.parse_html(response.text)
             
             # Off Color website has basic beer names but links to individual beer pages
@@ -162,7 +162,7 @@ class OffColorScraper(BreweryScraper):
     def _get_beer_details(self, beer_url):
         """Get detailed information about a specific beer"""
         try:
-            response = requests.get(beer_url, headers=self.headers)
+            response = cached_get(beer_url, headers=self.headers)
             soup = self.parse_html(response.text)
             
             beer_details = {}
@@ -196,7 +196,7 @@ class OffColorScraper(BreweryScraper):
         # Original implementation of _scrape_beer_menus method
         beers = []
         try:
-            response = requests.get(self.beermenu_url, headers=self.headers)
+            response = cached_get(self.beermenu_url, headers=self.headers)
             soup = self.parse_html(response.text)
             
             # BeerMenus typically has a structured format with beer items
@@ -14,7 +14,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from html_parser import make_soup
 
 class OnTourBrewingScraper:
     """Scraper for On Tour Brewing website."""
@@ -49,7 +49,7 @@ class OnTourBrewingScraper:
     def extract_beer_info_from_html_content(self, html_content):
         """Extract beer information directly from HTML content using specific selectors."""
         print("Extracting beer information from HTML content...")
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         # Find all item-details elements
         beer_items = soup.find_all('div', class_='item-details')
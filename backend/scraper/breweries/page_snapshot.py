@@ -0,0 +1,99 @@
+"""Read a Selenium page in one WebDriver round-trip and extract from it locally.
+
+Every find_element, get_attribute, .text and .title is an HTTP request to
+chromedriver and on into the browser. Extracting a beer element by element
+costs dozens of them per page. take_snapshot() makes one execute_script call
+that returns what the scrapers read: the URL, the title, the rendered HTML,
+the visible text and every link resolved to an absolute URL. Extraction then
+runs against page.soup, a local parse of that HTML:
+
+    page = take_snapshot(driver)
+    for capsule in page.soup.select('.untapped-beer-capsule'):
+        name = text_of(capsule, '.untapped-beer-capsule__name')
+
+page_links() is the same call trimmed to just the links, for loops that
+re-read them after every scroll.
+"""
+from urllib.parse import urljoin
+
+from html_parser import make_soup
+
+SNAPSHOT_SCRIPT = """
+const visible = arguments[0].filter(selector => {
+    const element = document.querySelector(selector);
+    return element !== null && element.getClientRects().length > 0;
+});
+return {
+    url: location.href,
+    title: document.title,
+    html: document.documentElement.outerHTML,
+    text: document.body ? document.body.innerText : '',
+    links: Array.from(document.links, a => a.href),
+    visible: visible,
+};
+"""
+
+LINKS_SCRIPT = "return Array.from(document.links, a => a.href);"
+
+VISIBLE_SCRIPT = """
+const element = document.querySelector(arguments[0]);
+return element !== null && element.getClientRects().length > 0;
+"""
+
+
+class PageSnapshot:
+    """A page as it was rendered when the snapshot was taken."""
+
+    def __init__(self, url, title, html, text, links, visible=()):
+        self.url = url
+        self.title = title or ''
+        self.html = html or ''
+        self.text = text or ''
+        self.links = links or []
+        self._visible = set(visible)
+        self._soup = None
+
+    @property
+    def soup(self):
+        """BeautifulSoup tree of the HTML, parsed on first use."""
+        if self._soup is None:
+            self._soup = make_soup(self.html)
+        return self._soup
+
+    def is_visible(self, selector):
+        """Whether selector matched a displayed element; only for selectors passed to take_snapshot()."""
+        return selector in self._visible
+
+    def links_within(self, selector):
+        """Absolute hrefs of the links inside elements matching selector, and of matching links themselves."""
+        hrefs = []
+        for element in self.soup.select(selector):
+            anchors = element.find_all('a', href=True)
+            if element.name == 'a' and element.get('href'):
+                anchors.insert(0, element)
+            hrefs.extend(urljoin(self.url, a['href']) for a in anchors)
+        return hrefs
+
+
+def take_snapshot(driver, visible=()):
+    """Snapshot the current page. visible= lists selectors whose display state to record too."""
+    data = driver.execute_script(SNAPSHOT_SCRIPT, list(visible))
+    return PageSnapshot(data['url'], data['title'], data['html'], data['text'], data['links'], data['visible'])
+
+
+def page_links(driver):
+    """Absolute hrefs of every link on the current page, in one round-trip."""
+    return driver.execute_script(LINKS_SCRIPT) or []
+
+
+def is_visible(driver, selector):
+    """Whether selector matches a displayed element on the current page, in one round-trip."""
+    return bool(driver.execute_script(VISIBLE_SCRIPT, selector))
+
+
+def text_of(element, selector, default=None):
+    """Stripped text of the first match for selector under element, like WebElement.text; default when missing."""
+    match = element.select_one(selector)
+    if match is None:
+        return default
+    return match.get_text(' ', strip=True)
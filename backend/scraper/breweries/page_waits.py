@@ -0,0 +1,152 @@
+"""Waits for Selenium pages that end as soon as the page is ready.
+
+The Selenium scrapers used to sleep a fixed few seconds after every page load,
+scroll and click, whether the page needed it or not. These waits poll the
+page instead, and each takes the old sleep as its ceiling, max_wait:
+
+    wait_until_quiet()   the document has loaded, no fetch/XHR is in flight,
+                         and neither the DOM nor the network has changed for
+                         QUIET_SECONDS
+    wait_until_stable()  the number of elements matching a selector and the
+                         page height have stopped changing, and the network is
+                         idle: for infinite scroll and "load more" buttons
+
+Every call names its site, e.g. "goose.beer_page", and logs how long it
+actually waited out of its ceiling. report() sums that per site, so the runner
+can show where the time goes.
+
+    SCRAPER_WAIT_SCALE   multiplies every ceiling (0.5 halves them)
+    SCRAPER_QUIET_MS     how long the page must be idle to count as ready
+"""
+import os
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+# Multiplier for every call site's ceiling
+WAIT_SCALE = float(os.environ.get('SCRAPER_WAIT_SCALE', 1.0))
+
+# Seconds without DOM or network activity before a page counts as ready
+QUIET_SECONDS = int(os.environ.get('SCRAPER_QUIET_MS', 500)) / 1000
+
+POLL_SECONDS = 0.1
+
+# Installs an activity monitor in the page once per document, then reports on it
+ACTIVITY_SCRIPT = """
+if (!window.__scraperActivity) {
+    const activity = window.__scraperActivity = {last: performance.now(), pending: 0};
+    const touch = () => { activity.last = performance.now(); };
+    new MutationObserver(touch).observe(document, {childList: true, subtree: true, characterData: true});
+    if (window.PerformanceObserver) {
+        new PerformanceObserver(touch).observe({type: 'resource'});
+    }
+    if (window.fetch) {
+        const fetch = window.fetch;
+        window.fetch = function () {
+            activity.pending++;
+            touch();
+            return fetch.apply(this, arguments).finally(() => { activity.pending--; touch(); });
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        activity.pending++;
+        touch();
+        this.addEventListener('loadend', () => { activity.pending--; touch(); });
+        return send.apply(this, arguments);
+    };
+}
+const activity = window.__scraperActivity;
+const selector = arguments[0];
+return {
+    ready: document.readyState === 'complete',
+    idle: (performance.now() - activity.last) / 1000,
+    pending: activity.pending,
+    count: selector ? document.querySelectorAll(selector).length : 0,
+    height: document.body ? document.body.scrollHeight : 0,
+};
+"""
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _activity(driver, selector=None):
+    try:
+        return driver.execute_script(ACTIVITY_SCRIPT, selector)
+    except WebDriverException:
+        # The page is navigating away; there's nothing to observe yet
+        return None
+
+
+def _record(site, started, ceiling, outcome):
+    waited = time.perf_counter() - started
+    with _stats_lock:
+        stats = _stats.setdefault(site, {'calls': 0, 'waited': 0.0, 'ceiling': 0.0, 'timeouts': 0})
+        stats['calls'] += 1
+        stats['waited'] += waited
+        stats['ceiling'] += ceiling
+        stats['timeouts'] += outcome == 'timeout'
+    print(f"  [wait] {site}: {waited:.2f}s of {ceiling:.1f}s ({outcome})")
+    return waited
+
+
+def wait_until_quiet(driver, site, max_wait, quiet=QUIET_SECONDS):
+    """Wait for the page to finish loading and go idle, at most max_wait seconds. Returns seconds waited."""
+    ceiling = max_wait * WAIT_SCALE
+    started = time.perf_counter()
+    outcome = 'timeout'
+    while time.perf_counter() - started < ceiling:
+        state = _activity(driver)
+        if state and state['ready'] and not state['pending'] and state['idle'] >= quiet:
+            outcome = 'quiet'
+            break
+        time.sleep(POLL_SECONDS)
+    return _record(site, started, ceiling, outcome)
+
+
+def wait_until_stable(driver, site, max_wait, selector=None, settle=QUIET_SECONDS):
+    """Wait for the selector's element count and the page height to settle, at most max_wait seconds.
+
+    Returns (count, height) as last seen, so scroll loops can tell whether anything new arrived.
+    """
+    ceiling = max_wait * WAIT_SCALE
+    started = time.perf_counter()
+    outcome = 'timeout'
+    last = None
+    stable_since = started
+    state = None
+    while time.perf_counter() - started < ceiling:
+        state = _activity(driver, selector) or state
+        now = time.perf_counter()
+        current = (state['count'], state['height']) if state else None
+        if current != last:
+            last, stable_since = current, now
+        elif state and state['ready'] and not state['pending'] and now - stable_since >= settle:
+            outcome = 'stable'
+            break
+        time.sleep(POLL_SECONDS)
+    _record(site, started, ceiling, outcome)
+    return last or (0, 0)
+
+
+def get_stats():
+    with _stats_lock:
+        return {site: dict(stats) for site, stats in _stats.items()}
+
+
+def report():
+    """Actual versus maximum wait per call site, longest first."""
+    stats = get_stats()
+    if not stats:
+        return "Page waits: none"
+    waited = sum(s['waited'] for s in stats.values())
+    ceiling = sum(s['ceiling'] for s in stats.values())
+    lines = [f"Page waits: {waited:.1f}s of {ceiling:.1f}s maximum"]
+    for site, s in sorted(stats.items(), key=lambda item: -item[1]['waited']):
+        line = f"  {site}: {s['calls']} calls, {s['waited']:.1f}s of {s['ceiling']:.1f}s"
+        if s['timeouts']:
+            line += f", {s['timeouts']} hit the ceiling"
+        lines.append(line)
+    return "\n".join(lines)
@@ -1,6 +1,6 @@
 # pilot_project_scraper.py
-import requests
-from bs4 import BeautifulSoup
+from http_cache import cached_get
+from html_parser import make_soup
 import json
 import os
 import datetime
@@ -25,14 +25,14 @@ class PilotProjectScraper:
         
         # Fetch the beer page
         print(f"Fetching beer information from {self.beer_url}...")
-        response = requests.get(self.beer_url)
+        response = cached_get(self.beer_url)
         
         if response.status_code != 200:
             print(f"Failed to retrieve page: {response.status_code}")
             return None
         
         # Parse HTML with BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         # Find all beer descriptions (based on the HTML structure you provided)
         beer_paragraphs = soup.find_all('p', style='white-space:pre-wrap;')
@@ -0,0 +1,56 @@
+"""Per-host politeness limits shared by the scraper runner and fetchers.
+
+Every brewery site is a different host, so scrapers can run side by side,
+but no host should see more than PER_HOST_CONCURRENCY of our workers at once
+or two of them starting less than MIN_HOST_INTERVAL seconds apart.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+PER_HOST_CONCURRENCY = int(os.environ.get('SCRAPER_PER_HOST_CONCURRENCY', 1))
+
+# Seconds between two requests (or scraper starts) against the same host
+MIN_HOST_INTERVAL = float(os.environ.get('SCRAPER_MIN_HOST_INTERVAL', 2.0))
+
+
+def host_of(url):
+    """Host name of a URL without a leading 'www.'."""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class HostLimiter:
+    """Per-host semaphore plus a minimum interval between acquisitions."""
+
+    def __init__(self, concurrency=PER_HOST_CONCURRENCY, interval=MIN_HOST_INTERVAL):
+        self.concurrency = concurrency
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.concurrency)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, host):
+        """Hold one of the host's slots, waiting out its interval first. Yields seconds waited."""
+        started = time.monotonic()
+        semaphore = self._semaphore(host)
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start_at + self.interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield time.monotonic() - started
+        finally:
+            semaphore.release()
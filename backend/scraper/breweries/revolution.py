@@ -2,14 +2,25 @@ from base_scraper import BreweryScraper
 import time
 import json
 import os
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import re
 
+from menu_embeds import PAGE_LAYOUTS, extract_menu, parse_menu_items
+from page_snapshot import is_visible, take_snapshot, text_of
+from page_waits import wait_until_quiet
+from session_store import pass_gate, restore_browser
+from webdriver_pool import acquire_driver, release_driver
+
+TAPROOM_URL = "https://revbrew.com/visit/brewery/tap-room-dl"
+
+AGE_BUTTON = "#js-verify"
+
+# Stored age-verification cookies are kept under this domain
+SESSION_DOMAIN = "revbrew.com"
+
 class RevolutionBreweryScraper(BreweryScraper):
     def __init__(self):
         super().__init__(
@@ -45,8 +56,10 @@ class RevolutionBreweryScraper(BreweryScraper):
             "description": "Revolution Brewing is Chicago's largest independent craft brewery, featuring a brewpub and taproom with a wide variety of beers."
         }
         
-        # Use a different approach - directly navigate to the on-tap page
-        beers = self.scrape_beers_directly()
+        # The on-tap list is an Untappd menu: read it over HTTP, and only start Chrome if that fails
+        beers = self.scrape_menu_over_http()
+        if not beers:
+            beers = self.scrape_beers_directly()
         
         # Prepare data structure even if beers is empty
         if beers is None:
@@ -61,40 +74,40 @@ class RevolutionBreweryScraper(BreweryScraper):
         self.save_to_json(data)
         return data
     
+    def scrape_menu_over_http(self):
+        """Read the taproom's Untappd menu without a browser; [] if it can't be read that way"""
+        started = time.perf_counter()
+        try:
+            items = extract_menu(TAPROOM_URL)
+        except Exception as e:
+            print(f"Could not read the taproom menu over HTTP: {e}")
+            return []
+        
+        if not items:
+            print("No menu found over HTTP (age gate or no Untappd embed), falling back to Selenium")
+            return []
+        print(f"Read {len(items)} beers over HTTP in {time.perf_counter() - started:.1f}s")
+        return [self._to_beer(item) for item in items]
+    
     def scrape_beers_directly(self):
         """Scrape beers directly from the website"""
         print(f"Starting {self.brewery_name} scraper...")
         
-        # Configure Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        # Create a new Chrome driver
-        driver = webdriver.Chrome(options=chrome_options)
+        # Borrow a browser from the shared pool
+        driver = acquire_driver()
         
         beers = []
         try:
+            # Cookies from the last run's age verification, if there are any
+            restored = restore_browser(driver, SESSION_DOMAIN)
+            
             # First, try the taproom beer page which has a different structure
-            driver.get("https://revbrew.com/visit/brewery/tap-room-dl")
+            driver.get(TAPROOM_URL)
             print("Loading taproom beers page...")
+            wait_until_quiet(driver, "revolution.age_gate_check", 5)
             
-            # Handle age verification if present
-            try:
-                # Wait for the age verification button to be clickable
-                verify_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "js-verify"))
-                )
-                # Click the "Yes" button
-                verify_button.click()
-                print("Age verification completed")
-                
-                # Wait for page to load after age verification
-                time.sleep(3)
-                
-            except TimeoutException:
-                print("Age verification button not found - may already be verified")
+            # Handle age verification if present, unless the stored cookies already did
+            pass_gate(driver, SESSION_DOMAIN, restored, self._age_gate_present, self._verify_age)
             
             # Wait for the beer list to load
             try:
@@ -104,81 +117,40 @@ class RevolutionBreweryScraper(BreweryScraper):
                 
                 print("Beer list found, extracting beer information...")
                 
+                # Read the rendered list in one round-trip and extract from the snapshot
+                page = take_snapshot(driver)
+                
                 # Try to find beer items using the structure from your HTML
-                beer_elements = driver.find_elements(By.CSS_SELECTOR, ".untapped-beer-capsule")
+                beer_elements = page.soup.select(".untapped-beer-capsule")
                 
                 if beer_elements and len(beer_elements) > 0:
                     print(f"Found {len(beer_elements)} beer elements")
                     
-                    for element in beer_elements:
-                        try:
-                            # Extract beer details
-                            name = element.find_element(By.CLASS_NAME, "untapped-beer-capsule__name").text.strip()
-                            
-                            # Get beer style
-                            try:
-                                beer_type = element.find_element(By.CLASS_NAME, "untapped-beer-capsule__style").text.strip()
-                            except NoSuchElementException:
-                                beer_type = "Unknown"
-                            
-                            # Get ABV
-                            try:
-                                abv_text = element.find_element(By.CLASS_NAME, "untapped-beer-capsule__abv").text.strip()
-                                abv = float(abv_text.replace("%", ""))
-                            except (NoSuchElementException, ValueError):
-                                abv = None
-                            
-                            # Get IBU if available
-                            try:
-                                ibu_text = element.find_element(By.CLASS_NAME, "untapped-beer-capsule__ibu").text.strip()
-                                ibu = int(ibu_text.replace("IBUs", "").strip())
-                            except (NoSuchElementException, ValueError):
-                                ibu = None
-                            
-                            # Get price info if available
-                            try:
-                                price_info = element.find_element(By.CLASS_NAME, "untapped-beer-capsule__price").text.strip()
-                            except NoSuchElementException:
-                                price_info = ""
-                            
-                            # Create beer dictionary
-                            beer_info = {
-                                "name": name,
-                                "brewery": self.brewery_name,
-                                "type": beer_type,
-                                "abv": abv,
-                                "ibu": ibu,
-                                "price_info": price_info,
-                                "location": self.location,
-                                "website": self.website_url
-                            }
-                            
-                            beers.append(beer_info)
-                            print(f"Processed beer: {name}")
-                            
-                        except Exception as e:
-                            print(f"Error processing beer element: {e}")
+                    for item in parse_menu_items(page.soup, PAGE_LAYOUTS):
+                        beers.append(self._to_beer(item))
+                        print(f"Processed beer: {item['name']}")
                 else:
                     print("No beer elements found with primary selector")
                     
                     # Try alternative approach - check for different selectors
-                    beer_items = driver.find_elements(By.CSS_SELECTOR, ".js-beer-list li")
+                    beer_items = page.soup.select(".js-beer-list li")
                     if beer_items and len(beer_items) > 0:
                         print(f"Found {len(beer_items)} beer items with alternative selector")
                         
                         for item in beer_items:
                             try:
                                 # Try to find beer name and details
-                                name_element = item.find_element(By.TAG_NAME, "h2")
-                                name = name_element.text.strip()
+                                name = text_of(item, "h2")
+                                if name is None:
+                                    raise NoSuchElementException("No h2 in beer item")
                                 
                                 # Look for beer style and ABV
-                                info_elements = item.find_elements(By.TAG_NAME, "p")
+                                info_elements = item.find_all("p")
                                 beer_type = "Unknown"
                                 abv = None
                                 
                                 for info in info_elements:
-                                    text = info.text.strip()
+                                    text = info.get_text(" ", strip=True)
                                     if "%" in text and len(text) < 10:  # Likely an ABV value
                                         try:
                                             abv = float(text.replace("%", "").strip())
@@ -209,53 +181,47 @@ class RevolutionBreweryScraper(BreweryScraper):
                 driver.get("https://revbrew.com/beer")
                 
                 # Wait a moment for the page to load
-                time.sleep(5)
+                wait_until_quiet(driver, "revolution.beer_page", 5)
+                
+                # Read the page in one round-trip and extract from the snapshot
+                page = take_snapshot(driver)
                 
                 # Try to extract beer information from different beer sections
-                beer_sections = driver.find_elements(By.CSS_SELECTOR, ".beer-list, .beer-section")
+                beer_sections = page.soup.select(".beer-list, .beer-section")
                 
                 if beer_sections and len(beer_sections) > 0:
                     print(f"Found {len(beer_sections)} beer sections")
                     
                     for section in beer_sections:
                         # Try to find beer items in this section
-                        items = section.find_elements(By.CSS_SELECTOR, ".beer-item, .beer-card")
+                        items = section.select(".beer-item, .beer-card")
                         
                         for item in items:
                             try:
                                 # Try to extract beer name
-                                name_elements = item.find_elements(By.CSS_SELECTOR, "h2, h3, h4, .beer-name, .title")
-                                if name_elements:
-                                    name = name_elements[0].text.strip()
-                                else:
+                                name = text_of(item, "h2, h3, h4, .beer-name, .title")
+                                if name is None:
                                     continue  # Skip if no name found
                                 
                                 # Try to find beer style
-                                style_elements = item.find_elements(By.CSS_SELECTOR, ".beer-style, .style, .subtitle")
-                                beer_type = "Unknown"
-                                if style_elements:
-                                    beer_type = style_elements[0].text.strip()
+                                beer_type = text_of(item, ".beer-style, .style, .subtitle", "Unknown")
                                 
                                 # Try to extract ABV
                                 abv = None
-                                abv_elements = item.find_elements(By.CSS_SELECTOR, ".abv, .beer-abv")
-                                if abv_elements:
-                                    abv_text = abv_elements[0].text.strip()
+                                abv_text = text_of(item, ".abv, .beer-abv")
+                                if abv_text is not None:
                                     abv_match = re.search(r'(\d+\.?\d*)%', abv_text)
                                     if abv_match:
                                         abv = float(abv_match.group(1))
                                 else:
                                     # Try to find ABV in other text elements
-                                    all_text = item.text
+                                    all_text = item.get_text(" ", strip=True)
                                     abv_match = re.search(r'(\d+\.?\d*)%\s*ABV', all_text)
                                     if abv_match:
                                         abv = float(abv_match.group(1))
                                 
                                 # Try to extract description
-                                desc_elements = item.find_elements(By.CSS_SELECTOR, ".description, .beer-description")
-                                description = ""
-                                if desc_elements:
-                                    description = desc_elements[0].text.strip()
+                                description = text_of(item, ".description, .beer-description", "")
                                 
                                 beer_info = {
                                     "name": name,
@@ -277,11 +243,11 @@ class RevolutionBreweryScraper(BreweryScraper):
                     print("No beer sections found on the main beer page, trying one more approach...")
                     
                     # Last attempt: try to extract any text that looks like beer information
-                    paragraphs = driver.find_elements(By.TAG_NAME, "p")
+                    paragraphs = page.soup.find_all("p")
                     beer_candidates = []
                     
                     for p in paragraphs:
-                        text = p.text.strip()
+                        text = p.get_text(" ", strip=True)
                         # Look for text that might be beer information (has ABV)
                         if "%" in text and ("abv" in text.lower() or "ibu" in text.lower() or "ale" in text.lower() or "lager" in text.lower() or "stout" in text.lower()):
                             beer_candidates.append(text)
@@ -362,10 +328,44 @@ class RevolutionBreweryScraper(BreweryScraper):
             return []
         
         finally:
-            # Close the browser
-            driver.quit()
+            # Return the browser to the pool
+            release_driver(driver)
         
         return beers
+    
+    def _age_gate_present(self, driver):
+        """Whether the age verification button is showing"""
+        return is_visible(driver, AGE_BUTTON)
+    
+    def _verify_age(self, driver):
+        """Click through the age verification"""
+        try:
+            # Wait for the age verification button to be clickable
+            verify_button = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, AGE_BUTTON))
+            )
+            # Click the "Yes" button
+            verify_button.click()
+            print("Age verification completed")
+            
+            # Wait for page to load after age verification
+            wait_until_quiet(driver, "revolution.age_gate", 3)
+            
+        except TimeoutException:
+            print("Age verification button not found - may already be verified")
+    
+    def _to_beer(self, item):
+        """Map one menu item from menu_embeds to a beer dictionary"""
+        return {
+            "name": item["name"],
+            "brewery": self.brewery_name,
+            "type": item["type"],
+            "abv": item["abv"],
+            "ibu": item["ibu"],
+            "price_info": item["price_info"],
+            "location": self.location,
+            "website": self.website_url
+        }
 
 # For direct script testing
 def main():
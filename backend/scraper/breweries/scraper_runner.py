@@ -1,4 +1,15 @@
 # scraper_runner.py
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from http_cache import get_cache
+import page_waits
+from politeness import HostLimiter, host_of
+from session_store import get_session_store
+from webdriver_pool import POOL_SIZE, get_pool
 from suncatcher import SuncatcherScraper
 from offcolor import OffColorScraper
 from half_acre import HalfAcreScraper
@@ -12,8 +23,77 @@ from on_tour import OnTourBrewingScraper
 from industry import IndustryAlesScraper
 from hop_butcher import HopButcherScraper
 
-def run_scrapers():
-    """Run all brewery scrapers"""
+# Scrapers run at once; each brewery is a different host
+MAX_WORKERS = int(os.environ.get('SCRAPER_WORKERS', 6))
+
+# Scrapers that drive a headless Chrome, which is far heavier than an HTTP fetch.
+# They borrow browsers from the shared WebDriver pool, so run no more than it holds.
+SELENIUM_SCRAPERS = {
+    'GooseIslandScraper',
+    'HalfAcreScraper',
+    'MaplewoodScraper',
+    'HopewellScraper',
+    'RevolutionBreweryScraper',
+}
+MAX_SELENIUM = int(os.environ.get('SCRAPER_SELENIUM_WORKERS', POOL_SIZE))
+
+# Attributes scrapers keep their start URL in, most specific first
+URL_ATTRIBUTES = ('beer_url', 'url', 'beer_list_url', 'base_url', 'website_url')
+
+
+def scraper_name(scraper):
+    return getattr(scraper, 'brewery_name', type(scraper).__name__)
+
+
+def scraper_host(scraper):
+    """Host a scraper talks to, for per-host limits."""
+    for attribute in URL_ATTRIBUTES:
+        url = getattr(scraper, attribute, None)
+        if url:
+            return host_of(url)
+    return scraper_name(scraper)
+
+
+def run_scraper(scraper, host_limiter, selenium_slots):
+    """Run one scraper inside its host and Selenium limits. Returns (result, timing)."""
+    queued = time.perf_counter()
+    uses_selenium = type(scraper).__name__ in SELENIUM_SCRAPERS
+    if uses_selenium:
+        selenium_slots.acquire()
+    try:
+        with host_limiter.limit(scraper_host(scraper)):
+            started = time.perf_counter()
+            print(f"\n===== Scraping {scraper_name(scraper)} =====")
+            try:
+                data = scraper.scrape()
+                filename = scraper.save_to_json(data)
+                result = {
+                    "status": "success",
+                    "file": filename,
+                    "beer_count": len(data["beers"])
+                }
+            except Exception as e:
+                print(f"Error scraping {scraper_name(scraper)}: {e}")
+                result = {
+                    "status": "error",
+                    "error": str(e)
+                }
+            finished = time.perf_counter()
+    finally:
+        if uses_selenium:
+            selenium_slots.release()
+
+    timing = {
+        "host": scraper_host(scraper),
+        "waited": started - queued,
+        "ran": finished - started,
+        "selenium": uses_selenium,
+    }
+    return result, timing
+
+
+def run_scrapers(max_workers=MAX_WORKERS, max_selenium=MAX_SELENIUM):
+    """Run all brewery scrapers concurrently"""
     scrapers = [
         SuncatcherScraper(),
         OffColorScraper(),
@@ -29,27 +109,23 @@ def run_scrapers():
         HopButcherScraper(),
         # Add more scrapers here as they're developed
     ]
-    
-    results = {}
-    
-    for scraper in scrapers:
-        try:
-            print(f"\n===== Scraping {scraper.brewery_name} =====")
-            data = scraper.scrape()
-            filename = scraper.save_to_json(data)
-            
-            results[scraper.brewery_name] = {
-                "status": "success",
-                "file": filename,
-                "beer_count": len(data["beers"])
-            }
-        except Exception as e:
-            print(f"Error scraping {scraper.brewery_name}: {e}")
-            results[scraper.brewery_name] = {
-                "status": "error",
-                "error": str(e)
-            }
-    
+
+    host_limiter = HostLimiter()
+    selenium_slots = threading.BoundedSemaphore(max(1, max_selenium))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [
+            (scraper, pool.submit(run_scraper, scraper, host_limiter, selenium_slots))
+            for scraper in scrapers
+        ]
+        outcomes = [(scraper, future.result()) for scraper, future in futures]
+    wall_clock = time.perf_counter() - start
+
+    # Keep the scrapers' listed order in the summary
+    results = {scraper_name(scraper): result for scraper, (result, _) in outcomes}
+    timings = {scraper_name(scraper): timing for scraper, (_, timing) in outcomes}
+
     print("\n===== Scraping Results Summary =====")
     for brewery, result in results.items():
         if result["status"] == "success":
@@ -57,5 +133,32 @@ def run_scrapers():
         else:
             print(f"❌ {brewery}: {result['error']}")
 
+    cache = get_cache()
+    print("\n===== Timings =====")
+    for brewery, timing in sorted(timings.items(), key=lambda item: -item[1]["ran"]):
+        kind = "selenium" if timing["selenium"] else "http"
+        line = f"{brewery}: ran {timing['ran']:.1f}s, waited {timing['waited']:.1f}s ({kind})"
+        if cache and cache.get_stats(timing["host"])["requests"]:
+            line += f", cache hit rate {cache.get_stats(timing['host'])['hit_rate']:.0%}"
+        print(line)
+    sequential = sum(timing["ran"] for timing in timings.values())
+    print(f"Total wall-clock: {wall_clock:.1f}s (sum of scraper run times: {sequential:.1f}s)")
+    if cache:
+        print(cache.report())
+    pool = get_pool().get_stats()
+    print(f"WebDriver pool: {pool['launches']} browser launches ({pool['startup_seconds']:.1f}s), "
+          f"{pool['leases']} leases, {pool['commands']} WebDriver commands, {pool['recycled']} recycled, "
+          f"peak {pool['peak_rss_mb']:.0f} MB")
+    print(page_waits.report())
+    sessions = get_session_store()
+    if sessions:
+        print(sessions.report())
+
+    return results, timings
+
 if __name__ == "__main__":
-    run_scrapers()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run all brewery scrapers")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Scrapers to run at once")
+    parser.add_argument("--selenium", type=int, default=MAX_SELENIUM, help="Selenium scrapers to run at once")
+    args = parser.parse_args()
+    run_scrapers(args.workers, args.selenium)
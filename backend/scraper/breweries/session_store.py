@@ -0,0 +1,232 @@
+"""Age-verification and consent state per site, kept between runs.
+
+Goose Island, Revolution and Hopewell put an age gate or a popup in front of
+their beer lists, and the scrapers used to click through it on every run. Once
+a gate has been cleared, save_browser() keeps the site's cookies, along with
+any localStorage keys that look like age or consent flags, in SESSION_FILE.
+The next run restores them with restore_browser() before the first page load,
+and pass_gate() only runs the interactive bypass when the gate shows up anyway:
+
+    restored = restore_browser(driver, "revbrew.com")
+    driver.get(url)
+    pass_gate(driver, "revbrew.com", restored, gate_present, bypass)
+
+If a restored session doesn't get past the gate, it's forgotten and replaced
+with the one from the fresh bypass. cached_get() and fetch_pages() send the
+stored cookies with plain HTTP requests too.
+
+Sessions older than SCRAPER_SESSION_DAYS are dropped. SCRAPER_SESSIONS=0
+turns the store off; it's also off while replaying a cassette, whose pages
+were recorded behind the gate as it was.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+try:
+    from cassettes import replaying
+    from politeness import host_of
+except ImportError:  # imported as scraper.breweries.session_store
+    from .cassettes import replaying
+    from .politeness import host_of
+
+SESSIONS_ENABLED = os.environ.get('SCRAPER_SESSIONS', '1') != '0'
+SESSION_FILE = os.environ.get(
+    'SCRAPER_SESSION_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions.json')
+)
+SESSION_DAYS = float(os.environ.get('SCRAPER_SESSION_DAYS', 30))
+
+# Analytics cookies have nothing to do with the gate
+TRACKING_COOKIES = ('_ga', '_gid', '_gat', '_gcl', '_fbp', '_hj', '_clck', '_clsk', '__utm')
+
+# localStorage keys worth keeping; everything else is application state
+CONSENT_KEYS = re.compile(r'age|verif|consent|gate|cookie|popup|modal|newsletter', re.IGNORECASE)
+
+LOCAL_STORAGE_SCRIPT = """
+const items = {};
+for (let i = 0; i < localStorage.length; i++) {
+    const key = localStorage.key(i);
+    items[key] = localStorage.getItem(key);
+}
+return items;
+"""
+
+# Runs before any of the page's own scripts, on every document the tab loads
+RESTORE_STORAGE_SCRIPT = """
+(function (domain, items) {
+    const host = location.hostname;
+    if (host !== domain && !host.endsWith('.' + domain)) {
+        return;
+    }
+    for (const [key, value] of Object.entries(items)) {
+        if (localStorage.getItem(key) === null) {
+            localStorage.setItem(key, value);
+        }
+    }
+})(%s, %s);
+"""
+
+
+def _same_site(cookie_domain, domain):
+    cookie_domain = cookie_domain.lstrip('.').lower()
+    return cookie_domain == domain or cookie_domain.endswith('.' + domain) or domain.endswith('.' + cookie_domain)
+
+
+class SessionStore:
+    def __init__(self, path=SESSION_FILE, max_age_days=SESSION_DAYS):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._stats = {'restored': 0, 'passed': 0, 'expired': 0, 'saved': 0}
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, domain):
+        """The stored session for a domain, without expired cookies; None if there's nothing usable."""
+        with self._lock:
+            entry = self.entries.get(domain)
+        if entry is None or time.time() - entry['saved_at'] > self.max_age:
+            return None
+        now = time.time()
+        cookies = [c for c in entry['cookies'] if not c.get('expiry') or c['expiry'] > now]
+        if not cookies and not entry['local_storage']:
+            return None
+        return dict(entry, cookies=cookies)
+
+    def put(self, domain, cookies, local_storage):
+        cookies = [c for c in cookies if not c['name'].startswith(TRACKING_COOKIES)]
+        local_storage = {key: value for key, value in local_storage.items() if CONSENT_KEYS.search(key)}
+        with self._lock:
+            self.entries[domain] = {'saved_at': time.time(), 'cookies': cookies, 'local_storage': local_storage}
+            self._stats['saved'] += 1
+            self._save()
+
+    def forget(self, domain):
+        with self._lock:
+            if self.entries.pop(domain, None) is not None:
+                self._stats['expired'] += 1
+                self._save()
+
+    def save_browser(self, driver, domain):
+        """Store the cookies and consent flags the browser now holds for domain."""
+        cookies = [
+            {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expiry')
+             if key in cookie}
+            for cookie in driver.get_cookies() if _same_site(cookie.get('domain', domain), domain)
+        ]
+        self.put(domain, cookies, driver.execute_script(LOCAL_STORAGE_SCRIPT) or {})
+
+    def restore_browser(self, driver, domain):
+        """Load a stored session into the browser's current tab before it visits domain. True if there was one."""
+        entry = self.get(domain)
+        if entry is None:
+            return False
+        if entry['cookies']:
+            cookies = []
+            for cookie in entry['cookies']:
+                params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                          if key in cookie}
+                if cookie.get('expiry'):
+                    params['expires'] = cookie['expiry']
+                cookies.append(params)
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        if entry['local_storage']:
+            source = RESTORE_STORAGE_SCRIPT % (json.dumps(domain), json.dumps(entry['local_storage']))
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': source})
+        with self._lock:
+            self._stats['restored'] += 1
+        return True
+
+    def cookies_for(self, url):
+        """name -> value of the stored cookies that apply to url, for requests and aiohttp."""
+        host = host_of(url)
+        cookies = {}
+        with self._lock:
+            domains = [domain for domain in self.entries if _same_site(domain, host)]
+        for domain in domains:
+            entry = self.get(domain)
+            if entry:
+                cookies.update((c['name'], c['value']) for c in entry['cookies'])
+        return cookies
+
+    def passed(self):
+        with self._lock:
+            self._stats['passed'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, domains=len(self.entries))
+
+    def report(self):
+        stats = self.get_stats()
+        return (f"Sessions: {stats['restored']} restored, {stats['passed']} got past the gate, "
+                f"{stats['expired']} stopped working, {stats['saved']} saved ({stats['domains']} sites stored)")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """The shared session store, or None when SCRAPER_SESSIONS=0 or a cassette is replaying."""
+    global _store
+    if not SESSIONS_ENABLED or replaying():
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+def restore_browser(driver, domain):
+    store = get_session_store()
+    return store.restore_browser(driver, domain) if store else False
+
+
+def cookies_for(url):
+    store = get_session_store()
+    return (store.cookies_for(url) or None) if store else None
+
+
+def pass_gate(driver, domain, restored, gate_present, bypass):
+    """Get the current page past domain's gate, running bypass(driver) only if the stored session didn't.
+
+    gate_present(driver) says whether the gate is showing. A session that got
+    through a fresh bypass is stored for the next run. Returns False if the
+    gate is still there afterwards.
+    """
+    store = get_session_store()
+    if not gate_present(driver):
+        if restored:
+            print(f"{domain}: stored session got past the gate")
+            store.passed()
+        return True
+
+    if restored:
+        print(f"{domain}: stored session no longer gets past the gate, verifying again")
+        store.forget(domain)
+    bypass(driver)
+    if gate_present(driver):
+        print(f"{domain}: still gated after the bypass")
+        return False
+    if store:
+        try:
+            store.save_browser(driver, domain)
+            print(f"{domain}: stored the session for next time")
+        except Exception as e:
+            print(f"{domain}: could not store the session: {e}")
+    return True
@@ -0,0 +1,285 @@
+"""Shared pool of headless Chrome browsers for the Selenium scrapers.
+
+Launching Chrome costs seconds and a few hundred MB each time, and every
+scraper used to do it with its own set of flags. The pool launches at most
+SELENIUM_POOL_SIZE browsers, all with HARDENED_FLAGS, and lends them out:
+
+    driver = acquire_driver()
+    try:
+        driver.get(url)
+        ...
+    finally:
+        release_driver(driver)
+
+Each lease gets a fresh tab, and when it's returned the tab is closed and the
+cookies, cache and storage of every origin it visited are cleared, so one
+scraper's age-gate cookies never leak into the next. A browser is quit and
+replaced after MAX_PAGES page loads or once its process tree grows past
+MAX_RSS_MB.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from cassettes import get_cassette, recording, replaying
+
+POOL_SIZE = int(os.environ.get('SELENIUM_POOL_SIZE', 2))
+
+# Recycle a browser after this many page loads...
+MAX_PAGES = int(os.environ.get('SELENIUM_MAX_PAGES', 200))
+
+# ...or once Chrome and its children use more than this much memory
+MAX_RSS_MB = int(os.environ.get('SELENIUM_MAX_RSS_MB', 1024))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+HARDENED_FLAGS = [
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-notifications",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--mute-audio",
+    "--window-size=1920,1080",
+    f"user-agent={USER_AGENT}",
+]
+
+
+def chrome_options():
+    options = Options()
+    for flag in HARDENED_FLAGS:
+        options.add_argument(flag)
+    if recording():
+        # The cassette reads every response out of the performance log
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if replaying():
+        # Only the replay server is reachable
+        options.add_argument("--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1")
+    return options
+
+
+def process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants, from /proc. None where unavailable."""
+    children = {}
+    rss_pages = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+                with open(f'/proc/{entry}/statm') as f:
+                    rss_pages[int(entry)] = int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            # The command name is parenthesised and may contain spaces
+            parent = int(stat.rsplit(')', 1)[1].split()[1])
+            children.setdefault(parent, []).append(int(entry))
+    except OSError:
+        return None
+    if pid not in rss_pages:
+        return None
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += rss_pages.get(current, 0)
+        pending.extend(children.get(current, []))
+    return total * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class PooledDriver:
+    """A pooled WebDriver as seen by one scraper; counts page loads, WebDriver commands and visited origins."""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+        self.commands = 0
+        self.origins = set()
+        self.base_handle = driver.current_window_handle
+
+        # Every WebDriver command, including those WebElements send, goes through execute()
+        execute = driver.execute
+
+        def counted_execute(*args, **kwargs):
+            self.commands += 1
+            return execute(*args, **kwargs)
+
+        driver.execute = counted_execute
+
+    def get(self, url):
+        self.pages += 1
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https'):
+            self.origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        cassette = get_cassette()
+        if replaying():
+            url = cassette.local_url(url)
+            self.origins.add(cassette.server().base_url)
+        result = self._driver.get(url)
+        if recording():
+            cassette.record_browser(self._driver)
+        return result
+
+    def quit(self):
+        raise RuntimeError("Pooled browsers are returned with release_driver(), not quit()")
+
+    def rss_mb(self):
+        process = getattr(self._driver.service, 'process', None)
+        return process_tree_rss_mb(process.pid) if process else None
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class WebDriverPool:
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, max_rss_mb=MAX_RSS_MB):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._launched = 0
+        self._all = set()
+        self._stats = {
+            'launches': 0,
+            'startup_seconds': 0.0,
+            'leases': 0,
+            'recycled': 0,
+            'commands': 0,
+            'peak_rss_mb': 0.0,
+        }
+
+    def _launch(self):
+        started = time.perf_counter()
+        driver = PooledDriver(webdriver.Chrome(options=chrome_options()))
+        with self._lock:
+            self._stats['launches'] += 1
+            self._stats['startup_seconds'] += time.perf_counter() - started
+            self._all.add(driver)
+        return driver
+
+    def acquire(self, timeout=None):
+        """Lend out a browser, launching one if the pool isn't full yet."""
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_launch = self._launched < self.size
+                if can_launch:
+                    self._launched += 1
+            if can_launch:
+                try:
+                    driver = self._launch()
+                except Exception:
+                    with self._lock:
+                        self._launched -= 1
+                    raise
+            else:
+                driver = self._idle.get(timeout=timeout)
+
+        # A fresh tab per lease, so nothing from the last scraper's page is left around
+        driver.switch_to.new_window('tab')
+        with self._lock:
+            self._stats['leases'] += 1
+        return driver
+
+    def release(self, driver):
+        """Take a browser back: reset it, or quit it if it's due for recycling."""
+        with self._lock:
+            self._stats['commands'] += driver.commands
+        driver.commands = 0
+        try:
+            self._reset(driver)
+            rss_mb = driver.rss_mb()
+            if rss_mb is not None:
+                with self._lock:
+                    self._stats['peak_rss_mb'] = max(self._stats['peak_rss_mb'], round(rss_mb, 1))
+            healthy = driver.pages < self.max_pages and (rss_mb is None or rss_mb < self.max_rss_mb)
+        except Exception as e:
+            print(f"Pooled browser failed to reset, replacing it: {e}")
+            healthy = False
+
+        if healthy:
+            self._idle.put(driver)
+            return
+        with self._lock:
+            self._stats['recycled'] += 1
+        self._discard(driver)
+
+    def _reset(self, driver):
+        if recording():
+            # Whatever the page fetched after the last get(), e.g. on clicks and scrolls
+            get_cassette().record_browser(driver._driver)
+        for handle in driver.window_handles:
+            if handle != driver.base_handle:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(driver.base_handle)
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        for origin in driver.origins:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.origins.clear()
+
+    def _discard(self, driver):
+        with self._lock:
+            self._launched -= 1
+            self._all.discard(driver)
+        try:
+            driver._driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            drivers = list(self._all)
+        for driver in drivers:
+            self._discard(driver)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats, open=self._launched)
+        stats['startup_seconds'] = round(stats['startup_seconds'], 2)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WebDriverPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def acquire_driver(timeout=None):
+    return get_pool().acquire(timeout)
+
+
+def release_driver(driver):
+    get_pool().release(driver)
@@ -6,6 +6,11 @@ import logging
 import csv
 from pathlib import Path
 
+# Add the backend directory to the path so we can import the shared connection factory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_connection import connect, get_writer
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,9 +28,10 @@ class BreweryDataManager:
             db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'beers.db')
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # Reads use our own connection; writes are serialized through the shared writer queue
+        self.conn = connect(db_path, row_factory=sqlite3.Row)  # Return rows as dictionaries
         self.cursor = self.conn.cursor()
+        self.writer = get_writer(db_path)
     
     def __del__(self):
         """Close database connection on object destruction"""
@@ -63,17 +69,13 @@ class BreweryDataManager:
                 return None
             
             query = f"INSERT INTO breweries ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-            self.cursor.execute(query, values)
-            self.conn.commit()
-            
-            brewery_id = self.cursor.lastrowid
+            brewery_id = self.writer.run(self._insert_row, query, values)
             logging.info(f"Added brewery '{brewery_data.get('name')}' with ID {brewery_id}")
             
             return brewery_id
         
         except sqlite3.Error as e:
             logging.error(f"Database error while adding brewery: {e}")
-            self.conn.rollback()
             return None
     
     def add_beer(self, beer_data):
@@ -111,27 +113,34 @@ class BreweryDataManager:
                 return None
             
             query = f"INSERT INTO beers ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-            self.cursor.execute(query, values)
-            
-            beer_id = self.cursor.lastrowid
-            
-            # Link beer to brewery if brewery_id is provided
-            if 'brewery_id' in beer_data and beer_data['brewery_id'] is not None:
-                self.cursor.execute("""
-                    INSERT INTO beer_locations (beer_id, brewery_id)
-                    VALUES (?, ?)
-                """, (beer_id, beer_data['brewery_id']))
-            
-            self.conn.commit()
+            beer_id = self.writer.run(self._insert_beer, query, values, beer_data.get('brewery_id'))
             logging.info(f"Added beer '{beer_data.get('name')}' with ID {beer_id}")
             
             return beer_id
         
         except sqlite3.Error as e:
             logging.error(f"Database error while adding beer: {e}")
-            self.conn.rollback()
             return None
     
+    @staticmethod
+    def _insert_row(conn, query, values):
+        """Writer job: insert a single row and return its ID"""
+        return conn.execute(query, values).lastrowid
+    
+    @staticmethod
+    def _insert_beer(conn, query, values, brewery_id):
+        """Writer job: insert a beer and link it to its brewery in one transaction"""
+        beer_id = conn.execute(query, values).lastrowid
+        
+        # Link beer to brewery if brewery_id is provided
+        if brewery_id is not None:
+            conn.execute("""
+                INSERT INTO beer_locations (beer_id, brewery_id)
+                VALUES (?, ?)
+            """, (beer_id, brewery_id))
+        
+        return beer_id
+    
     def import_from_json(self, json_file):
         """Import data from a JSON file"""
         try:
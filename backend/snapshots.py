@@ -0,0 +1,194 @@
+"""Generation-numbered catalog snapshots shared by the ETL pipeline and the API.
+
+The ETL builds a staging copy of the database, validates it, and publishes it
+as beers.gen-<N>.db next to the live database. The published file is never
+written again. A small pointer file (beers.db.current) names the current
+generation and is swapped with an atomic rename, so API workers pick up the
+new catalog on their next request without ever seeing a half-applied update.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from db_connection import connect
+
+POINTER_SUFFIX = '.current'
+
+# Older generations are kept around so requests still reading them can finish
+KEEP_GENERATIONS = 3
+
+# A new snapshot may not lose more than this fraction of the previous catalog
+MAX_BEER_LOSS = 0.5
+
+REQUIRED_TABLES = ('breweries', 'beers')
+
+
+class SnapshotValidationError(ValueError):
+    """Raised when a staging database is not fit to be published."""
+
+
+def pointer_path(db_path):
+    return db_path + POINTER_SUFFIX
+
+
+def staging_path(db_path):
+    base, ext = os.path.splitext(db_path)
+    return f"{base}.staging{ext}"
+
+
+def generation_path(db_path, generation):
+    base, ext = os.path.splitext(db_path)
+    return f"{base}.gen-{generation:06d}{ext}"
+
+
+def read_pointer(db_path):
+    """Return the published generation for a database, or None if nothing was published."""
+    try:
+        with open(pointer_path(db_path), 'r') as f:
+            pointer = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    directory = os.path.dirname(os.path.abspath(db_path))
+    pointer['path'] = os.path.join(directory, pointer['file'])
+    return pointer
+
+
+_pointer_cache = {}
+_pointer_lock = threading.Lock()
+
+
+def current_snapshot(db_path):
+    """Resolve the database file the API should read from.
+
+    Returns a dict with 'generation' and 'path'. Generation 0 means no snapshot
+    has been published and readers use the live database directly. The pointer
+    file is only re-read when its mtime changes, so this costs one stat() per call.
+    """
+    try:
+        stat = os.stat(pointer_path(db_path))
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except FileNotFoundError:
+        return {'generation': 0, 'path': db_path}
+
+    with _pointer_lock:
+        cached = _pointer_cache.get(db_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+    pointer = read_pointer(db_path)
+    if pointer is None or not os.path.exists(pointer['path']):
+        return {'generation': 0, 'path': db_path}
+
+    snapshot = {'generation': pointer['generation'], 'path': pointer['path']}
+    with _pointer_lock:
+        _pointer_cache[db_path] = (stamp, snapshot)
+    return snapshot
+
+
+def build_staging(source_path, db_path):
+    """Copy the source database into a fresh staging file and return its path.
+
+    Uses SQLite's online backup so scrapers can keep writing to the source.
+    """
+    path = staging_path(db_path)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    source = connect(source_path, readonly=True)
+    staging = sqlite3.connect(path)
+    try:
+        source.backup(staging)
+    finally:
+        staging.close()
+        source.close()
+    return path
+
+
+def validate_snapshot(path, db_path):
+    """Check a staging database before it is published.
+
+    Raises SnapshotValidationError describing the first problem found.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != 'ok':
+            raise SnapshotValidationError(f"Integrity check failed: {result}")
+
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table for table in REQUIRED_TABLES if table not in tables]
+        if missing:
+            raise SnapshotValidationError(f"Missing tables: {', '.join(missing)}")
+
+        beer_count = conn.execute("SELECT COUNT(*) FROM beers").fetchone()[0]
+        if beer_count == 0:
+            raise SnapshotValidationError("Snapshot has no beers")
+    finally:
+        conn.close()
+
+    previous = read_pointer(db_path)
+    if previous and previous.get('beer_count'):
+        if beer_count < previous['beer_count'] * (1 - MAX_BEER_LOSS):
+            raise SnapshotValidationError(
+                f"Snapshot has {beer_count} beers, down from {previous['beer_count']} "
+                f"in generation {previous['generation']}"
+            )
+
+    return {'beer_count': beer_count}
+
+
+def publish_snapshot(path, db_path, stats=None):
+    """Publish a validated staging database as the next generation.
+
+    The staging file is switched out of WAL mode so the published file is
+    self-contained, renamed into place, and then the pointer file is replaced
+    atomically. Returns the new generation number.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+
+    previous = read_pointer(db_path)
+    generation = (previous['generation'] if previous else 0) + 1
+    target = generation_path(db_path, generation)
+
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(path, target)
+
+    pointer = {
+        'generation': generation,
+        'file': os.path.basename(target),
+        'published_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    pointer.update(stats or {})
+
+    tmp_pointer = pointer_path(db_path) + '.tmp'
+    with open(tmp_pointer, 'w') as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer_path(db_path))
+
+    prune_generations(db_path, generation)
+    return generation
+
+
+def prune_generations(db_path, current_generation):
+    """Delete published generations older than the last KEEP_GENERATIONS."""
+    directory = os.path.dirname(os.path.abspath(db_path))
+    base, ext = os.path.splitext(os.path.basename(db_path))
+    pattern = re.compile(rf"^{re.escape(base)}\.gen-(\d+){re.escape(ext)}$")
+
+    for filename in os.listdir(directory):
+        match = pattern.match(filename)
+        if match and int(match.group(1)) <= current_generation - KEEP_GENERATIONS:
+            os.remove(os.path.join(directory, filename))
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""Stress test for concurrent scraper writes and API reads against one database.
+
+Runs several scrapers' save paths at the same time as a pool of API-style
+readers and an out-of-process ETL writer, then reports lock waits on the
+writer side and latency percentiles on the reader side.
+
+    python stress_db_concurrency.py --scrapers 6 --readers 8 --seconds 10
+    python stress_db_concurrency.py --baseline   # default journal, no writer queue
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from db_connection import connect, get_writer
+from scraper.base import BaseScraper
+
+SCHEMA = """
+CREATE TABLE breweries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    location TEXT,
+    website TEXT
+);
+CREATE TABLE beer_categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    parent_id INTEGER
+);
+CREATE TABLE beers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    brewery_id INTEGER,
+    type TEXT,
+    abv REAL,
+    description TEXT,
+    category_id INTEGER
+);
+CREATE TABLE beer_locations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    beer_id INTEGER,
+    brewery_id INTEGER,
+    is_available INTEGER DEFAULT 1,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# The same shape of query /api/search runs
+SEARCH_SQL = """
+    SELECT b.id, b.name, b.type, b.abv, b.description, br.name AS brewery
+    FROM beers b
+    JOIN beer_locations bl ON bl.beer_id = b.id
+    JOIN breweries br ON bl.brewery_id = br.id
+    LEFT JOIN beer_categories c ON b.category_id = c.id
+    WHERE b.name LIKE ? OR b.description LIKE ? OR b.type LIKE ?
+    ORDER BY b.name
+"""
+
+STYLES = ['IPA', 'Hazy IPA', 'Pilsner', 'Stout', 'Porter', 'Lager', 'Sour', 'Saison']
+
+
+class SyntheticScraper(BaseScraper):
+    """Scraper that 'extracts' a random tap list instead of fetching a website"""
+
+    def extract_beers(self):
+        beers = []
+        for i in range(random.randint(20, 60)):
+            style = random.choice(STYLES)
+            beers.append({
+                'name': f"{self.name} {style} #{random.randint(1, 200)}",
+                'type': style,
+                'abv': round(random.uniform(4.0, 11.0), 1),
+                'description': f"A {style.lower()} brewed for the stress test",
+            })
+        return beers
+
+
+class BaselineScraper(SyntheticScraper):
+    """Same scraper, but writing through its own plain connection like the old save path"""
+
+    def save_beers(self, beers):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=0)
+            try:
+                self._write_beers(conn, beers)
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error as e:
+            self.logger.debug(f"Database error: {str(e)}")
+            return False
+
+
+def create_database(path, brewery_count):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for i in range(brewery_count):
+        conn.execute("INSERT INTO breweries (name, location) VALUES (?, 'Chicago, IL')", (f"Brewery {i}",))
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def etl_process(db_path, seconds, baseline):
+    """Simulates etl_beer_data running in another process with long write transactions"""
+    deadline = time.time() + seconds
+    if baseline:
+        conn = sqlite3.connect(db_path, timeout=0)
+    else:
+        conn = connect(db_path)
+    while time.time() < deadline:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for _ in range(200):
+                conn.execute(
+                    "INSERT INTO beers (name, type, abv, description) VALUES (?, ?, ?, ?)",
+                    (f"ETL beer {random.random()}", random.choice(STYLES), 5.0, "etl"),
+                )
+            time.sleep(0.05)  # simulate parsing work while holding the write lock
+            conn.commit()
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.rollback()
+        time.sleep(0.01)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test concurrent database access")
+    parser.add_argument("--scrapers", type=int, default=6, help="Number of concurrent scraper threads")
+    parser.add_argument("--readers", type=int, default=8, help="Number of concurrent API reader threads")
+    parser.add_argument("--seconds", type=float, default=10.0, help="How long to run")
+    parser.add_argument("--baseline", action="store_true",
+                        help="Use the old setup: rollback journal, no busy timeout, no writer queue")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="beer_stress_")
+    db_path = os.path.join(tmp_dir, 'beers.db')
+    create_database(db_path, args.scrapers)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_latencies = []
+    save_latencies = []
+    errors = {'read': 0, 'write': 0}
+
+    def scraper_loop(brewery_id):
+        scraper_class = BaselineScraper if args.baseline else SyntheticScraper
+        scraper = scraper_class(brewery_id, f"Brewery {brewery_id}", "http://localhost", db_path)
+        while not stop.is_set():
+            started = time.perf_counter()
+            ok = scraper.run()
+            elapsed = time.perf_counter() - started
+            with lock:
+                save_latencies.append(elapsed)
+                if not ok:
+                    errors['write'] += 1
+
+    def reader_loop():
+        if args.baseline:
+            conn = sqlite3.connect(db_path, timeout=0)
+        else:
+            conn = connect(db_path, readonly=True)
+        while not stop.is_set():
+            pattern = f"%{random.choice(STYLES)[:3]}%"
+            started = time.perf_counter()
+            try:
+                conn.execute(SEARCH_SQL, (pattern, pattern, pattern)).fetchall()
+                ok = True
+            except sqlite3.OperationalError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    read_latencies.append(elapsed)
+                else:
+                    errors['read'] += 1
+        conn.close()
+
+    etl = multiprocessing.Process(target=etl_process, args=(db_path, args.seconds, args.baseline))
+    threads = [threading.Thread(target=scraper_loop, args=(i + 1,)) for i in range(args.scrapers)]
+    threads += [threading.Thread(target=reader_loop) for _ in range(args.readers)]
+
+    print(f"Running {'baseline' if args.baseline else 'WAL + writer queue'} stress test "
+          f"for {args.seconds:.0f}s: {args.scrapers} scrapers, {args.readers} readers, 1 ETL process")
+    etl.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    etl.join()
+
+    print("\n=== Writes (scraper save_beers) ===")
+    print(f"Saves completed: {len(save_latencies)}, failed: {errors['write']}")
+    if save_latencies:
+        print(f"Save latency p50={percentile(save_latencies, 50) * 1000:.1f}ms "
+              f"p95={percentile(save_latencies, 95) * 1000:.1f}ms "
+              f"max={max(save_latencies) * 1000:.1f}ms")
+    if not args.baseline:
+        stats = get_writer(db_path).get_stats()
+        print(f"Writer jobs: {stats['jobs']}, lock waits: {stats['lock_waits']}, "
+              f"total wait: {stats['lock_wait_seconds']:.2f}s, "
+              f"max wait: {stats['max_lock_wait_seconds'] * 1000:.1f}ms")
+
+    print("\n=== Reads (API search) ===")
+    print(f"Queries completed: {len(read_latencies)}, failed with 'database is locked': {errors['read']}")
+    if read_latencies:
+        print(f"Read latency p50={percentile(read_latencies, 50) * 1000:.2f}ms "
+              f"p95={percentile(read_latencies, 95) * 1000:.2f}ms "
+              f"p99={percentile(read_latencies, 99) * 1000:.2f}ms "
+              f"mean={statistics.mean(read_latencies) * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Tap-list change events recorded by the ETL pipeline at publish time.
+
+Before a staging database is published, its availability (which beers are on
+tap where) is compared with the previous generation's, and every change is
+written to a taplist_events table in the staging database: a beer was
+added, removed, or is back on tap. Event ids carry on from the previous
+generation, so API subscribers can resume from the last id they saw.
+"""
+import sqlite3
+
+# Events carried forward from one generation to the next, for resuming streams
+KEEP_EVENTS = 1000
+
+EVENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS taplist_events (
+    id INTEGER PRIMARY KEY,
+    event TEXT NOT NULL,
+    beer_id INTEGER,
+    beer_name TEXT,
+    brewery_id INTEGER,
+    brewery_name TEXT,
+    category_id INTEGER,
+    generation INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def ensure_events_table(conn):
+    conn.execute(EVENTS_SCHEMA)
+
+
+def availability(conn):
+    """Map (brewery name, beer name) to the beer's row and whether it's on tap."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'beer_locations' in tables:
+        rows = conn.execute("""
+            SELECT b.id, b.name, br.id, br.name, b.category_id, MAX(bl.is_available)
+            FROM beer_locations bl
+            JOIN beers b ON bl.beer_id = b.id
+            JOIN breweries br ON bl.brewery_id = br.id
+            GROUP BY b.id, br.id
+        """).fetchall()
+    else:
+        rows = []
+
+    state = {}
+    for beer_id, beer_name, brewery_id, brewery_name, category_id, is_available in rows:
+        state[(brewery_name, beer_name)] = (beer_id, brewery_id, category_id, bool(is_available))
+
+    # Beers linked only through beers.brewery_id count as on tap
+    for beer_id, beer_name, brewery_id, brewery_name, category_id in conn.execute("""
+        SELECT b.id, b.name, br.id, br.name, b.category_id
+        FROM beers b
+        JOIN breweries br ON b.brewery_id = br.id
+    """):
+        state.setdefault((brewery_name, beer_name), (beer_id, brewery_id, category_id, True))
+    return state
+
+
+def diff_availability(previous, current):
+    """Yield (event, key, row) for every change between two availability maps."""
+    for key, row in current.items():
+        before = previous.get(key)
+        if row[3] and before is None:
+            yield 'added', key, row
+        elif row[3] and not before[3]:
+            yield 'back_on_tap', key, row
+        elif not row[3] and before is not None and before[3]:
+            yield 'removed', key, row
+    for key, row in previous.items():
+        if key not in current and row[3]:
+            yield 'removed', key, row
+
+
+def record_taplist_changes(previous_path, staging_path, generation):
+    """Write the tap-list changes since the previous generation into the staging database.
+
+    Returns the number of new events. The first generation has nothing to
+    compare against and records none.
+    """
+    staging = sqlite3.connect(staging_path)
+    try:
+        ensure_events_table(staging)
+        staging.execute("DELETE FROM taplist_events")
+        if previous_path is None:
+            staging.commit()
+            return 0
+
+        previous = sqlite3.connect(f"file:{previous_path}?mode=ro", uri=True)
+        try:
+            has_events = previous.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'taplist_events'"
+            ).fetchone()
+            carried = previous.execute(
+                "SELECT * FROM taplist_events ORDER BY id DESC LIMIT ?", (KEEP_EVENTS,)
+            ).fetchall() if has_events else []
+            before = availability(previous)
+        finally:
+            previous.close()
+
+        staging.executemany(
+            "INSERT INTO taplist_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", reversed(carried)
+        )
+        next_id = (carried[0][0] if carried else 0) + 1
+
+        count = 0
+        for event, (brewery_name, beer_name), (beer_id, brewery_id, category_id, _) in diff_availability(
+            before, availability(staging)
+        ):
+            staging.execute("""
+                INSERT INTO taplist_events
+                    (id, event, beer_id, beer_name, brewery_id, brewery_name, category_id, generation)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (next_id + count, event, beer_id, beer_name, brewery_id, brewery_name, category_id, generation))
+            count += 1
+
+        staging.commit()
+        return count
+    finally:
+        staging.close()
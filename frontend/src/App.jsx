@@ -40,11 +40,11 @@ function App() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const filtersResponse = await axios.get('/api/filters');
-        setFilterOptions(filtersResponse.data);
-
-        const breweriesResponse = await axios.get('/api/breweries');
-        setBreweries(breweriesResponse.data.breweries);
+        // Filters, categories and breweries arrive together in one cached document
+        const bootstrapResponse = await axios.get('/api/bootstrap');
+        const { filters, categories, breweries } = bootstrapResponse.data;
+        setFilterOptions({ ...filters, categories });
+        setBreweries(breweries);
 
       } catch (error) {
         console.error('Error fetching filter options:', error);